@@ -0,0 +1,2 @@
+# load test for the otp routing api: a replayable corpus of trip queries, an open loop load generator,
+# a stub otp server for local runs and saved results to compare runs
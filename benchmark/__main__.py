@@ -0,0 +1,117 @@
+import argparse
+import datetime
+import json
+import sys
+import time
+
+from benchmark import corpus, loadgen, results, stub
+
+# same area as const.SERVICE_AREA_BBOX, min lon, min lat, max lon, max lat
+DEFAULT_BBOX = (6.6, 51.3, 11.6, 54.0)
+
+
+def next_weekday():
+    # next tuesday, a regular service day of the gtfs feed
+    today = datetime.date.today()
+    return (today + datetime.timedelta(days=(1 - today.weekday()) % 7 or 7)).isoformat()
+
+
+def run_benchmark(args):
+    queries = corpus.load_corpus(args.corpus) if args.corpus else \
+        corpus.generate_corpus(args.bbox, args.count, args.seed)
+    started = time.time()
+    samples, elapsed = loadgen.run(args.url, queries, args.date, args.qps, args.duration, args.concurrency,
+                                   args.timeout)
+    result = {'label': args.label,
+              'started': started,
+              'url': args.url,
+              'date': args.date,
+              'qps': args.qps,
+              'duration': args.duration,
+              'corpus': args.corpus or {'seed': args.seed, 'count': args.count, 'bbox': args.bbox},
+              'summary': loadgen.summarize(samples, elapsed)}
+    print(json.dumps(result['summary'], indent=2))
+    if args.results:
+        print('saved', results.save_result(result, args.results))
+
+
+def run_evaluation(args):
+    # the evaluation needs pulumi, which the load test in the cluster does not have
+    from benchmark import evaluation
+    from tests.mocks import MOCK_CONFIG
+    config = dict(MOCK_CONFIG)
+    for setting in args.config:
+        key, _, value = setting.partition('=')
+        config[key if ':' in key else f'project:{key}'] = value
+    started = time.time()
+    result = {'label': args.label,
+              'started': started,
+              'config': config,
+              'iterations': args.iterations,
+              'summary': evaluation.evaluate(args.repo, config, args.iterations)}
+    print(json.dumps(result['summary'], indent=2))
+    if args.results:
+        print('saved', results.save_result(result, args.results))
+    if result['summary']['duplicates']:
+        print('duplicate resources:', ', '.join(result['summary']['duplicates']))
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='benchmark', description='load test of the otp routing api')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='send trip queries at a fixed rate and report latencies')
+    run.add_argument('--url', required=True, help='base url of otp, e.g. http://localhost:8080')
+    run.add_argument('--label', default='run', help='name of the run in the saved results')
+    run.add_argument('--qps', type=float, default=5)
+    run.add_argument('--duration', type=float, default=60, help='seconds')
+    run.add_argument('--concurrency', type=int, default=64, help='max requests in flight')
+    run.add_argument('--timeout', type=float, default=30, help='seconds per request')
+    run.add_argument('--date', default=next_weekday(), help='service date of the queries')
+    run.add_argument('--corpus', help='saved corpus to replay instead of a generated one')
+    run.add_argument('--seed', type=int, default=1)
+    run.add_argument('--count', type=int, default=500)
+    run.add_argument('--bbox', type=float, nargs=4, default=DEFAULT_BBOX)
+    run.add_argument('--results', default='benchmark/results', help='folder of saved results, empty to not save')
+
+    generate = commands.add_parser('corpus', help='write a generated corpus to replay it later')
+    generate.add_argument('path')
+    generate.add_argument('--seed', type=int, default=1)
+    generate.add_argument('--count', type=int, default=500)
+    generate.add_argument('--bbox', type=float, nargs=4, default=DEFAULT_BBOX)
+
+    serve = commands.add_parser('stub', help='serve a stub otp plan endpoint for local runs')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--latency', type=float, default=150, help='median latency in ms')
+    serve.add_argument('--error-rate', type=float, default=0.0)
+
+    program = commands.add_parser('evaluate', help='time the pulumi program under mocks and count its resources')
+    program.add_argument('--repo', default='.', help='root of the pulumi program')
+    program.add_argument('--label', default='evaluation', help='name of the run in the saved results')
+    program.add_argument('--iterations', type=int, default=5)
+    program.add_argument('--config', action='append', default=[],
+                         help='stack config key=value, e.g. digitransit_mode=static')
+    program.add_argument('--results', default='benchmark/results/evaluation',
+                         help='folder of saved results, empty to not save')
+
+    diff = commands.add_parser('compare', help='compare two saved results')
+    diff.add_argument('baseline')
+    diff.add_argument('candidate')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run_benchmark(args)
+    elif args.command == 'corpus':
+        corpus.save_corpus(corpus.generate_corpus(args.bbox, args.count, args.seed), args.path)
+    elif args.command == 'evaluate':
+        return run_evaluation(args)
+    elif args.command == 'stub':
+        stub.serve(args.port, args.latency, args.error_rate)
+    else:
+        print(results.compare(results.load_result(args.baseline), results.load_result(args.candidate)))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import json
+import random
+
+# places with most trips in the service area as latitude, longitude
+HUBS = {
+    'bremen': (53.0833, 8.8136),
+    'bremerhaven': (53.5396, 8.5809),
+    'oldenburg': (53.1435, 8.2146),
+    'delmenhorst': (53.0511, 8.6310),
+    'verden': (52.9227, 9.2344),
+    'achim': (53.0130, 9.0260),
+    'osterholz-scharmbeck': (53.2270, 8.7950),
+    'syke': (52.9130, 8.8260),
+    'cuxhaven': (53.8615, 8.6944),
+    'nienburg': (52.6410, 9.2090),
+}
+# bremen has most of the trips
+HUB_WEIGHTS = {'bremen': 8, 'oldenburg': 3, 'bremerhaven': 3}
+# hours of departure with the commute peaks weighted up
+HOUR_WEIGHTS = {hour: 3 if hour in (7, 8, 16, 17) else 1 for hour in range(6, 23)}
+# standard deviation of the distance to a hub in degrees, about 3 km
+SPREAD = 0.03
+
+
+def get_place(rng, bbox):
+    # random point near a hub inside the bounding box
+    hub = rng.choices(list(HUBS), weights=[HUB_WEIGHTS.get(hub, 1) for hub in HUBS])[0]
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lat, lon = HUBS[hub]
+    lat = min(max(rng.gauss(lat, SPREAD), min_lat), max_lat)
+    lon = min(max(rng.gauss(lon, SPREAD * 1.6), min_lon), max_lon)
+    return round(lat, 5), round(lon, 5)
+
+
+def generate_corpus(bbox, count, seed):
+    # origin, destination and departure time of trip queries, the same seed gives the same corpus
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        origin, destination = get_place(rng, bbox), get_place(rng, bbox)
+        if origin == destination:
+            continue
+        hour = rng.choices(list(HOUR_WEIGHTS), weights=list(HOUR_WEIGHTS.values()))[0]
+        queries.append({'from': origin, 'to': destination, 'time': f'{hour:02d}:{rng.randrange(60):02d}'})
+    return queries
+
+
+def save_corpus(queries, path):
+    with open(path, 'w') as file:
+        for query in queries:
+            file.write(json.dumps(query) + '\n')
+
+
+def load_corpus(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -0,0 +1,58 @@
+# evaluation of the pulumi program under runtime mocks, without gcp access. every iteration runs the program
+# in a new python process on a copy of the repo with placeholder blobs, so a run measures a cold preview
+# and nothing in the working tree changes
+import collections
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from tests.mocks import COPY_IGNORED, evaluate_program
+
+
+def summarize_resources(resources, seconds):
+    # resource graph size by type, (type, name) pairs must be unique like the urns of a stack
+    counts = collections.Counter((typ, name) for typ, name, _ in resources)
+    duplicates = sorted(f'{typ}::{name}' for (typ, name), count in counts.items() if count > 1)
+    return {'evaluation_s': round(seconds, 3),
+            'resources': sum(custom for _, _, custom in resources),
+            'components': sum(not custom for _, _, custom in resources),
+            'types': dict(sorted(collections.Counter(typ for typ, _, _ in resources).items())),
+            'duplicates': duplicates}
+
+
+def run_iteration(repo, config):
+    # one evaluation in a new process on a fresh copy of the repo
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'planner')
+        shutil.copytree(repo, path, ignore=COPY_IGNORED)
+        started = time.monotonic()
+        process = subprocess.run([sys.executable, '-m', 'benchmark.evaluation', path, json.dumps(config)],
+                                 cwd=repo, capture_output=True, text=True)
+        elapsed = time.monotonic() - started
+    if process.returncode:
+        raise RuntimeError(f'program evaluation failed:\n{process.stderr}')
+    summary = json.loads(process.stdout.splitlines()[-1])
+    summary['process_s'] = round(elapsed, 3)
+    return summary
+
+
+def evaluate(repo, config, iterations):
+    # median times of the iterations, the resource graph of the last one
+    summaries = [run_iteration(repo, config) for _ in range(iterations)]
+    summary = dict(summaries[-1])
+    for name in ['evaluation_s', 'process_s']:
+        times = sorted(run[name] for run in summaries)
+        summary[name] = times[len(times) // 2]
+        summary[f'{name}_max'] = times[-1]
+    return summary
+
+
+if __name__ == '__main__':
+    started = time.monotonic()
+    program_resources = evaluate_program(sys.argv[1], json.loads(sys.argv[2]))
+    # the program prints nothing itself, the summary is the last line
+    print(json.dumps(summarize_resources(program_resources, time.monotonic() - started)))
@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PLAN_PATH = '/otp/routers/default/plan'
+
+
+def get_plan_url(base_url, query, date):
+    params = {'fromPlace': '{},{}'.format(*query['from']),
+              'toPlace': '{},{}'.format(*query['to']),
+              'date': date,
+              'time': query['time'],
+              'mode': 'TRANSIT,WALK'}
+    return base_url.rstrip('/') + PLAN_PATH + '?' + urllib.parse.urlencode(params)
+
+
+def send(url, timeout):
+    # status and whether otp found an itinerary, status 0 for connection errors and timeouts
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            plan = json.loads(response.read())
+            return response.status, bool(plan.get('plan', {}).get('itineraries'))
+    except urllib.error.HTTPError as error:
+        return error.code, False
+    except (OSError, ValueError):
+        return 0, False
+
+
+def run(base_url, queries, date, qps, duration, concurrency=64, timeout=30):
+    # open loop load at a fixed rate, queries are replayed in order and wrap around.
+    # latency counts from the scheduled send time, so a saturated server is not hidden by queued requests
+    samples = []
+    lock = threading.Lock()
+    total = int(qps * duration)
+
+    def request(index, scheduled):
+        status, found = send(get_plan_url(base_url, queries[index % len(queries)], date), timeout)
+        with lock:
+            samples.append({'latency': time.monotonic() - scheduled, 'status': status, 'found': found})
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for index in range(total):
+            scheduled = started + index / qps
+            time.sleep(max(0.0, scheduled - time.monotonic()))
+            pool.submit(request, index, scheduled)
+    return samples, time.monotonic() - started
+
+
+def percentile(values, share):
+    # nearest rank percentile of sorted values
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, round(share * len(values)) - 1))]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample['latency'] for sample in samples)
+    errors = sum(1 for sample in samples if sample['status'] != 200)
+    no_itinerary = sum(1 for sample in samples if sample['status'] == 200 and not sample['found'])
+    return {'requests': len(samples),
+            'throughput': round(len(samples) / elapsed, 2) if elapsed else 0,
+            'error_rate': round(errors / len(samples), 4) if samples else 0,
+            'no_itinerary_rate': round(no_itinerary / len(samples), 4) if samples else 0,
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 1) if samples else None,
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 1) if samples else None,
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 1) if samples else None,
+            'max_ms': round(latencies[-1] * 1000, 1) if samples else None}
@@ -0,0 +1,36 @@
+import json
+import os
+import time
+
+COMPARED = ['throughput', 'error_rate', 'no_itinerary_rate', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms']
+
+
+def save_result(result, folder):
+    # one json file per run, named by start time and label so runs sort by time
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, '{}-{}.json'.format(time.strftime('%Y%m%d-%H%M%S', time.gmtime(result['started'])),
+                                                    result['label']))
+    with open(path, 'w') as file:
+        json.dump(result, file, indent=2)
+    return path
+
+
+def load_result(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def get_compared(summary):
+    # the load test values, or every number of other summaries such as program evaluations
+    return [name for name in COMPARED if name in summary] or \
+        [name for name, value in summary.items() if isinstance(value, (int, float))]
+
+
+def compare(baseline, candidate):
+    # table of the summary values of two runs with the relative change
+    lines = ['{:<20}{:>14}{:>14}{:>10}'.format('', baseline['label'][:13], candidate['label'][:13], 'change')]
+    for name in get_compared(baseline['summary']):
+        old, new = baseline['summary'].get(name), candidate['summary'].get(name)
+        change = '{:+.1%}'.format((new - old) / old) if old and new is not None else ''
+        lines.append('{:<20}{:>14}{:>14}{:>10}'.format(name, str(old), str(new), change))
+    return '\n'.join(lines)
@@ -0,0 +1,41 @@
+import json
+import random
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark.loadgen import PLAN_PATH
+
+ITINERARY = {'duration': 1800, 'walkTime': 300, 'transfers': 1, 'legs': [{'mode': 'WALK'}, {'mode': 'BUS'}]}
+
+
+def serve(port, latency_ms, error_rate, seed=None):
+    # stand-in for the otp plan endpoint with log normal latency around latency_ms and random server errors
+    rng = random.Random(seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            if url.path != PLAN_PATH:
+                return self.respond(404, {'error': 'not found'})
+            time.sleep(rng.lognormvariate(0, 0.5) * latency_ms / 1000)
+            if rng.random() < error_rate:
+                return self.respond(500, {'error': 'stub error'})
+            params = urllib.parse.parse_qs(url.query)
+            self.respond(200, {'requestParameters': {name: values[0] for name, values in params.items()},
+                               'plan': {'itineraries': [ITINERARY]}})
+
+        def respond(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    ThreadingHTTPServer(('', port), Handler).serve_forever()
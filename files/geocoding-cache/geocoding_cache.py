@@ -0,0 +1,150 @@
+# caching proxy in front of pelias-adapter. responses are kept in a lru cache with ttl under a normalized
+# query key, identical queries in flight are sent upstream only once
+# UPSTREAM_URL: pelias-adapter base url, PORT: listen port, CACHE_ENTRIES: max cached responses,
+# CACHE_TTL: seconds a response is served from the cache, FOCUS_PRECISION: decimals kept of focus points
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAM_URL = os.environ['UPSTREAM_URL'].rstrip('/')
+PORT = int(os.environ.get('PORT', '8076'))
+CACHE_ENTRIES = int(os.environ.get('CACHE_ENTRIES', '50000'))
+CACHE_TTL = int(os.environ.get('CACHE_TTL', '86400'))
+FOCUS_PRECISION = int(os.environ.get('FOCUS_PRECISION', '2'))
+UPSTREAM_TIMEOUT = 30
+TEXT_PARAMS = {'text'}
+FOCUS_PARAMS = {'focus.point.lat', 'focus.point.lon', 'point.lat', 'point.lon'}
+
+
+def normalize(path, query):
+    # cache key with lowercased and trimmed text, rounded focus points and sorted parameters
+    params = []
+    for name, value in urllib.parse.parse_qsl(query, keep_blank_values=True):
+        if name in TEXT_PARAMS:
+            value = ' '.join(value.lower().split())
+        elif name in FOCUS_PARAMS:
+            try:
+                value = f'{float(value):.{FOCUS_PRECISION}f}'
+            except ValueError:
+                pass
+        params.append((name, value))
+    return path + '?' + urllib.parse.urlencode(sorted(params))
+
+
+class Cache:
+    # least recently used responses, entries expire after the ttl
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0, 'upstream_errors': 0}
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, response):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def fetch(self, key, load):
+        # the first request for a key loads it, concurrent requests for the same key wait for its result
+        response = self.get(key)
+        if response is not None:
+            self.count('hits')
+            return response, 'HIT'
+        with self.lock:
+            waiter = self.in_flight.get(key)
+            leader = waiter is None
+            if leader:
+                waiter = self.in_flight[key] = {'done': threading.Event(), 'response': None}
+        if not leader:
+            self.count('coalesced')
+            waiter['done'].wait(UPSTREAM_TIMEOUT)
+            if waiter['response'] is not None:
+                return waiter['response'], 'COALESCED'
+            return load(), 'MISS'
+        self.count('misses')
+        try:
+            response = load()
+            waiter['response'] = response
+            if response[0] == 200:
+                self.put(key, response)
+            return response, 'MISS'
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            waiter['done'].set()
+
+    def metrics(self):
+        with self.lock:
+            lines = [f'geocoding_cache_{name}_total {value}' for name, value in self.counters.items()]
+            lines.append(f'geocoding_cache_entries {len(self.entries)}')
+        return '\n'.join(lines) + '\n'
+
+
+cache = Cache(CACHE_ENTRIES, CACHE_TTL)
+
+
+def load_upstream(path_and_query):
+    # status, content type and body of an upstream response
+    try:
+        with urllib.request.urlopen(UPSTREAM_URL + path_and_query, timeout=UPSTREAM_TIMEOUT) as upstream:
+            return upstream.status, upstream.headers.get('Content-Type', 'application/json'), upstream.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers.get('Content-Type', 'application/json'), error.read()
+    except OSError:
+        cache.count('upstream_errors')
+        return 502, 'text/plain', b'geocoding upstream unavailable'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/cache-health':
+            self.respond((200, 'text/plain', b'ok'), 'NONE')
+        elif url.path == '/metrics':
+            self.respond((200, 'text/plain; version=0.0.4', cache.metrics().encode()), 'NONE')
+        else:
+            key = normalize(url.path, url.query)
+            self.respond(*cache.fetch(key, lambda: load_upstream(key)))
+
+    def respond(self, response, cache_status):
+        status, content_type, body = response
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Cache-Status', cache_status)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    ThreadingHTTPServer(('', PORT), Handler).serve_forever()
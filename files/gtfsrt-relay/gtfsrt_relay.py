@@ -0,0 +1,124 @@
+# relay of the gtfs-realtime feed. the upstream feed is polled once for all otp workers with conditional
+# requests, workers get the cached copy and a 304 if they already have it
+# UPSTREAM_URL: gtfs-realtime feed, PORT: listen port, POLL_SECONDS: upstream poll interval
+import hashlib
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAM_URL = os.environ['UPSTREAM_URL']
+PORT = int(os.environ.get('PORT', '8077'))
+POLL_SECONDS = int(os.environ.get('POLL_SECONDS', '30'))
+UPSTREAM_TIMEOUT = 20
+FEED_PATH = '/gtfsr.bin'
+
+
+class Feed:
+    # last feed fetched from upstream and the validators to revalidate it
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.body = None
+        self.etag = None
+        self.last_modified = None
+        self.upstream_etag = None
+        self.upstream_last_modified = None
+        self.counters = {'polls': 0, 'unchanged': 0, 'updates': 0, 'upstream_errors': 0, 'served': 0,
+                         'not_modified': 0}
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def poll(self):
+        # fetch the upstream feed unless it did not change since the last poll
+        self.count('polls')
+        request = urllib.request.Request(UPSTREAM_URL)
+        if self.upstream_etag:
+            request.add_header('If-None-Match', self.upstream_etag)
+        if self.upstream_last_modified:
+            request.add_header('If-Modified-Since', self.upstream_last_modified)
+        try:
+            with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as upstream:
+                body = upstream.read()
+                upstream_etag = upstream.headers.get('ETag')
+                upstream_last_modified = upstream.headers.get('Last-Modified')
+        except urllib.error.HTTPError as error:
+            self.count('unchanged' if error.code == 304 else 'upstream_errors')
+            return
+        except OSError:
+            self.count('upstream_errors')
+            return
+
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        with self.lock:
+            self.upstream_etag = upstream_etag
+            self.upstream_last_modified = upstream_last_modified
+            # upstreams without validators send the same feed again, keep the copy workers already have
+            if etag == self.etag:
+                self.counters['unchanged'] += 1
+                return
+            self.body = body
+            self.etag = etag
+            self.last_modified = formatdate(usegmt=True)
+            self.counters['updates'] += 1
+
+    def run(self):
+        while True:
+            started = time.monotonic()
+            self.poll()
+            time.sleep(max(0.0, POLL_SECONDS - (time.monotonic() - started)))
+
+    def metrics(self):
+        with self.lock:
+            lines = [f'gtfsrt_relay_{name}_total {value}' for name, value in self.counters.items()]
+            lines.append(f'gtfsrt_relay_feed_bytes {len(self.body or b"")}')
+        return '\n'.join(lines) + '\n'
+
+
+feed = Feed()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.respond(200, 'text/plain', b'ok')
+        elif self.path == '/metrics':
+            self.respond(200, 'text/plain; version=0.0.4', feed.metrics().encode())
+        elif self.path == FEED_PATH:
+            with feed.lock:
+                body, etag, last_modified = feed.body, feed.etag, feed.last_modified
+            if body is None:
+                self.respond(503, 'text/plain', b'no feed fetched yet')
+            elif self.headers.get('If-None-Match') == etag:
+                feed.count('not_modified')
+                self.respond(304, None, b'', etag, last_modified)
+            else:
+                feed.count('served')
+                self.respond(200, 'application/x-protobuf', body, etag, last_modified)
+        else:
+            self.respond(404, 'text/plain', b'not found')
+
+    def respond(self, status, content_type, body, etag=None, last_modified=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    threading.Thread(target=feed.run, daemon=True).start()
+    ThreadingHTTPServer(('', PORT), Handler).serve_forever()
@@ -0,0 +1,106 @@
+# warm-up agent of a node. it starts once the images of the pool are pulled by the init containers of its pod,
+# then waits for the pods on the node to become ready and reports the time it took from the node being ready
+# NODE_NAME: node of the pod, POOL: node pool of the node, PORT: listen port of the metrics,
+# POLL_SECONDS: interval of the pod checks
+import datetime
+import json
+import os
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+NODE_NAME = os.environ['NODE_NAME']
+POOL = os.environ['POOL']
+PORT = int(os.environ.get('PORT', '9410'))
+POLL_SECONDS = int(os.environ.get('POLL_SECONDS', '10'))
+API_URL = 'https://kubernetes.default.svc'
+ACCOUNT_PATH = '/var/run/secrets/kubernetes.io/serviceaccount'
+
+
+def get(path, query=None):
+    # request to the kubernetes api with the service account of the pod
+    with open(f'{ACCOUNT_PATH}/token') as token:
+        request = urllib.request.Request(f'{API_URL}{path}?{urllib.parse.urlencode(query or {})}',
+                                         headers={'Authorization': f'Bearer {token.read()}'})
+    context = ssl.create_default_context(cafile=f'{ACCOUNT_PATH}/ca.crt')
+    with urllib.request.urlopen(request, context=context, timeout=20) as response:
+        return json.load(response)
+
+
+def get_time(timestamp):
+    return datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=datetime.timezone.utc)
+
+
+def get_ready_time(conditions):
+    # time the ready condition of a node or pod last turned true, None while it is not ready
+    ready = next((condition for condition in conditions or [] if condition['type'] == 'Ready'), None)
+    if ready is None or ready['status'] != 'True':
+        return None
+    return get_time(ready['lastTransitionTime'])
+
+
+class Warmup:
+    # seconds from the node becoming ready until the images are pulled and until its pods are ready
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self.values = {'pods': 0, 'pods_ready': 0}
+
+    def check(self):
+        node_ready = get_ready_time(get(f'/api/v1/nodes/{NODE_NAME}')['status'].get('conditions'))
+        pods = [pod for pod in get('/api/v1/pods', {'fieldSelector': f'spec.nodeName={NODE_NAME}'})['items']
+                # pods of jobs are not ready while they run, they are not part of the node serving
+                if pod['status'].get('phase') in ('Pending', 'Running')
+                and not any(owner['kind'] == 'Job' for owner in pod['metadata'].get('ownerReferences', []))]
+        ready = [get_ready_time(pod['status'].get('conditions')) for pod in pods]
+        with self.lock:
+            self.values.update(pods=len(pods), pods_ready=sum(time is not None for time in ready))
+            if node_ready is None:
+                return False
+            self.values['image_pull_seconds'] = max(0.0, (self.started - node_ready).total_seconds())
+            if None in ready:
+                return False
+            self.values['pods_ready_seconds'] = max([0.0] + [(time - node_ready).total_seconds() for time in ready])
+        print(json.dumps({'message': 'node warm', 'node': NODE_NAME, 'pool': POOL, **self.values}), flush=True)
+        return True
+
+    def run(self):
+        # pods may still be scheduled onto a new node, the node counts as warm once all of them are ready
+        while True:
+            try:
+                if self.check():
+                    return
+            except OSError as error:
+                print(f'checking the pods of {NODE_NAME} failed: {error}', flush=True)
+            time.sleep(POLL_SECONDS)
+
+    def metrics(self):
+        with self.lock:
+            return ''.join(f'node_warmup_{name}{{pool="{POOL}"}} {value}\n' for name, value in self.values.items())
+
+
+warmup = Warmup()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/metrics':
+            body = warmup.metrics().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == '__main__':
+    threading.Thread(target=warmup.run, daemon=True).start()
+    ThreadingHTTPServer(('', PORT), Handler).serve_forever()
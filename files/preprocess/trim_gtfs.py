@@ -0,0 +1,142 @@
+# prune a gtfs feed to the trips serving an area within a date window, prints the row counts as json.
+# trips with a stop in the area are kept with all their stops, services and calendar dates are clipped to the window.
+# calendars of kept services that don't overlap the window are dropped, their calendar dates define them
+# usage: trim_gtfs.py <input.zip> <output.zip> <area.json> <past days> <window days>
+# area.json holds the outline of the area as [lon, lat] points
+import csv
+import datetime
+import io
+import json
+import sys
+import zipfile
+
+
+def point_in_polygon(lon, lat, polygon):
+    # ray casting, points on the outline may count either way
+    inside = False
+    for (lon1, lat1), (lon2, lat2) in zip(polygon, polygon[1:] + polygon[:1]):
+        if (lat1 > lat) != (lat2 > lat) and lon < lon1 + (lat - lat1) * (lon2 - lon1) / (lat2 - lat1):
+            inside = not inside
+    return inside
+
+
+class Feed:
+    def __init__(self, source, target):
+        self.source = zipfile.ZipFile(source)
+        self.target = zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED)
+        self.names = {name.rsplit('/', 1)[-1]: name for name in self.source.namelist()}
+        self.counts = {}
+
+    def rows(self, table):
+        # rows of a table as dicts, nothing if the feed does not have it
+        if table not in self.names:
+            return
+        with self.source.open(self.names[table]) as file:
+            yield from csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig'))
+
+    def columns(self, table):
+        with self.source.open(self.names[table]) as file:
+            return next(csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig')), [])
+
+    def write(self, table, keep=None, update=None):
+        # copy the rows of a table that keep accepts, update may change a row before it is written
+        if table not in self.names:
+            return
+        before = after = 0
+        with self.target.open(table, 'w') as file:
+            text = io.TextIOWrapper(file, encoding='utf-8', newline='')
+            writer = csv.DictWriter(text, fieldnames=self.columns(table), lineterminator='\n')
+            writer.writeheader()
+            for row in self.rows(table):
+                before += 1
+                if keep is None or keep(row):
+                    after += 1
+                    writer.writerow(update(row) if update else row)
+            text.flush()
+            text.detach()
+        self.counts[table] = {'before': before, 'after': after}
+
+    def close(self):
+        self.target.close()
+        self.source.close()
+
+
+def clip_calendar(row, first, last):
+    # start and end date of a calendar clipped to the window, None if it doesn't overlap the window
+    start, end = max(row['start_date'], first), min(row['end_date'], last)
+    return (start, end) if start <= end else None
+
+
+def get_services(feed, first, last):
+    # services with a day in the window
+    services = set()
+    for row in feed.rows('calendar.txt'):
+        weekdays = [row[day] == '1' for day in ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+                                                'sunday']]
+        if clip_calendar(row, first, last) and any(weekdays):
+            services.add(row['service_id'])
+    for row in feed.rows('calendar_dates.txt'):
+        if row['exception_type'] == '1' and first <= row['date'] <= last:
+            services.add(row['service_id'])
+    return services
+
+
+def trim(source, target, polygon, past_days, window_days):
+    today = datetime.date.today()
+    first = (today - datetime.timedelta(days=past_days)).strftime('%Y%m%d')
+    last = (today + datetime.timedelta(days=window_days)).strftime('%Y%m%d')
+    feed = Feed(source, target)
+
+    services = get_services(feed, first, last)
+    area_stops = {row['stop_id'] for row in feed.rows('stops.txt')
+                  if row.get('stop_lat') and point_in_polygon(float(row['stop_lon']), float(row['stop_lat']), polygon)}
+    active_trips = {row['trip_id'] for row in feed.rows('trips.txt') if row['service_id'] in services}
+    trips = {row['trip_id'] for row in feed.rows('stop_times.txt')
+             if row['trip_id'] in active_trips and row['stop_id'] in area_stops}
+
+    trip_rows = [row for row in feed.rows('trips.txt') if row['trip_id'] in trips]
+    routes = {row['route_id'] for row in trip_rows}
+    shapes = {row.get('shape_id') for row in trip_rows}
+    services = {row['service_id'] for row in trip_rows}
+    stops = set()
+
+    def keep_stop_time(row):
+        if row['trip_id'] not in trips:
+            return False
+        stops.add(row['stop_id'])
+        return True
+
+    feed.write('stop_times.txt', keep_stop_time)
+    # stations and entrances of the stops served
+    stop_rows = list(feed.rows('stops.txt'))
+    parents = {row['stop_id']: row.get('parent_station') for row in stop_rows}
+    for stop in list(stops):
+        while parents.get(stop):
+            stop = parents[stop]
+            stops.add(stop)
+    stops.update(row['stop_id'] for row in stop_rows if row.get('parent_station') in stops)
+    agencies = {row.get('agency_id') or None for row in feed.rows('routes.txt') if row['route_id'] in routes}
+
+    feed.write('trips.txt', lambda row: row['trip_id'] in trips)
+    feed.write('routes.txt', lambda row: row['route_id'] in routes)
+    feed.write('agency.txt', lambda row: None in agencies or row.get('agency_id') in agencies)
+    feed.write('stops.txt', lambda row: row['stop_id'] in stops)
+    feed.write('shapes.txt', lambda row: row['shape_id'] in shapes)
+    feed.write('frequencies.txt', lambda row: row['trip_id'] in trips)
+    feed.write('calendar.txt', lambda row: row['service_id'] in services and clip_calendar(row, first, last),
+               lambda row: dict(row, **dict(zip(['start_date', 'end_date'], clip_calendar(row, first, last)))))
+    feed.write('calendar_dates.txt', lambda row: row['service_id'] in services and first <= row['date'] <= last)
+    feed.write('transfers.txt', lambda row: row['from_stop_id'] in stops and row['to_stop_id'] in stops)
+    feed.write('fare_rules.txt', lambda row: not row.get('route_id') or row['route_id'] in routes)
+    feed.write('pathways.txt', lambda row: row['from_stop_id'] in stops and row['to_stop_id'] in stops)
+    for table in feed.names:
+        if table not in feed.counts and table.endswith('.txt'):
+            feed.write(table)
+    feed.close()
+    return feed.counts
+
+
+if __name__ == '__main__':
+    with open(sys.argv[3]) as area:
+        outline = json.load(area)
+    print(json.dumps(trim(sys.argv[1], sys.argv[2], outline, int(sys.argv[4]), int(sys.argv[5]))))
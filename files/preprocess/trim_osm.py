@@ -0,0 +1,42 @@
+# drop the tags of osm objects that routing does not read, prints the object and tag counts as json
+# usage: trim_osm.py <input.osm.pbf> <output.osm.pbf> <comma separated tag keys>
+# keys match whole tag keys and the part before the first colon, e.g. 'cycleway' keeps 'cycleway:left'
+import json
+import sys
+
+import osmium
+
+
+class TagFilter(osmium.SimpleHandler):
+    def __init__(self, writer, keys):
+        super().__init__()
+        self.writer = writer
+        self.keys = keys
+        self.counts = {'nodes': 0, 'ways': 0, 'relations': 0, 'tags_kept': 0, 'tags_dropped': 0}
+
+    def keep(self, tags):
+        kept = {tag.k: tag.v for tag in tags if tag.k in self.keys or tag.k.split(':')[0] in self.keys}
+        self.counts['tags_kept'] += len(kept)
+        self.counts['tags_dropped'] += len(tags) - len(kept)
+        return kept
+
+    def node(self, node):
+        self.counts['nodes'] += 1
+        self.writer.add_node(node.replace(tags=self.keep(node.tags)))
+
+    def way(self, way):
+        self.counts['ways'] += 1
+        self.writer.add_way(way.replace(tags=self.keep(way.tags)))
+
+    def relation(self, relation):
+        self.counts['relations'] += 1
+        self.writer.add_relation(relation.replace(tags=self.keep(relation.tags)))
+
+
+if __name__ == '__main__':
+    source, target, keys = sys.argv[1:4]
+    writer = osmium.SimpleWriter(target)
+    tag_filter = TagFilter(writer, set(keys.split(',')))
+    tag_filter.apply_file(source)
+    writer.close()
+    print(json.dumps(tag_filter.counts))
@@ -0,0 +1,31 @@
+#!/bin/sh
+# build the digitransit-ui bundle with placeholder urls. the client reads its config from the index page,
+# the urls are filled into it when a pod serves it.
+# the index page is rendered by the ui server, it is fetched once from a temporary server
+# BUNDLE_DIR: output folder shared with the publish container, PORT: port of the temporary server
+set -e
+
+yarn run build
+cp -a _static/. "$BUNDLE_DIR/"
+
+yarn run start &
+server=$!
+cat > /tmp/snapshot.js <<'SCRIPT'
+const http = require('http');
+const fs = require('fs');
+const snapshot = (tries) => http.get(`http://localhost:${process.env.PORT}/`, (res) => {
+  let page = '';
+  res.on('data', (chunk) => { page += chunk; });
+  res.on('end', () => {
+    if (res.statusCode !== 200) throw new Error(`index page returned ${res.statusCode}`);
+    fs.writeFileSync(`${process.env.BUNDLE_DIR}/index.html`, page);
+  });
+}).on('error', (err) => {
+  if (tries === 0) throw err;
+  setTimeout(() => snapshot(tries - 1), 2000);
+});
+snapshot(300);
+SCRIPT
+node /tmp/snapshot.js
+kill "$server"
+echo done
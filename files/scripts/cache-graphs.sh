@@ -0,0 +1,52 @@
+#!/bin/sh
+# keep the graph the workers load on the disk of the node, named by its content hash.
+# downloads a newly published graph once the manifest lists it, the workers load it from the cache
+# GRAPHS_URI: folder of published graphs, PINNED_VERSION: configured worker graph version,
+# CACHE_DIR: cache folder on the node, KEEP: graphs kept in the cache, POLL_SECONDS: time between manifest checks
+mkdir -p "$CACHE_DIR/versions" || exit 1
+cd "$CACHE_DIR" || exit 1
+# downloads interrupted by a restart
+rm -f fetching ./*.part
+
+fetch() {
+  # content hash of the published object, md5 or crc32c for composite objects
+  stat=$(gsutil stat "$GRAPHS_URI/$1") || return 1
+  hash=$(echo "$stat" | sed -n 's/^ *Hash (md5): *//p')
+  [ -n "$hash" ] || hash=$(echo "$stat" | sed -n 's/^ *Hash (crc32c): *//p')
+  key=$(echo "$hash" | base64 -d | od -An -tx1 | tr -d ' \n')
+  [ -n "$key" ] || return 1
+  if [ -f "$key.obj" ]; then
+    touch "$key.obj"
+  else
+    echo "$1" > fetching
+    gsutil -q cp "$GRAPHS_URI/$1" "$key.obj.part" || return 1
+    mv "$key.obj.part" "$key.obj"
+  fi
+  echo "$key" > "versions/$1"
+  rm -f fetching
+  echo "cached $1 as $key.obj"
+}
+
+evict() {
+  # keep the most recently used graphs, forget the versions of the removed ones
+  ls -t ./*.obj | tail -n "+$(( KEEP + 1 ))" | xargs -r rm -f
+  for version in versions/*; do
+    [ -f "$(cat "$version").obj" ] || rm -f "$version"
+  done
+}
+
+while true; do
+  version="$PINNED_VERSION"
+  if [ "$version" = latest ]; then
+    version=$(gsutil cat "$GRAPHS_URI/manifest" 2>/dev/null | sed -n 's/^latest=//p')
+  fi
+  if [ -n "$version" ] && [ ! -f "versions/$version" ]; then
+    if fetch "$version"; then
+      evict
+    else
+      echo "caching $version failed, retrying"
+      rm -f fetching ./*.part
+    fi
+  fi
+  sleep "$POLL_SECONDS"
+done
@@ -0,0 +1,21 @@
+#!/bin/sh
+# fetch the digitransit-ui bundle, fill in the urls of this deployment and precompress the text assets.
+# the assets with a content hash are cached for a year by the cdn and the browsers and are never changed,
+# the urls are only filled into the index page and the other files served with no-cache
+# BUNDLE_URI: bucket folder of the bundle, SITE_DIR: folder served by nginx,
+# HASHED_ASSETS: pattern of the file names with a content hash,
+# OTP_URL, MAP_URL, GEOCODING_URL: urls replacing the placeholders of the build
+set -e
+gsutil -m -q rsync -r "$BUNDLE_URI" "$SITE_DIR"
+cd "$SITE_DIR"
+
+find . -type f \( -name '*.html' -o -name '*.js' -o -name '*.css' -o -name '*.json' -o -name '*.svg' \) |
+  while read -r file; do
+    if ! echo "$file" | grep -Eq "$HASHED_ASSETS"; then
+      sed -i -e "s#PLACEHOLDER_OTP_URL#$OTP_URL#g" \
+        -e "s#PLACEHOLDER_MAP_URL#$MAP_URL#g" \
+        -e "s#PLACEHOLDER_GEOCODING_URL#$GEOCODING_URL#g" "$file"
+    fi
+    gzip -9 -c "$file" > "$file.gz"
+  done
+echo done
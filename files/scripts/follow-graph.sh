@@ -0,0 +1,19 @@
+#!/bin/sh
+# pick the graph published last for rollout-graph.sh, once its replica arrived in the bucket of the region.
+# the manifest may arrive before the graph, a later run rolls it out then
+# GRAPHS_URI: folder of published graphs in the bucket of the region,
+# STATE_DIR: shared with the rollout container, receives the version to roll out
+set -e
+cd "$STATE_DIR"
+
+version=$(gsutil cat "$GRAPHS_URI/manifest" 2>/dev/null | sed -n 's/^latest=//p')
+if [ -z "$version" ]; then
+  echo "no graph published in $GRAPHS_URI yet"
+  exit 0
+fi
+if ! gsutil -q stat "$GRAPHS_URI/$version"; then
+  echo "$version is not replicated yet"
+  exit 0
+fi
+echo "$version" > version
+echo "latest graph $version"
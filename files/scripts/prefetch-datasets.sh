@@ -0,0 +1,26 @@
+#!/bin/sh
+# download the dataset archives onto a new node before the data init containers of its pods ask for them.
+# archives are named by content, other archives in the cache are from older datasets and removed
+# ARCHIVE_URIS: archives in the bucket separated by spaces, CACHE_DIR: archive cache on the node
+set -e
+mkdir -p "$CACHE_DIR"
+cd "$CACHE_DIR"
+rm -f ./*.part
+# a failed download must not keep the data init containers waiting for it
+trap 'rm -f ./*.part' EXIT
+
+for uri in $ARCHIVE_URIS; do
+  name=$(basename "$uri")
+  if [ ! -f "$name" ]; then
+    gsutil -q cp "$uri" "$name.part"
+    mv "$name.part" "$name"
+    echo "cached $name"
+  fi
+done
+for archive in *; do
+  case " $ARCHIVE_URIS " in
+    *"/$archive "*) ;;
+    *) rm -f "$archive" ;;
+  esac
+done
+echo done
@@ -0,0 +1,21 @@
+#!/bin/sh
+# prune the gtfs feed to the trips serving the service area within the date window, the transit graph build loads it
+# RAW_URI: feed written by the gtfs updater, TRIMMED_URI: pruned feed read by the build,
+# REPORTS_URI: folder of the size reports, PREPROCESS_DIR: mounted config map with the scripts and the area,
+# WORK_DIR: scratch space, PAST_DAYS, WINDOW_DAYS: days before and after today to keep
+set -e
+cd "$WORK_DIR"
+
+gsutil -q cp "$RAW_URI" raw.zip
+counts=$(python3 "$PREPROCESS_DIR/trim_gtfs.py" raw.zip trimmed.zip "$PREPROCESS_DIR/service-area.json" \
+  "$PAST_DAYS" "$WINDOW_DAYS")
+gsutil -q cp trimmed.zip "$TRIMMED_URI"
+
+raw=$(stat -c %s raw.zip)
+trimmed=$(stat -c %s trimmed.zip)
+cat > report.json <<REPORT
+{"stage": "gtfs", "date": "$(date -u +%Y-%m-%dT%H:%M:%SZ)", "raw_bytes": $raw, "trimmed_bytes": $trimmed,
+ "counts": $counts}
+REPORT
+gsutil -q cp report.json "$REPORTS_URI/gtfs-$(date -u +%Y%m%d%H%M%S).json"
+echo "gtfs trimmed from $raw to $trimmed bytes ($(( 100 - trimmed * 100 / raw ))% smaller)"
@@ -0,0 +1,25 @@
+#!/bin/sh
+# clip the osm extract to the service area and keep only what routing reads, the street graph build loads the result.
+# runs in const.OSMIUM_IMAGE, which has osmium and pyosmium
+# RAW_URI: osm extract in the bucket, TRIMMED_URI: trimmed extract read by the build,
+# REPORTS_URI: folder of the size reports, PREPROCESS_DIR: mounted config map with the scripts and the area,
+# WORK_DIR: scratch space, FILTERS: osmium tags-filter expressions, TAG_KEYS: comma separated tag keys to keep
+set -e
+cd "$WORK_DIR"
+
+gsutil -q cp "$RAW_URI" raw.osm.pbf
+osmium extract -s smart -p "$PREPROCESS_DIR/service-area.poly" -o clipped.osm.pbf raw.osm.pbf
+osmium tags-filter -o filtered.osm.pbf clipped.osm.pbf $FILTERS
+counts=$(python3 "$PREPROCESS_DIR/trim_osm.py" filtered.osm.pbf tagged.osm.pbf "$TAG_KEYS")
+osmium cat -f pbf,add_metadata=false -o trimmed.osm.pbf tagged.osm.pbf
+gsutil -q cp trimmed.osm.pbf "$TRIMMED_URI"
+
+raw=$(stat -c %s raw.osm.pbf)
+trimmed=$(stat -c %s trimmed.osm.pbf)
+cat > report.json <<REPORT
+{"stage": "osm", "date": "$(date -u +%Y-%m-%dT%H:%M:%SZ)", "raw_bytes": $raw,
+ "clipped_bytes": $(stat -c %s clipped.osm.pbf), "filtered_bytes": $(stat -c %s filtered.osm.pbf),
+ "trimmed_bytes": $trimmed, "counts": $counts}
+REPORT
+gsutil -q cp report.json "$REPORTS_URI/osm-$(date -u +%Y%m%d%H%M%S).json"
+echo "osm trimmed from $raw to $trimmed bytes ($(( 100 - trimmed * 100 / raw ))% smaller)"
@@ -0,0 +1,25 @@
+#!/bin/sh
+# request every tile of the pyramid once through the cache of each running tile cache pod, so each replica holds
+# it. the pods are warmed one after the other, the tileserver renders with PARALLELISM concurrent requests only.
+# a failed tile fails the job, which is retried
+# CACHES_FILE: base urls of the tiles of the cache pods, one per line,
+# TILE_RANGES: lines of 'zoom x_min x_max y_min y_max', PARALLELISM: concurrent requests
+set -e
+
+echo "$TILE_RANGES" | while read -r zoom x_min x_max y_min y_max; do
+  for x in $(seq "$x_min" "$x_max"); do
+    for y in $(seq "$y_min" "$y_max"); do
+      echo "$zoom/$x/$y.png"
+    done
+  done
+done > /tmp/tiles.txt
+
+if [ ! -s "$CACHES_FILE" ]; then
+  echo "no running tile cache pods"
+  exit 1
+fi
+while read -r cache; do
+  echo "rendering $(wc -l < /tmp/tiles.txt) tiles into $cache"
+  sed "s#^#$cache/#" /tmp/tiles.txt | xargs -n 1 -P "$PARALLELISM" curl -sSf --retry 3 -o /dev/null
+done < "$CACHES_FILE"
+echo done
@@ -0,0 +1,45 @@
+#!/bin/sh
+# delete the published graphs except the newest KEEP ones, the pinned one and the one the workers serve,
+# once the rollout succeeded. the replicas of the bucket drop them with the next transfer
+# GRAPHS_URI: folder of published graphs, KEEP: number of newest graphs to keep,
+# PINNED_VERSION: configured worker graph version, STATE_DIR: contains the version served after the rollout
+set -e
+cd "$STATE_DIR"
+served=$(cat served 2>/dev/null || true)
+if [ -z "$served" ]; then
+  echo "no graph rolled out, keeping the published graphs"
+  exit 0
+fi
+
+gsutil -q cp "$GRAPHS_URI/manifest" manifest
+versions=$(sed -n 's/^version=//p' manifest)
+kept=" $(echo "$versions" | tail -n "$KEEP" | tr '\n' ' ') $PINNED_VERSION $served "
+pruned=""
+for version in $versions; do
+  case "$kept" in
+    *" $version "*) ;;
+    *) pruned="$pruned $version" ;;
+  esac
+done
+if [ -z "$pruned" ]; then
+  echo "keeping all published graphs"
+  exit 0
+fi
+
+# list the kept graphs first, a worker never resolves a graph that is being deleted
+{
+  grep '^latest=' manifest || true
+  for version in $versions; do
+    case " $pruned " in
+      *" $version "*) ;;
+      *) echo "version=$version" ;;
+    esac
+  done
+} > manifest.new
+gsutil -q cp manifest.new "$GRAPHS_URI/manifest"
+for version in $pruned; do
+  if gsutil -q stat "$GRAPHS_URI/$version"; then
+    gsutil -q rm "$GRAPHS_URI/$version"
+  fi
+  echo "pruned $version"
+done
@@ -0,0 +1,16 @@
+#!/bin/sh
+# upload a built digitransit-ui bundle to its content-hashed folder in the bucket
+# BUNDLE_DIR: bundle written by the build container, BUNDLE_URI: bucket folder of this bundle,
+# HASHED_ASSETS: pattern of the file names with a content hash
+set -e
+[ -f "$BUNDLE_DIR/index.html" ] || { echo "no bundle built"; exit 1; }
+# the hashed assets are served immutable, the pods can't fill the urls of a deployment into them
+placeholders=$(find "$BUNDLE_DIR" -type f | grep -E "$HASHED_ASSETS" | while read -r file; do
+  grep -l 'PLACEHOLDER_' "$file" || true
+done)
+if [ -n "$placeholders" ]; then
+  echo "url placeholders in hashed assets: $placeholders"
+  exit 1
+fi
+gsutil -m -q rsync -r "$BUNDLE_DIR" "$BUNDLE_URI"
+echo "published bundle to $BUNDLE_URI"
@@ -0,0 +1,28 @@
+#!/bin/sh
+# publish the graph saved by the build as an immutable, timestamped object and list it in the manifest
+# GRAPH_URI: graph written by the build, GRAPHS_URI: folder of published graphs,
+# STATE_DIR: shared with the rollout container, receives the published version
+set -e
+cd "$STATE_DIR"
+
+version="graph-$(date -u +%Y%m%d%H%M%S).obj"
+gsutil -q cp "$GRAPH_URI" "$GRAPHS_URI/$version"
+
+gsutil -q cp "$GRAPHS_URI/manifest" manifest 2>/dev/null || : > manifest
+# size of the new graph against the one served so far, e.g. after a change of the preprocessing
+size=$(gsutil du "$GRAPHS_URI/$version" | awk '{print $1}')
+previous=$(sed -n 's/^latest=//p' manifest)
+if [ -n "$previous" ]; then
+  echo "graph size $size bytes, $previous had $(gsutil du "$GRAPHS_URI/$previous" | awk '{print $1}') bytes"
+else
+  echo "graph size $size bytes"
+fi
+{
+  echo "latest=$version"
+  grep '^version=' manifest || true
+  echo "version=$version"
+} > manifest.new
+gsutil -q cp manifest.new "$GRAPHS_URI/manifest"
+
+echo "$version" > version
+echo "published $version"
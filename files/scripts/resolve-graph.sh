@@ -0,0 +1,31 @@
+#!/bin/sh
+# render the otp config of a worker for the graph version in GRAPH_VERSION, load it from the node cache if it holds it
+# GRAPH_VERSION: 'latest' or a published graph-<timestamp>.obj, GRAPH_URI: graph written by the build,
+# GRAPHS_URI: folder of published graphs, CONFIG_DIR: mounted config map, OTP_DIR: config dir of the worker,
+# CACHE_DIR: graph cache of the node, CACHE_POLL_SECONDS: time between manifest checks of the cache,
+# CACHE_WAIT_SECONDS: max. time to wait for the cache to download the version
+set -e
+
+if [ "$GRAPH_VERSION" = latest ]; then
+  GRAPH_VERSION=$(gsutil cat "$GRAPHS_URI/manifest" 2>/dev/null | sed -n 's/^latest=//p')
+fi
+# nothing published yet, load the graph the build saved
+graph="$GRAPH_URI"
+if [ -n "$GRAPH_VERSION" ]; then
+  graph="$GRAPHS_URI/$GRAPH_VERSION"
+  # a graph published just now is picked up by the cache within a poll,
+  # and a download in progress finishes sooner than a second one from the bucket
+  waited=0
+  while [ -d "$CACHE_DIR/versions" ] && [ ! -f "$CACHE_DIR/versions/$GRAPH_VERSION" ] &&
+    [ "$waited" -lt "$CACHE_WAIT_SECONDS" ] && { [ "$waited" -lt "$CACHE_POLL_SECONDS" ] ||
+    [ "$(cat "$CACHE_DIR/fetching" 2>/dev/null)" = "$GRAPH_VERSION" ]; }; do
+    sleep 5
+    waited=$(( waited + 5 ))
+  done
+  key=$(cat "$CACHE_DIR/versions/$GRAPH_VERSION" 2>/dev/null || true)
+  [ -n "$key" ] && [ -f "$CACHE_DIR/$key.obj" ] && graph="file://$CACHE_DIR/$key.obj"
+fi
+
+cp "$CONFIG_DIR"/*.json "$OTP_DIR"/
+sed "s#$GRAPH_URI#$graph#" "$CONFIG_DIR/build-config.json" > "$OTP_DIR/build-config.json"
+echo "loading $graph"
@@ -0,0 +1,34 @@
+#!/bin/sh
+# roll the workers over to the published graph, new pods have to be ready before old ones are removed
+# DEPLOYMENT: worker deployment, ANNOTATION: pod annotation holding the graph version,
+# PINNED_VERSION: configured worker graph version, ROLLOUT_TIMEOUT: max. time for the rollout,
+# STATE_DIR: contains the version written by the publish or the follow step, if there is one,
+# receives the version the workers serve afterwards
+set -e
+version=$(cat "$STATE_DIR/version" 2>/dev/null || true)
+if [ -z "$version" ]; then
+  echo "no graph to roll out"
+  exit 0
+fi
+
+if [ "$PINNED_VERSION" != latest ]; then
+  echo "workers are pinned to $PINNED_VERSION, $version is published only"
+  echo "$PINNED_VERSION" > "$STATE_DIR/served"
+  exit 0
+fi
+if [ "$(kubectl get deployment "$DEPLOYMENT" -o "jsonpath={.spec.template.metadata.annotations.$ANNOTATION}")" = \
+  "$version" ]; then
+  echo "workers serve $version already"
+  echo "$version" > "$STATE_DIR/served"
+  exit 0
+fi
+
+kubectl patch deployment "$DEPLOYMENT" \
+  --patch "{\"spec\":{\"template\":{\"metadata\":{\"annotations\":{\"$ANNOTATION\":\"$version\"}}}}}"
+if ! kubectl rollout status deployment "$DEPLOYMENT" --timeout="$ROLLOUT_TIMEOUT"; then
+  echo "rollout of $version failed, rolling back"
+  kubectl rollout undo deployment "$DEPLOYMENT"
+  exit 1
+fi
+echo "$version" > "$STATE_DIR/served"
+echo "workers serve $version"
@@ -0,0 +1,46 @@
+#!/bin/sh
+# fetch the gtfs feed only if it changed since the last run
+# GTFS_URL: upstream feed, GTFS_URI: bucket object, MANIFEST_URI: manifest of the last upload,
+# STATE_DIR: shared with the trigger container, a 'changed' file marks a new feed
+set -e
+cd "$STATE_DIR"
+
+gsutil -q cp "$MANIFEST_URI" manifest 2>/dev/null || : > manifest
+# the manifest describes the feed in the bucket, without it the feed is fetched and uploaded again
+if ! gsutil -q stat "$GTFS_URI"; then
+  echo "no gtfs feed in the bucket"
+  : > manifest
+fi
+etag=$(sed -n 's/^etag=//p' manifest)
+modified=$(sed -n 's/^last_modified=//p' manifest)
+sha=$(sed -n 's/^sha256=//p' manifest)
+
+: > request-headers
+[ -n "$etag" ] && echo "If-None-Match: $etag" >> request-headers
+[ -n "$modified" ] && echo "If-Modified-Since: $modified" >> request-headers
+
+status=$(curl -sSL -H @request-headers -D response-headers -o feed.zip -w '%{http_code}' "$GTFS_URL")
+if [ "$status" = 304 ]; then
+  echo "gtfs feed not modified"
+  exit 0
+fi
+if [ "$status" != 200 ]; then
+  echo "gtfs download failed with status $status"
+  exit 1
+fi
+
+new_etag=$(grep -i '^etag:' response-headers | tail -n 1 | cut -d ' ' -f 2- | tr -d '\r')
+new_modified=$(grep -i '^last-modified:' response-headers | tail -n 1 | cut -d ' ' -f 2- | tr -d '\r')
+new_sha=$(sha256sum feed.zip | cut -d ' ' -f 1)
+
+if [ "$new_sha" != "$sha" ]; then
+  gsutil -q cp feed.zip "$GTFS_URI"
+  touch changed
+  echo "uploaded new gtfs feed $new_sha"
+else
+  echo "gtfs feed content unchanged"
+fi
+
+printf 'etag=%s\nlast_modified=%s\nsha256=%s\nupdated=%s\n' \
+  "$new_etag" "$new_modified" "$new_sha" "$(date -u +%Y-%m-%dT%H:%M:%SZ)" > manifest
+gsutil -q cp manifest "$MANIFEST_URI"
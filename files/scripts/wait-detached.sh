@@ -0,0 +1,20 @@
+#!/bin/sh
+# wait until the build disk of a dataset is detached from its node. the node unmounts the file system
+# before the disk is detached, a snapshot taken afterwards has all the data of the build job
+# DISK, ZONE: the build disk, WAIT_SECONDS: give up after
+set -e
+
+waited=0
+while true; do
+  users=$(gcloud compute disks describe "$DISK" --zone "$ZONE" --format='value(users)')
+  if [ -z "$users" ]; then
+    break
+  fi
+  if [ "$waited" -ge "$WAIT_SECONDS" ]; then
+    echo "$DISK is still attached to $users"
+    exit 1
+  fi
+  sleep 10
+  waited=$((waited + 10))
+done
+echo "$DISK is detached"
@@ -0,0 +1,47 @@
+import subprocess
+
+from pulumi.dynamic import ResourceProvider, CreateResult, UpdateResult, DiffResult
+
+# the provider runs in its own process, which imports this module. it must not import the program modules,
+# they read the stack config on import
+
+
+class BlobProvider(ResourceProvider):
+    # uploads a local file with gsutil, large files as parallel composite uploads.
+    # a blob is uploaded again only when its content hash changed
+
+    def upload(self, props):
+        url = f"gs://{props['bucket']}/{props['name']}"
+        subprocess.run(['gsutil', '-q',
+                        '-o', f"GSUtil:parallel_composite_upload_threshold={props['composite_threshold']}",
+                        '-o', f"GSUtil:parallel_composite_upload_component_size={props['component_size']}",
+                        '-h', f"Content-Type:{props['content_type']}",
+                        'cp', props['source'], url], check=True)
+        return dict(props, url=url)
+
+    def exists(self, props):
+        return subprocess.run(['gsutil', '-q', 'stat', f"gs://{props['bucket']}/{props['name']}"],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+
+    def create(self, props):
+        # content addressed objects already in the bucket were uploaded with the same content,
+        # the others are owned by the pipelines in the cluster and never overwritten
+        if self.exists(props):
+            outs = dict(props, url=f"gs://{props['bucket']}/{props['name']}")
+        else:
+            outs = self.upload(props)
+        return CreateResult(id_=outs['url'], outs=outs)
+
+    def diff(self, _id, olds, news):
+        replaces = [prop for prop in ('bucket', 'name') if olds.get(prop) != news.get(prop)]
+        changed = replaces or olds.get('content_hash') != news.get('content_hash') or \
+            olds.get('content_type') != news.get('content_type')
+        return DiffResult(changes=bool(changed), replaces=replaces, delete_before_replace=False)
+
+    def update(self, _id, olds, news):
+        return UpdateResult(outs=self.upload(news))
+
+    def delete(self, _id, props):
+        # an object deleted outside of pulumi is gone already, a failed delete fails the update
+        if self.exists(props):
+            subprocess.run(['gsutil', '-q', 'rm', f"gs://{props['bucket']}/{props['name']}"], check=True)
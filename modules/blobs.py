@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+
+import pulumi as plm
+from pulumi.dynamic import Resource
+
+import modules.constants as const
+from modules.blobprovider import BlobProvider
+
+
+def read_hash_cache():
+    try:
+        with open(const.BLOB_HASH_CACHE) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_content_hash(path):
+    # sha256 of a file, cached by size and modification time so unchanged blobs are not read again
+    stat = os.stat(path)
+    cache = read_hash_cache()
+    entry = cache.get(path)
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['sha256']
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as blob:
+        for chunk in iter(lambda: blob.read(8 * 1024 * 1024), b''):
+            sha256.update(chunk)
+    cache[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256.hexdigest()}
+    with open(const.BLOB_HASH_CACHE, 'w') as cache_file:
+        json.dump(cache, cache_file, indent=1)
+    return cache[path]['sha256']
+
+
+def get_content_name(filename, content_hash):
+    # object name with the content hash in front of the extensions, e.g. data-<hash>.tar.zst
+    stem, _, extensions = filename.partition('.')
+    return f'{stem}-{content_hash[:const.BLOB_HASH_LENGTH]}' + (f'.{extensions}' if extensions else '')
+
+
+class Blob(Resource):
+    # local file in a bucket, uploaded with the gsutil of the machine running pulumi. content addressed blobs
+    # are named after their content hash, so a new version is a new object and consumers of the url pick it up.
+    # the others keep their name and are only uploaded if the bucket has no such object,
+    # the pipelines in the cluster own their content
+    name: plm.Output[str]
+    url: plm.Output[str]
+    content_hash: plm.Output[str]
+
+    def __init__(self, resource_name, bucket, source, name=None, content_type='application/octet-stream',
+                 content_addressed=True, opts=None):
+        if not os.path.isfile(source):
+            raise plm.RunError(f'blob {resource_name} has no file {source}, see the blobs section of the README')
+        content_hash = get_content_hash(source) if content_addressed else None
+        filename = name or os.path.basename(source)
+        super().__init__(BlobProvider(), resource_name,
+                         {'bucket': bucket.name,
+                          'source': source,
+                          'name': get_content_name(filename, content_hash) if content_addressed else filename,
+                          'content_hash': content_hash,
+                          'content_type': content_type,
+                          'composite_threshold': const.BLOB_COMPOSITE_THRESHOLD,
+                          'component_size': const.BLOB_COMPONENT_SIZE,
+                          'url': None},
+                         opts)
@@ -0,0 +1,274 @@
+import itertools
+import math
+import re
+
+import pulumi as plm
+
+import modules.constants as const
+import modules.sizing as sizing
+
+# pods of the declared workloads are packed onto the nodes of their pools in every scenario:
+# steady at max replicas, the one-off jobs of a deployment, the surge of a rolling update of each deployment
+# and every overlap window of the cronjobs within a week, including the jobs they start from suspended cronjobs.
+# the pods of daemonsets take their share of every node of their pools
+WORKLOAD_TYPES = {'kubernetes:apps/v1:Deployment': 'deployment',
+                  'kubernetes:apps/v1:DaemonSet': 'daemonset',
+                  'kubernetes:batch/v1:Job': 'job',
+                  'kubernetes:batch/v1:CronJob': 'cronjob',
+                  'kubernetes:autoscaling/v2beta2:HorizontalPodAutoscaler': 'autoscaler'}
+WEEK_MINUTES = 7 * 24 * 60
+WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+CPU_QUANTITY = re.compile(r'^(?P<value>[\d.]+)(?P<unit>m?)$')
+MEMORY_QUANTITY = re.compile(r'^(?P<value>[\d.]+)(?P<unit>Ki|Mi|Gi|Ti|k|M|G|T|)$')
+MEMORY_UNITS_MB = {'Ki': 1 / 1024, 'Mi': 1, 'Gi': 1024, 'Ti': 1024 ** 2, 'k': 1e3 / 2 ** 20, 'M': 1e6 / 2 ** 20,
+                   'G': 1e9 / 2 ** 20, 'T': 1e12 / 2 ** 20, '': 1 / 2 ** 20}
+
+declared = []
+
+
+def get_field(value, name):
+    # field of an args class or of a plain dict
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def get_cpu(quantity):
+    match = CPU_QUANTITY.match(str(quantity))
+    return float(match['value']) / (1000 if match['unit'] else 1)
+
+
+def get_memory_mb(quantity):
+    match = MEMORY_QUANTITY.match(str(quantity))
+    return float(match['value']) * MEMORY_UNITS_MB[match['unit']]
+
+
+def get_requests(containers):
+    # cpu and memory requests of containers, the ones without requests request nothing
+    requests = []
+    for container in containers or []:
+        container_requests = get_field(get_field(container, 'resources'), 'requests') or {}
+        requests.append({'cpu': get_cpu(container_requests.get('cpu', 0)),
+                         'memory_mb': get_memory_mb(container_requests.get('memory', 0))})
+    return requests
+
+
+def get_pod(template, workload):
+    # requests, pool and spread of the pods of a pod template. like the scheduler the pod requests the sum of
+    # its containers or the largest init container, whichever is more
+    spec = get_field(template, 'spec')
+    containers = get_requests(get_field(spec, 'containers'))
+    init_containers = get_requests(get_field(spec, 'init_containers'))
+    affinity = get_field(get_field(spec, 'affinity'), 'pod_anti_affinity')
+    return {'workload': workload,
+            'pool': (get_field(spec, 'node_selector') or {}).get(const.NODE_POOL_LABEL),
+            'cpu': max([sum(c['cpu'] for c in containers)] + [c['cpu'] for c in init_containers]),
+            'memory_mb': max([sum(c['memory_mb'] for c in containers)] + [c['memory_mb'] for c in init_containers]),
+            'spread': bool(affinity),
+            'references': [value for container in (get_field(spec, 'containers') or [])
+                           for value in get_field(container, 'args') or [] if isinstance(value, plm.Output)]}
+
+
+def get_surge(spec, replicas):
+    # extra pods of a rolling update, 25% of the replicas by default
+    strategy = get_field(spec, 'strategy')
+    if get_field(strategy, 'type') == 'Recreate':
+        return 0
+    max_surge = get_field(get_field(strategy, 'rolling_update'), 'max_surge')
+    max_surge = '25%' if max_surge is None else max_surge
+    if isinstance(max_surge, str) and max_surge.endswith('%'):
+        return math.ceil(replicas * int(max_surge[:-1]) / 100)
+    return int(max_surge)
+
+
+def record(args):
+    # stack transformation keeping the pods of every workload, the resources are not changed.
+    # the replica regions run the serving workloads of GCE_REGION on the same pools, planning GCE_REGION covers them
+    if getattr(args.opts.parent, 'region', const.GCE_REGION) != const.GCE_REGION:
+        return None
+    kind = WORKLOAD_TYPES.get(args.type_)
+    spec = args.props.get('spec')
+    if kind == 'deployment':
+        replicas = get_field(spec, 'replicas') or 1
+        declared.append({'kind': kind, 'name': args.name, 'resource': args.resource, 'replicas': replicas,
+                         'surge': get_surge(spec, replicas), 'pod': get_pod(get_field(spec, 'template'), args.name)})
+    elif kind == 'daemonset':
+        declared.append({'kind': kind, 'name': args.name, 'resource': args.resource,
+                         'pod': get_pod(get_field(spec, 'template'), args.name)})
+    elif kind == 'job':
+        declared.append({'kind': kind, 'name': args.name, 'resource': args.resource,
+                         'replicas': get_field(spec, 'parallelism') or 1,
+                         'pod': get_pod(get_field(spec, 'template'), args.name)})
+    elif kind == 'cronjob':
+        job_spec = get_field(get_field(spec, 'job_template'), 'spec')
+        declared.append({'kind': kind, 'name': args.name, 'resource': args.resource,
+                         'schedule': get_field(spec, 'schedule'),
+                         'suspend': bool(get_field(spec, 'suspend')),
+                         'minutes': math.ceil((get_field(job_spec, 'active_deadline_seconds')
+                                               or const.CAPACITY_JOB_SECONDS) / 60),
+                         'pod': get_pod(get_field(job_spec, 'template'), args.name)})
+    elif kind == 'autoscaler':
+        declared.append({'kind': kind, 'name': args.name,
+                         'max_replicas': get_field(spec, 'max_replicas'),
+                         'target': get_field(get_field(spec, 'scale_target_ref'), 'name')})
+    return None
+
+
+def track():
+    # record the workloads declared from here on, call before the first workload
+    plm.runtime.register_stack_transformation(record)
+
+
+def get_cron_values(field, low, high):
+    values = set()
+    for part in field.split(','):
+        values_range, _, step = part.partition('/')
+        if values_range == '*':
+            start, end = low, high
+        else:
+            start, _, end = values_range.partition('-')
+            start, end = int(start), int(end or (high if step else start))
+        values.update(range(start, end + 1, int(step or 1)))
+    return values
+
+
+def get_cron_starts(schedule):
+    # minutes of the week a schedule starts at, counted from sunday 00:00. day of month and month are not
+    # simulated, a schedule restricted by them is checked as if it ran every day
+    minute, hour, _, _, weekday = schedule.split()
+    weekdays = {day % 7 for day in get_cron_values(weekday, 0, 7)}
+    return sorted(day * 1440 + h * 60 + m for day in weekdays
+                  for h in get_cron_values(hour, 0, 23) for m in get_cron_values(minute, 0, 59))
+
+
+def get_cron_runs(cronjobs, triggers):
+    # (start, end, cronjob) of all runs within a week, runs of suspended cronjobs start when their trigger ends
+    runs = [(start, start + cronjob['minutes'], cronjob) for cronjob in cronjobs if not cronjob['suspend']
+            for start in get_cron_starts(cronjob['schedule'])]
+    started = runs
+    for _ in range(len(cronjobs)):
+        started = [(end, end + triggered['minutes'], triggered) for _, end, trigger in started
+                   for triggered in triggers.get(trigger['name'], [])]
+        runs += started
+    return runs
+
+
+def get_cron_windows(runs):
+    # sets of cronjob runs running at the same time, with the first minute of the week they do
+    boundaries = sorted({minute % WEEK_MINUTES for start, end, _ in runs for minute in (start, end)})
+    windows = {}
+    for minute in boundaries:
+        running = tuple(sorted(cronjob['name'] for start, end, cronjob in runs
+                               if any(start <= week_minute < end for week_minute in (minute, minute + WEEK_MINUTES))))
+        if running:
+            windows.setdefault(running, minute)
+    return windows
+
+
+def get_node_capacity(pool, daemons):
+    # cpu and memory of a node of a pool left after the daemon pods
+    allocatable = sizing.get_allocatable(pool['machine_type'])
+    return {'cpu': allocatable['cpu'] - sum(pod['cpu'] for pod in daemons),
+            'memory_mb': allocatable['memory_gb'] * 1024 - sum(pod['memory_mb'] for pod in daemons)}
+
+
+def pack(pods, pool, daemons):
+    # first fit decreasing onto the largest number of nodes of a pool, returns the pods that do not fit
+    nodes = [dict(get_node_capacity(pool, daemons), workloads=set()) for _ in range(sizing.get_max_nodes(pool))]
+    unscheduled = []
+    for pod in sorted(pods, key=lambda p: (p['memory_mb'], p['cpu']), reverse=True):
+        node = next((node for node in nodes if node['cpu'] >= pod['cpu'] and node['memory_mb'] >= pod['memory_mb']
+                     and not (pod['spread'] and pod['workload'] in node['workloads'])), None)
+        if node is None:
+            unscheduled.append(pod)
+            continue
+        node['cpu'] -= pod['cpu']
+        node['memory_mb'] -= pod['memory_mb']
+        node['workloads'].add(pod['workload'])
+    return unscheduled
+
+
+def get_pool_pods(pods):
+    # pods by pool, pods without node selector run on the pools without taint
+    untainted = [name for name, pool in const.NODE_POOLS.items() if 'taint' not in pool]
+    pool_pods = {name: [] for name in const.NODE_POOLS}
+    for pod in pods:
+        if pod['cpu'] or pod['memory_mb']:
+            pool_pods[pod['pool'] or untainted[0]].append(pod)
+    return pool_pods
+
+
+def get_headroom(pods, pool, daemons):
+    capacity = get_node_capacity(pool, daemons)
+    node_count = sizing.get_max_nodes(pool)
+    return {'cpu': capacity['cpu'] * node_count - sum(pod['cpu'] for pod in pods),
+            'memory_gb': (capacity['memory_mb'] * node_count - sum(pod['memory_mb'] for pod in pods)) / 1024}
+
+
+async def resolve_references(workloads):
+    # autoscaler targets and the suspended cronjobs started by other cronjobs are outputs of their resources
+    by_resource = {workload['resource']: workload for workload in workloads if 'resource' in workload}
+    for autoscaler in [workload for workload in workloads if workload['kind'] == 'autoscaler']:
+        for resource in await autoscaler['target'].resources():
+            if resource in by_resource:
+                by_resource[resource]['replicas'] = autoscaler['max_replicas']
+    triggers = {}
+    for cronjob in [workload for workload in workloads if workload['kind'] == 'cronjob']:
+        for reference in cronjob['pod']['references']:
+            for resource in await reference.resources():
+                target = by_resource.get(resource)
+                if target and target['kind'] == 'cronjob' and target['suspend']:
+                    triggers.setdefault(cronjob['name'], []).append(target)
+    return triggers
+
+
+def get_scenarios(workloads, triggers):
+    deployments = [workload for workload in workloads if workload['kind'] == 'deployment']
+    steady = [workload['pod'] for workload in deployments for _ in range(workload['replicas'])]
+    scenarios = {'steady': steady,
+                 'deploy': steady + [workload['pod'] for workload in workloads if workload['kind'] == 'job'
+                                     for _ in range(workload['replicas'])]}
+    for deployment in deployments:
+        if deployment['surge']:
+            scenarios[f"rollout of {deployment['name']}"] = steady + [deployment['pod']] * deployment['surge']
+    cronjobs = [workload for workload in workloads if workload['kind'] == 'cronjob']
+    pods = {cronjob['name']: cronjob['pod'] for cronjob in cronjobs}
+    for running, minute in get_cron_windows(get_cron_runs(cronjobs, triggers)).items():
+        day, minute = divmod(minute, 1440)
+        scenarios[f"{', '.join(running)} at {WEEKDAYS[day]} {minute // 60:02}:{minute % 60:02} UTC"] = \
+            steady + [pods[name] for name in running]
+    return scenarios
+
+
+async def plan():
+    triggers = await resolve_references(declared)
+    daemons = get_pool_pods(workload['pod'] for workload in declared if workload['kind'] == 'daemonset')
+    errors = []
+    headroom = {}
+    for scenario, pods in get_scenarios(declared, triggers).items():
+        for pool_name, pool_pods in get_pool_pods(pods).items():
+            pool = const.NODE_POOLS[pool_name]
+            unscheduled = pack(pool_pods, pool, daemons[pool_name])
+            if unscheduled:
+                counts = itertools.groupby(sorted(pod['workload'] for pod in unscheduled))
+                errors.append(f"{scenario}: {', '.join(f'{len(list(group))} x {name}' for name, group in counts)} "
+                              f"can't be scheduled on {sizing.get_max_nodes(pool)} nodes of pool {pool_name}")
+            pool_headroom = get_headroom(pool_pods, pool, daemons[pool_name])
+            worst = headroom.setdefault(pool_name, {})
+            for resource, value in pool_headroom.items():
+                if resource not in worst or value < worst[resource][0]:
+                    worst[resource] = (value, scenario)
+    for pool_name, worst in headroom.items():
+        plm.log.info(f"node pool {pool_name} headroom: {worst['cpu'][0]:.2f} cpu in {worst['cpu'][1]}, "
+                     f"{worst['memory_gb'][0]:.1f} GiB in {worst['memory_gb'][1]}")
+    if errors:
+        raise plm.RunError('planned pods can not be scheduled: ' + '; '.join(errors))
+    return headroom
+
+
+def check():
+    # fail the preview if the recorded workloads do not fit on the node pools in any scenario,
+    # call after the last workload
+    return plm.Output.from_input(plan())
@@ -7,10 +7,48 @@ GCE_ZONE = 'europe-west-3-b'
 GCE_NETWORK_TIER = "PREMIUM"
 GCE_PROJECT = 'bachelor-thesis-otp'
 PLANNER_DOMAIN = 'planner.25stunden.de'
+# regions serving replicas of the planner next to GCE_REGION and the zone of their cluster,
+# e.g. {"us-east1": "us-east1-b"}. each runs the serving workloads from a replica of the bucket,
+# the graphs, gtfs updates and digitransit bundles are built in GCE_REGION only
+REPLICA_REGIONS = plm.Config().get_object('replica_regions') or {}
+REGIONS = {GCE_REGION: GCE_ZONE, **REPLICA_REGIONS}
+# minutes between the transfers of the bucket to its replicas
+BUCKET_REPLICATION_MINUTES = 30
+# with replica regions a multi cluster ingress of the fleet routes users to the closest healthy region,
+# its config cluster is the one in GCE_REGION
+MULTI_CLUSTER_INGRESS = bool(REPLICA_REGIONS)
 
 # k8s cluster options
 NODE_COUNT = 1
-NODE_MACHINES = 'n2d-standard-8'
+# node pools with a fixed node_count or autoscaling between min_nodes and max_nodes.
+# only workloads tolerating the taint of a pool run on it, spot pools use spot vms.
+# local ssds hold the emptyDir volumes of the nodes. the routing pool has a node above the max otp workers
+# for the surge worker of a graph rollout.
+# on_demand_nodes of a pool are regular vms in a separate gke node pool with the same label and taint,
+# serving workloads keep a replica on them while preemptible nodes are replaced
+NODE_POOLS = {
+    'primary': {'machine_type': 'n2d-standard-4', 'min_nodes': 1, 'max_nodes': 4, 'on_demand_nodes': 1,
+                'local_ssd_count': 1},
+    'routing': {'machine_type': 'n2d-highmem-4', 'min_nodes': 1, 'max_nodes': 3, 'on_demand_nodes': 1,
+                'taint': 'routing'},
+    'graph-build': {'machine_type': 'n2d-highmem-4', 'min_nodes': 0, 'max_nodes': 1, 'spot': True,
+                    'taint': 'graph-build'},
+}
+NODE_POOL_LABEL = 'planner/pool'
+NODE_POOL_TAINT = 'planner/dedicated'
+# 'on-demand', 'preemptible' or 'spot', the topology key spreading the serving workloads
+NODE_CAPACITY_LABEL = 'planner/capacity'
+# vcpus and memory in GiB of the supported node machine types
+MACHINE_TYPES = {
+    'n2d-standard-4': {'cpu': 4, 'memory_gb': 16},
+    'n2d-standard-8': {'cpu': 8, 'memory_gb': 32},
+    'n2d-standard-16': {'cpu': 16, 'memory_gb': 64},
+    'n2d-highmem-4': {'cpu': 4, 'memory_gb': 32},
+    'n2d-highmem-8': {'cpu': 8, 'memory_gb': 64},
+    'n2d-highmem-16': {'cpu': 16, 'memory_gb': 128},
+    'e2-standard-8': {'cpu': 8, 'memory_gb': 32},
+    'e2-highmem-8': {'cpu': 8, 'memory_gb': 64},
+}
 K8S_VERSION = '1.21.3-gke.900'
 K8S_API_VERSION = 'networking.gke.io/v1'
 INGRESS_CERT_NAME = 'planner-ssl-cert'
@@ -23,26 +61,150 @@ INITCONTAINER_IMG = 'milohb/initcontainer:v210906'
 PELIAS_IMAGE = 'mfdz/photon-pelias-adapter:9af8e59f298719566cb55a1efb0e96545d079c49'
 TILESERVER_IMAGE = 'maptiler/tileserver-gl:v3.1.1'
 GCE_SDK_IMAGE = 'gcr.io/google.com/cloudsdktool/cloud-sdk:352.0.0-slim'
+# cloud sdk with osmium-tool and pyosmium, built from files/preprocess/Dockerfile
+OSMIUM_IMAGE = 'milohb/osmium:v211018'
+KUBECTL_IMAGE = 'bitnami/kubectl:1.21.3'
+NGINX_IMAGE = 'nginx:1.21.3-alpine'
+PYTHON_IMAGE = 'python:3.9.7-alpine'
+# images of the workloads of each pool, the node warmup daemonset pulls them onto every new node of the pool.
+# gke image streaming starts containers before their image is pulled completely, it applies to images
+# in artifact registry only
+WARMUP_IMAGES = {
+    'primary': [PHOTON_IMAGE, TILESERVER_IMAGE, PELIAS_IMAGE, DIGITRANSIT_IMAGE, NGINX_IMAGE, INITCONTAINER_IMG,
+                GCE_SDK_IMAGE, KUBECTL_IMAGE, PYTHON_IMAGE],
+    'routing': [OTP_IMAGE, INITCONTAINER_IMG, GCE_SDK_IMAGE, PYTHON_IMAGE],
+    'graph-build': [OTP_IMAGE, GCE_SDK_IMAGE, OSMIUM_IMAGE, KUBECTL_IMAGE, INITCONTAINER_IMG, PYTHON_IMAGE],
+}
+IMAGE_STREAMING = True
+NODE_IMAGE_TYPE = 'COS_CONTAINERD'
+NODE_WARMUP_LABEL = {'app': f'node-warmup-{plm.get_stack()}'}
+NODE_WARMUP_FOLDER = 'node-warmup'
+NODE_WARMUP_PORT = 9410
+# statically linked busybox, the image pulls run its true applet since not every pulled image has a shell
+BUSYBOX_IMAGE = 'busybox:1.34.1'
+NODE_WARMUP_TOOLS_PATH = '/warmup-tools'
+NODE_WARMUP_TOOLS_VOLUME = 'warmup-tools'
 
 # config for digitransit instance and environment
 OTP_URL = 'https://planner.25stunden.de/otp/routers/default/'
 # MAP_URL = plm.config.require_secret('maptiler_url') # external maptiler service
-MAP_URL = f'https://{PLANNER_DOMAIN}/styles/osmbright/{{z}}/{{x}}/{{y}}.png'
+TILES_PATH = '/styles/osmbright'
+MAP_URL = f'https://{PLANNER_DOMAIN}{TILES_PATH}/{{z}}/{{x}}/{{y}}.png'
 GEOCODING_URL = f'https://{PLANNER_DOMAIN}/v1'
 DIGITRANSIT_LABEL = {'app': f'digitransit-ui{plm.get_stack()}'}
 DIGITRANSIT_PORT = 8080
 DIGITANSIT_PORT_NAME = 'ui-port'
+DIGITRANSIT_CONFIG = 'planner'
+# 'server' runs the ui server in every pod, 'static' serves a bundle built once per image and config
+DIGITRANSIT_MODE = plm.Config().get('digitransit_mode') or 'server'
+DIGITRANSIT_BUNDLES_FOLDER = 'digitransit-bundles'
+DIGITRANSIT_STATIC_FOLDER = 'digitransit-static'
+DIGITRANSIT_SITE_PATH = '/site'
+# file names of the bundle assets with a content hash, served immutable. the urls of a deployment are only filled
+# into the other files, which are served with no-cache
+DIGITRANSIT_HASHED_ASSETS = r'\.[0-9a-f]{8,}\.[a-z0-9]+$'
 
 # config for otp instance
 OTP_PORT = 8080
 OTP_CONFIG_FOLDER = 'otp-configuration'
 OTP_WORKER_LABEL = {'app': f'otp-worker-{plm.get_stack()}'}
+OTP_WORKER_REPLICAS = 2
+OTP_BUILDER_LABEL = {'app': f'otp-builder-{plm.get_stack()}'}
 CONNECT_GTFS_FILE = 'connect_gtfs.zip'
+GTFS_MANIFEST_FILE = 'connect-gtfs.manifest'
+
+# config for the gtfs-realtime relay, otp workers read the feed from the relay instead of upstream
+GTFSRT_UPSTREAM_URL = plm.Config().get('gtfsrt_url') or 'http://gtfsr.vbn.de/gtfsr_connect.bin'
+GTFSRT_RELAY_NAME = 'gtfsrt-relay'
+GTFSRT_RELAY_LABEL = {'app': f'gtfsrt-relay{plm.get_stack()}'}
+GTFSRT_RELAY_PORT = 8077
+GTFSRT_RELAY_FOLDER = 'gtfsrt-relay'
+GTFSRT_POLL_SECONDS = 30
+GTFSRT_RELAY_URL = f'http://{GTFSRT_RELAY_NAME}:{GTFSRT_RELAY_PORT}/gtfsr.bin'
 OTP_GRAPH_FILE = 'graph.obj'
+OTP_STREET_GRAPH_FILE = 'streetGraph.obj'
 OSM_DATA_FILE = 'northern_germany.osm.pbf'
+# content hashes of the local blobs by path, size and modification time
+BLOB_HASH_CACHE = 'files/blobs/.hashes.json'
+BLOB_HASH_LENGTH = 16
+# files above the threshold are uploaded in parallel components and composed in the bucket
+BLOB_COMPOSITE_THRESHOLD = '150M'
+BLOB_COMPONENT_SIZE = '64M'
 OTP_MOUNT_PATH = '/var/opt/graphs'
 OTP_COMMAND = '/usr/local/bin/otp'
 OTP_MOUNT_NAME = 'otp-mounted-volume'
+OTP_CONFIG_MOUNT_PATH = '/var/opt/otp-config'
+OTP_CONFIG_MOUNT_NAME = 'otp-config-volume'
+# builds are published as immutable graph-<timestamp>.obj objects in this bucket folder
+OTP_GRAPHS_FOLDER = 'graphs'
+# published graphs kept after a rollout next to the pinned and the served one, the older ones are deleted
+OTP_GRAPHS_KEEP = 3
+# graph version of the workers: 'latest' follows every published build, a graph-<timestamp>.obj name pins it
+OTP_GRAPH_VERSION = plm.Config().get('otp_graph_version') or 'latest'
+OTP_GRAPH_VERSION_ANNOTATION = 'planner/graph-version'
+OTP_ROLLOUT_TIMEOUT = '20m'
+# the workers of the replica regions follow the graphs arriving in the bucket replica on this schedule
+OTP_GRAPH_FOLLOW_SCHEDULE = '*/15 * * * *'
+# a daemonset keeps the graph of the workers on the disks of the routing nodes, named by its content hash.
+# workers load the graph from the cache of their node, from the bucket if the cache does not hold it
+OTP_GRAPH_CACHE_LABEL = {'app': f'otp-graph-cache-{plm.get_stack()}'}
+OTP_GRAPH_CACHE_HOST_PATH = '/var/lib/planner/graph-cache'
+OTP_GRAPH_CACHE_MOUNT_PATH = '/var/opt/graph-cache'
+OTP_GRAPH_CACHE_VOLUME = 'otp-graph-cache'
+# the previous graph stays cached for a rollback
+OTP_GRAPH_CACHE_KEEP = 2
+OTP_GRAPH_CACHE_POLL_SECONDS = 30
+OTP_GRAPH_CACHE_WAIT_SECONDS = 900
+# graph builds run in two stages: a weekly street graph from osm and a nightly transit graph on top of it
+OTP_BUILD_STAGES = {'street': ['--buildStreet', '--save'],
+                    'transit': ['--loadStreet', '--save']}
+
+# the builds read osm and gtfs trimmed to the service area by a preprocessing stage in front of the builder.
+# osm is clipped to the service area polygon and keeps the objects matched by the osmium tag filters
+# with only the tags of the routing keys, gtfs keeps the trips serving the area within the date window
+PREPROCESS_FOLDER = 'preprocess'
+PREPROCESS_REPORTS_FOLDER = 'preprocessing'
+PREPROCESS_MOUNT_PATH = '/preprocess'
+PREPROCESS_WORK_VOLUME = 'preprocess-work'
+PREPROCESS_WORK_PATH = '/work'
+OSM_TRIMMED_FILE = 'service-area.osm.pbf'
+GTFS_TRIMMED_FILE = 'connect-gtfs-trimmed.zip'
+OSM_ROUTING_FILTERS = ['nwr/highway', 'nwr/public_transport', 'nwr/railway', 'nwr/park_ride', 'w/route=ferry',
+                       'nw/amenity=parking,bicycle_parking,bicycle_rental,ferry_terminal', 'r/type=restriction']
+OSM_ROUTING_TAG_KEYS = ['highway', 'railway', 'public_transport', 'route', 'type', 'restriction', 'except', 'access',
+                        'foot', 'bicycle', 'motor_vehicle', 'motorcar', 'vehicle', 'oneway', 'junction', 'area',
+                        'bridge', 'tunnel', 'layer', 'level', 'name', 'ref', 'surface', 'smoothness', 'tracktype',
+                        'sidewalk', 'cycleway', 'footway', 'crossing', 'wheelchair', 'incline', 'maxspeed', 'barrier',
+                        'entrance', 'elevator', 'amenity', 'park_ride', 'capacity', 'platform', 'station', 'train',
+                        'bus', 'tram', 'subway', 'ferry', 'indoor', 'conveying', 'mtb:scale', 'sac_scale']
+GTFS_WINDOW_DAYS = int(plm.Config().get('gtfs_window_days') or 45)
+GTFS_PAST_DAYS = 1
+
+# config for jobs triggering other jobs
+SCRIPTS_FOLDER = 'scripts'
+TRIGGER_STATE_VOLUME = 'trigger-state'
+TRIGGER_STATE_PATH = '/state'
+
+# config for dataset archives fetched by init containers
+# '7z' archives are downloaded before unpacking, 'tar.zst' archives are streamed into the data dir
+DATA_ARCHIVE_FORMAT = plm.Config().get('data_archive_format') or '7z'
+DATA_FETCH_CHUNK_MB = 64
+DATA_FETCH_PARALLELISM = 8
+DATA_MOUNT_PATH = '/datadir'
+
+# 'init' fills an emptyDir per pod from the bucket, 'disk' mounts a pre-baked read only disk shared by all pods
+DATA_VOLUME_MODE = plm.Config().get('data_volume_mode') or 'init'
+# in 'init' mode the node warmup can download the dataset archives onto every new node of their pool,
+# the data init containers of the pods on the node unpack them from there
+WARMUP_DATASETS = DATA_VOLUME_MODE == 'init' and plm.Config().get_bool('warmup_datasets') is True
+DATA_CACHE_HOST_PATH = '/var/lib/planner/data-cache'
+DATA_CACHE_MOUNT_PATH = '/data-cache'
+DATA_CACHE_VOLUME = 'data-cache'
+DATA_CACHE_WAIT_SECONDS = 900
+# the snapshot of a dataset build disk waits for the disk to be detached from the node of the build job
+DATA_DISK_DETACH_WAIT_SECONDS = 600
+PHOTON_DATA_VERSION = plm.Config().get('photon_data_version') or 'v1'
+TILESERVER_DATA_VERSION = plm.Config().get('tileserver_data_version') or 'v1'
 
 # config for tileserver instance
 TILESERVER_CFG_VOLUME = 'tileserver-config'
@@ -50,15 +212,165 @@ TILESERVER_TILES_VOLUME = 'tileserver-tiles'
 TILESERVER_PORT = 8095
 MAPTILES_FILE = 'maptiler-germany-edu.mbtiles'
 TILESERVER_LABEL = {'app': f'tileserver{plm.get_stack()}'}
-TILESERVER_DATA_FILE = 'maptiler_data.7z'
+TILESERVER_DATA_FILE = f'maptiler_data.{DATA_ARCHIVE_FORMAT}'
+TILESERVER_DISK_GB = 32
+
+# config for the tile cache in front of tileserver
+TILE_CACHE_LABEL = {'app': f'tile-cache{plm.get_stack()}'}
+TILE_CACHE_PORT = 8096
+TILE_CACHE_FOLDER = 'tile-cache'
+TILE_CACHE_SIZE_GB = 20
+# service area as min lon, min lat, max lon, max lat
+SERVICE_AREA_BBOX = (6.6, 51.3, 11.6, 54.0)
+# outline of the service area as [lon, lat] points, the bounding box unless configured
+SERVICE_AREA_POLYGON = plm.Config().get_object('service_area_polygon') or [
+    [SERVICE_AREA_BBOX[0], SERVICE_AREA_BBOX[1]], [SERVICE_AREA_BBOX[2], SERVICE_AREA_BBOX[1]],
+    [SERVICE_AREA_BBOX[2], SERVICE_AREA_BBOX[3]], [SERVICE_AREA_BBOX[0], SERVICE_AREA_BBOX[3]]]
+# tiles up to this zoom level are rendered into the cache of every tile cache pod by a job per tile data version.
+# the pods are warmed one after the other with few concurrent requests, the single tileserver keeps serving
+TILE_PRERENDER_MAX_ZOOM = int(plm.Config().get('tile_prerender_max_zoom') or 12)
+TILE_PRERENDER_PARALLELISM = 4
+
+# load test of otp, a new benchmark_run label starts a new benchmark job against otp-svc.
+# with benchmark_baseline set, a baseline per routing profile and router config is recorded. it load tests the
+# serving workers at every router config change and blocks the update, stacks opt in
+BENCHMARK_PACKAGE = 'benchmark'
+BENCHMARK_RUN = plm.Config().get('benchmark_run')
+BENCHMARK_QPS = float(plm.Config().get('benchmark_qps') or 5)
+BENCHMARK_DURATION = int(plm.Config().get('benchmark_duration') or 300)
+BENCHMARKS_FOLDER = 'benchmarks'
+BENCHMARK_BASELINE = plm.Config().get_bool('benchmark_baseline') is True
+
+# named trade-offs of latency and itinerary quality, defined in modules/profiles.py
+ROUTING_PROFILE = plm.Config().get('routing_profile') or 'default'
+
+# prometheus metrics of the jvms and services, scraped by gke managed prometheus
+JMX_EXPORTER_VERSION = '0.16.1'
+# the agent is a blob in the bucket, downloaded once from maven central into files/blobs, see the README
+JMX_EXPORTER_FILE = f'jmx_prometheus_javaagent-{JMX_EXPORTER_VERSION}.jar'
+JMX_EXPORTER_URL = 'https://repo1.maven.org/maven2/io/prometheus/jmx/jmx_prometheus_javaagent/' \
+                   f'{JMX_EXPORTER_VERSION}/{JMX_EXPORTER_FILE}'
+JMX_EXPORTER_PORT = 9404
+JMX_EXPORTER_PATH = '/jmx'
+JMX_EXPORTER_VOLUME = 'jmx-exporter'
+JMX_EXPORTER_CONFIG_VOLUME = 'jmx-exporter-config'
+JMX_EXPORTER_CONFIG_NAME = 'jmx-exporter'
+MONITORING_FOLDER = 'monitoring'
+METRICS_SCRAPE_INTERVAL = '30s'
+DASHBOARD_NAME = f'planner {plm.get_stack()}'
 
 # config for photon instance
-PHOTON_ES_FILE = 'photon_es_data.7z'
+PHOTON_ES_FILE = f'photon_es_data.{DATA_ARCHIVE_FORMAT}'
 PHOTON_LABEL = {'app': f'photon{plm.get_stack()}'}
 PHOTON_MOUNT_NAME = 'photon-mounted-volume'
+PHOTON_DISK_VOLUME = 'photon-disk-volume'
+PHOTON_DISK_GB = 64
 PHOTON_PORT = 2322
 
 # config for pelias-adapter
 PELIAS_LABEL = {'app': f'pelias{plm.get_stack()}'}
 PELIAS_PORT = 8075
 
+# config for the geocoding cache in front of pelias-adapter
+GEOCODING_CACHE_LABEL = {'app': f'geocoding-cache{plm.get_stack()}'}
+GEOCODING_CACHE_PORT = 8076
+GEOCODING_CACHE_FOLDER = 'geocoding-cache'
+GEOCODING_CACHE_ENTRIES = 50000
+GEOCODING_CACHE_TTL_SECONDS = 86400
+# two decimals keep focus points within about a kilometer
+GEOCODING_FOCUS_PRECISION = 2
+
+# health checks per service: http path, port and expected time until the service answers after start
+# startup probes allow for the load time, readiness probes and the load balancer health checks use the same path
+PROBE_PERIOD_SECONDS = 10
+PROBE_PRESETS = {
+    'otp': {'path': '/otp/routers/default', 'port': OTP_PORT, 'load_seconds': 1200},
+    'photon': {'path': '/api?q=bremen&limit=1', 'port': PHOTON_PORT, 'load_seconds': 300},
+    'pelias': {'path': '/v1/search?text=bremen&size=1', 'port': PELIAS_PORT, 'load_seconds': 60},
+    'geocoding-cache': {'path': '/cache-health', 'port': GEOCODING_CACHE_PORT, 'load_seconds': 30},
+    'gtfsrt-relay': {'path': '/health', 'port': GTFSRT_RELAY_PORT, 'load_seconds': 30},
+    'tileserver': {'path': '/health', 'port': TILESERVER_PORT, 'load_seconds': 120},
+    'tile-cache': {'path': '/cache-health', 'port': TILE_CACHE_PORT, 'load_seconds': 30},
+    'digitransit': {'path': '/', 'port': DIGITRANSIT_PORT, 'load_seconds': 600},
+}
+# serving pods keep answering until kube-proxy and the load balancer stopped sending them requests:
+# the prestop hook waits drain_seconds before the container is stopped, requests in flight then have
+# the rest of the grace period. preemption leaves the pods about 25 seconds
+SHUTDOWN_PRESETS = {
+    'otp': {'drain_seconds': 10, 'grace_seconds': 45},
+    'photon': {'drain_seconds': 10, 'grace_seconds': 30},
+    'pelias': {'drain_seconds': 10, 'grace_seconds': 20},
+    'geocoding-cache': {'drain_seconds': 10, 'grace_seconds': 15},
+    'tileserver': {'drain_seconds': 10, 'grace_seconds': 20},
+    'tile-cache': {'drain_seconds': 10, 'grace_seconds': 15},
+    'digitransit': {'drain_seconds': 10, 'grace_seconds': 20},
+}
+# time the load balancer lets requests to a removed backend finish
+LB_DRAINING_SECONDS = 20
+
+# horizontal pod autoscaling between min and max replicas at a target utilization of the cpu requests.
+# the serving deployments keep two replicas against preemption and scale above them under load.
+# otp workers take long to load the graph: they scale at a lower utilization, scale down slowly
+# and get a raised minimum ahead of the commute peaks
+AUTOSCALING = {
+    'otp-worker': {'min': OTP_WORKER_REPLICAS, 'max': 3, 'cpu': 50, 'scale_down_seconds': 1800},
+    'digitransit': {'min': 2, 'max': 3, 'cpu': 70, 'scale_down_seconds': 300},
+    'photon': {'min': 2, 'max': 3, 'cpu': 70, 'scale_down_seconds': 600},
+    'pelias': {'min': 2, 'max': 4, 'cpu': 70, 'scale_down_seconds': 300},
+    'tileserver': {'min': 2, 'max': 4, 'cpu': 70, 'scale_down_seconds': 300},
+}
+# time in UTC, starts 30 minutes ahead of the local peaks
+OTP_PEAK_SCHEDULES = {
+    'morning': {'start': '30 4 * * 1-5', 'end': '30 7 * * 1-5', 'min': 3},
+    'evening': {'start': '30 13 * * 1-5', 'end': '0 17 * * 1-5', 'min': 3},
+}
+
+# resources of the workloads as a share of a node of their pool after system reservations, per replica
+# min_memory_gb is the least memory a workload can work with, heap_ratio the share of it used as java heap.
+# workloads in the same exclusive group never run at the same time, spread replicas run on different nodes,
+# daemons run on every node of their pool. serving workloads spread their replicas over the on-demand and
+# preemptible nodes of their pool and get a disruption budget.
+# autoscaled workloads are checked with their max replicas, the others run replicas pods
+NODE_SYSTEM_RESERVE = {'cpu': 0.5, 'memory_gb': 1.5}
+CPU_LIMIT_FACTOR = 2
+# run time of cronjobs without active deadline in the capacity plan, see modules/capacity.py
+CAPACITY_JOB_SECONDS = 1800
+WORKLOAD_RESOURCES = {
+    'otp-worker': {'pool': 'routing', 'cpu': 0.6, 'memory': 0.6, 'min_memory_gb': 10, 'spread': True,
+                   'serving': True, 'heap_ratio': 0.75, 'gc': 'G1'},
+    'otp-graph-cache': {'pool': 'routing', 'cpu': 0.02, 'memory': 0.01, 'min_memory_gb': 0.25, 'daemon': True},
+    'otp-street-builder': {'pool': 'graph-build', 'cpu': 0.8, 'memory': 0.85, 'min_memory_gb': 19,
+                           'exclusive': 'graph-build', 'heap_ratio': 0.8, 'gc': 'Parallel'},
+    'graph-preprocess': {'pool': 'graph-build', 'cpu': 0.8, 'memory': 0.5, 'min_memory_gb': 8,
+                         'exclusive': 'graph-build'},
+    'otp-transit-builder': {'pool': 'graph-build', 'cpu': 0.8, 'memory': 0.85, 'min_memory_gb': 13,
+                            'exclusive': 'graph-build', 'heap_ratio': 0.8, 'gc': 'Parallel'},
+    'photon': {'pool': 'primary', 'cpu': 0.3, 'memory': 0.4, 'min_memory_gb': 4, 'serving': True,
+               'heap_ratio': 0.5, 'gc': 'G1'},
+    'tileserver': {'pool': 'primary', 'cpu': 0.25, 'memory': 0.15, 'min_memory_gb': 1, 'serving': True},
+    'tile-cache': {'pool': 'primary', 'cpu': 0.1, 'memory': 0.04, 'min_memory_gb': 0.25, 'serving': True,
+                   'replicas': 2},
+    'pelias': {'pool': 'primary', 'cpu': 0.1, 'memory': 0.05, 'min_memory_gb': 0.25, 'serving': True},
+    'geocoding-cache': {'pool': 'primary', 'cpu': 0.1, 'memory': 0.05, 'min_memory_gb': 0.5, 'serving': True,
+                        'replicas': 2},
+    'gtfsrt-relay': {'pool': 'primary', 'cpu': 0.05, 'memory': 0.03, 'min_memory_gb': 0.25},
+    'digitransit': {'pool': 'primary', 'cpu': 0.25, 'memory': 0.15, 'min_memory_gb': 1, 'exclusive': 'digitransit',
+                    'serving': True},
+    'digitransit-static': {'pool': 'primary', 'cpu': 0.05, 'memory': 0.03, 'min_memory_gb': 0.25,
+                           'exclusive': 'digitransit'},
+    'benchmark': {'pool': 'primary', 'cpu': 0.05, 'memory': 0.03, 'min_memory_gb': 0.25},
+    'tile-prerender': {'pool': 'primary', 'cpu': 0.05, 'memory': 0.03, 'min_memory_gb': 0.25},
+    'digitransit-build': {'pool': 'primary', 'cpu': 0.5, 'memory': 0.3, 'min_memory_gb': 3},
+}
+
+# cloud cdn per backend of the ingress, ttls in seconds.
+# otp vector tile ttls come from the vectorTileLayers in router-config.json
+CDN_POLICIES = {
+    'tile-cache': {'cacheMode': 'FORCE_CACHE_ALL', 'defaultTtl': 86400, 'clientTtl': 86400,
+                   'includeQueryString': False},
+    'digitransit-static': {'cacheMode': 'CACHE_ALL_STATIC', 'defaultTtl': 3600, 'maxTtl': 86400,
+                           'clientTtl': 3600, 'includeQueryString': True},
+    'otp-tiles': {'cacheMode': 'CACHE_ALL_STATIC', 'includeQueryString': False},
+}
+OTP_VECTOR_TILES_PATH = '/otp/routers/default/vectorTiles/*'
+DIGITRANSIT_STATIC_PATHS = ['/js/*', '/css/*', '/fonts/*', '/img/*', '/icons/*']
@@ -0,0 +1,119 @@
+import pulumi as plm
+import pulumi_gcp as gcp
+from pulumi import CustomTimeouts
+from pulumi_kubernetes.batch.v1 import Job, JobSpecArgs
+from pulumi_kubernetes.core.v1 import PersistentVolume, PersistentVolumeSpecArgs, PersistentVolumeClaim, \
+    PersistentVolumeClaimSpecArgs, GCEPersistentDiskVolumeSourceArgs, ResourceRequirementsArgs, PodTemplateSpecArgs, \
+    PodSpecArgs, VolumeArgs, PersistentVolumeClaimVolumeSourceArgs, ContainerArgs, VolumeMountArgs, EnvVarArgs
+
+import modules.constants as const
+import modules.functions as fun
+
+
+def create_disk_claim(name, disk_name, size_gb, access_mode, provider, parent):
+    # static pv/pvc pair bound to an existing gce disk
+    read_only = access_mode == 'ReadOnlyMany'
+    volume = PersistentVolume(fun.get_region_name(name, parent.region),
+                              spec=PersistentVolumeSpecArgs(
+                                  access_modes=[access_mode],
+                                  capacity={'storage': f'{size_gb}Gi'},
+                                  storage_class_name='',
+                                  persistent_volume_reclaim_policy='Retain',
+                                  gce_persistent_disk=GCEPersistentDiskVolumeSourceArgs(
+                                      pd_name=disk_name,
+                                      fs_type='ext4',
+                                      read_only=read_only)),
+                              opts=fun.get_child_options(parent, provider=provider))
+    return PersistentVolumeClaim(fun.get_region_name(name, parent.region),
+                                 spec=PersistentVolumeClaimSpecArgs(
+                                     access_modes=[access_mode],
+                                     storage_class_name='',
+                                     volume_name=volume.metadata.name,
+                                     resources=ResourceRequirementsArgs(
+                                         requests={'storage': f'{size_gb}Gi'})),
+                                 opts=fun.get_child_options(parent, provider=provider))
+
+
+def create_dataset_claim(name, archive_url, version, size_gb, provider, parent):
+    # unpack the archive once onto a build disk, snapshot it and serve a disk created from the snapshot
+    # read only to every pod. a new version creates a new build, snapshot and serving disk.
+    # the disks of the replica regions are in the zone of their cluster, the ones of GCE_REGION in the zone of
+    # the gcp config, which the cluster of GCE_REGION uses as well
+    disk_zone = const.REPLICA_REGIONS.get(parent.region) or plm.Config('gcp').require('zone')
+    build_disk = gcp.compute.Disk(fun.get_region_name(f'{name}-build-{version}', parent.region),
+                                  zone=disk_zone,
+                                  size=size_gb,
+                                  type='pd-ssd',
+                                  opts=fun.get_child_options(parent))
+    build_claim = create_disk_claim(f'{name}-build-{version}', build_disk.name, size_gb, 'ReadWriteOnce', provider,
+                                    parent)
+    build_job = Job(fun.get_region_name(f'{name}-build-{version}', parent.region),
+                    spec=JobSpecArgs(
+                        backoff_limit=2,
+                        template=PodTemplateSpecArgs(
+                            spec=PodSpecArgs(
+                                restart_policy='Never',
+                                containers=[fun.get_data_init_container(name=f'{name}-build',
+                                                                        mount_name=f'{name}-disk',
+                                                                        archive_url=archive_url)],
+                                volumes=[VolumeArgs(
+                                    name=f'{name}-disk',
+                                    persistent_volume_claim=PersistentVolumeClaimVolumeSourceArgs(
+                                        claim_name=build_claim.metadata.name))]))),
+                    opts=fun.get_child_options(parent, provider=provider,
+                                                  custom_timeouts=CustomTimeouts(create='40m')))
+
+    # the job only completes after the data is unpacked, the snapshot waits until its pod released the disk
+    detach_job = Job(fun.get_region_name(f'{name}-detach-{version}', parent.region),
+                     spec=JobSpecArgs(
+                         backoff_limit=2,
+                         template=PodTemplateSpecArgs(
+                             spec=PodSpecArgs(
+                                 restart_policy='Never',
+                                 containers=[ContainerArgs(
+                                     name=f'{name}-detach',
+                                     image=const.GCE_SDK_IMAGE,
+                                     env=[EnvVarArgs(name='DISK', value=build_disk.name),
+                                          EnvVarArgs(name='ZONE', value=disk_zone),
+                                          EnvVarArgs(name='WAIT_SECONDS',
+                                                     value=str(const.DATA_DISK_DETACH_WAIT_SECONDS))],
+                                     command=['/bin/sh', '-c'],
+                                     args=[fun.read_config_file('wait-detached.sh', const.SCRIPTS_FOLDER)])]))),
+                     opts=fun.get_child_options(parent, provider=provider, depends_on=[build_job],
+                                                custom_timeouts=CustomTimeouts(create='20m')))
+    snapshot = gcp.compute.Snapshot(fun.get_region_name(f'{name}-{version}', parent.region),
+                                    source_disk=build_disk.name,
+                                    zone=disk_zone,
+                                    opts=fun.get_child_options(parent, depends_on=[detach_job]))
+    serving_disk = gcp.compute.Disk(fun.get_region_name(f'{name}-{version}', parent.region),
+                                    zone=disk_zone,
+                                    size=size_gb,
+                                    type='pd-balanced',
+                                    snapshot=snapshot.self_link,
+                                    opts=fun.get_child_options(parent))
+    return create_disk_claim(f'{name}-{version}', serving_disk.name, size_gb, 'ReadOnlyMany', provider, parent)
+
+
+def get_dataset_volume(name, claim):
+    # read only pod volume for a pre-baked dataset claim
+    return VolumeArgs(name=name,
+                      persistent_volume_claim=PersistentVolumeClaimVolumeSourceArgs(
+                          claim_name=claim.metadata.name,
+                          read_only=True))
+
+
+def get_dataset_copy_container(name, source_volume, target_volume):
+    # init container copying a pre-baked dataset into a writable volume
+    return ContainerArgs(name=name,
+                         image=const.INITCONTAINER_IMG,
+                         volume_mounts=[
+                             VolumeMountArgs(
+                                 mount_path='/dataset',
+                                 name=source_volume,
+                                 read_only=True),
+                             VolumeMountArgs(
+                                 mount_path=const.DATA_MOUNT_PATH,
+                                 name=target_volume,
+                                 read_only=False)],
+                         command=['/bin/sh', '-c'],
+                         args=[f'cp -a /dataset/. {const.DATA_MOUNT_PATH}/'])
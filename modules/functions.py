@@ -1,48 +1,459 @@
 # helper functions
-from pulumi_kubernetes.core.v1 import ContainerArgs, ContainerPortArgs, VolumeMountArgs, EnvVarArgs, ProbeArgs
-from pulumi_kubernetes.core.v1.outputs import ExecAction
+import functools
+import hashlib
+import json
+import math
+import os
+
+import pulumi as plm
+from pulumi_kubernetes.autoscaling.v2beta2 import HorizontalPodAutoscalerSpecArgs, CrossVersionObjectReferenceArgs, \
+    MetricSpecArgs, ResourceMetricSourceArgs, MetricTargetArgs, HorizontalPodAutoscalerBehaviorArgs, HPAScalingRulesArgs, \
+    HPAScalingPolicyArgs
+from pulumi_kubernetes.core.v1 import ContainerArgs, ContainerPortArgs, VolumeMountArgs, EnvVarArgs, ProbeArgs, \
+    EnvVarSourceArgs, ObjectFieldSelectorArgs, TolerationArgs, AffinityArgs, PodAntiAffinityArgs, PodAffinityTermArgs, \
+    PodSpecArgs, VolumeArgs, ConfigMapVolumeSourceArgs, EmptyDirVolumeSourceArgs, HostPathVolumeSourceArgs, \
+    TopologySpreadConstraintArgs, LifecycleArgs, LifecycleHandlerArgs, ExecActionArgs
+from pulumi_kubernetes.core.v1.outputs import HTTPGetAction
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs
+from pulumi_kubernetes.policy.v1 import PodDisruptionBudgetSpecArgs
 
 import modules.constants as const
+import modules.monitoring as monitoring
+import modules.sizing as sizing
 
 
+# files are read by several resources and the benchmarks, read each only once per run
+@functools.lru_cache(maxsize=None)
 def read_config_file(filename, folder='.'):
     with open(f'files/{folder}/{filename}', 'r') as config_file:
         return config_file.read()
 
 
-def get_otp_container_args(name, java_options, cmd_args, otp_type='worker'):
-    probe_args = None
-    if otp_type == 'worker':
-        # fail between 2:00 and 3:00 to restart pod
-        probe_args = ProbeArgs(failure_threshold=1,
-                               initial_delay_seconds=3600,
-                               period_seconds=600,
-                               exec_=ExecAction(
-                                   command=['/bin/sh', '-c', 'exit $(test $(date +%H) -eq 4 && echo 1 || echo 0)'],
-                               ))
-    else:
-        # don't fail
-        probe_args = ProbeArgs(
-            failure_threshold=1,
-            initial_delay_seconds=60,
-            period_seconds=600,
-            exec_=ExecAction(
-                command=['ls']
-            )
-        )
+def get_package_files(package):
+    # python sources of a package in this repo, to ship it in a ConfigMap
+    return {filename: open(os.path.join(package, filename)).read()
+            for filename in sorted(os.listdir(package)) if filename.endswith('.py')}
+
+
+def get_child_options(parent, **kwargs):
+    # resource options of a resource in a component, the alias keeps the urn it had at the top of the stack
+    return plm.ResourceOptions(parent=parent, aliases=[plm.Alias(parent=plm.ROOT_STACK_RESOURCE)], **kwargs)
+
+
+def get_region_name(name, region):
+    # name of a resource of a region, the ones of GCE_REGION keep the names they had before the replica regions
+    return name if region == const.GCE_REGION else f'{name}-{region}'
+
+
+def get_pool_scheduling(pool_name):
+    # node selector and tolerations placing a pod on a node pool
+    pool = const.NODE_POOLS[pool_name]
+    scheduling = {'node_selector': {const.NODE_POOL_LABEL: pool_name}}
+    if 'taint' in pool:
+        scheduling['tolerations'] = [TolerationArgs(key=const.NODE_POOL_TAINT,
+                                                    operator='Equal',
+                                                    value=pool['taint'],
+                                                    effect='NoSchedule')]
+    return scheduling
+
+
+def get_pod_scheduling(workload, labels=None):
+    # node selector, tolerations and anti affinity placing a workload on its node pool
+    share = const.WORKLOAD_RESOURCES[workload]
+    scheduling = get_pool_scheduling(share['pool'])
+    if share.get('spread'):
+        # never run two replicas on the same node
+        scheduling['affinity'] = AffinityArgs(
+            pod_anti_affinity=PodAntiAffinityArgs(
+                required_during_scheduling_ignored_during_execution=[PodAffinityTermArgs(
+                    label_selector=LabelSelectorArgs(match_labels=labels),
+                    topology_key='kubernetes.io/hostname')]))
+    if share.get('serving') and labels:
+        # keep replicas of serving workloads on on-demand and preemptible nodes alike,
+        # a preemption wave must not take all of them down at once
+        scheduling['topology_spread_constraints'] = [
+            TopologySpreadConstraintArgs(
+                label_selector=LabelSelectorArgs(match_labels=labels),
+                topology_key=const.NODE_CAPACITY_LABEL,
+                max_skew=1,
+                when_unsatisfiable='DoNotSchedule'),
+            TopologySpreadConstraintArgs(
+                label_selector=LabelSelectorArgs(match_labels=labels),
+                topology_key='kubernetes.io/hostname',
+                max_skew=1,
+                when_unsatisfiable='ScheduleAnyway')]
+    return scheduling
+
+
+def get_prestop_hook(service):
+    # keep a container of a service in const.SHUTDOWN_PRESETS serving until the endpoints and the load balancer
+    # dropped it, the pod needs a grace period covering the drain and the shutdown of the service
+    return {'lifecycle': LifecycleArgs(
+        pre_stop=LifecycleHandlerArgs(
+            exec_=ExecActionArgs(command=['sleep', str(const.SHUTDOWN_PRESETS[service]['drain_seconds'])])))}
+
+
+def get_disruption_budget_spec(labels):
+    # voluntary disruptions like node upgrades and scale downs take one pod of a workload at a time
+    return PodDisruptionBudgetSpecArgs(max_unavailable=1,
+                                       selector=LabelSelectorArgs(match_labels=labels))
+
+
+def get_autoscaler_spec(workload, deployment_name, metrics=None):
+    # scale a deployment on cpu utilization and additional metrics, see const.AUTOSCALING
+    autoscaling = const.AUTOSCALING[workload]
+    return HorizontalPodAutoscalerSpecArgs(
+        scale_target_ref=CrossVersionObjectReferenceArgs(
+            api_version='apps/v1',
+            kind='Deployment',
+            name=deployment_name),
+        min_replicas=autoscaling['min'],
+        max_replicas=autoscaling['max'],
+        metrics=[MetricSpecArgs(
+            type='Resource',
+            resource=ResourceMetricSourceArgs(
+                name='cpu',
+                target=MetricTargetArgs(
+                    type='Utilization',
+                    average_utilization=autoscaling['cpu'])))] + (metrics or []),
+        behavior=HorizontalPodAutoscalerBehaviorArgs(
+            # add one pod at a time right away, remove pods only after the load stayed low
+            scale_up=HPAScalingRulesArgs(
+                stabilization_window_seconds=0,
+                policies=[HPAScalingPolicyArgs(type='Pods', value=1, period_seconds=60)]),
+            scale_down=HPAScalingRulesArgs(
+                stabilization_window_seconds=autoscaling['scale_down_seconds'],
+                policies=[HPAScalingPolicyArgs(type='Pods', value=1, period_seconds=300)])))
 
+
+def get_autoscaler_min_container(name, autoscaler_name, min_replicas):
+    # set the minimum replicas of an autoscaler, e.g. ahead of known peaks
+    return ContainerArgs(name=name,
+                         image=const.KUBECTL_IMAGE,
+                         command=['/bin/sh', '-c'],
+                         args=[plm.Output.concat('kubectl patch hpa ', autoscaler_name,
+                                                 ' --patch \'{"spec":{"minReplicas":', str(min_replicas), '}}\'')])
+
+
+def get_probes(service):
+    # startup, readiness and liveness probes for a service in const.PROBE_PRESETS
+    preset = const.PROBE_PRESETS[service]
+    period = const.PROBE_PERIOD_SECONDS
+    http_get = HTTPGetAction(path=preset['path'], port=preset['port'])
+    return {
+        # the other probes start once the service answered
+        'startup_probe': ProbeArgs(http_get=http_get,
+                                   period_seconds=period,
+                                   failure_threshold=math.ceil(preset['load_seconds'] / period)),
+        'readiness_probe': ProbeArgs(http_get=http_get,
+                                     period_seconds=period,
+                                     timeout_seconds=5,
+                                     failure_threshold=2),
+        # restart only if the service stopped answering for a while
+        'liveness_probe': ProbeArgs(http_get=http_get,
+                                    period_seconds=30,
+                                    timeout_seconds=10,
+                                    failure_threshold=4),
+    }
+
+
+def get_vector_tile_ttls(router_config):
+    # cache times of the otp vector tile layers
+    ttls = [layer['cacheMaxSeconds'] for layer in json.loads(router_config).get('vectorTileLayers', [])]
+    return min(ttls), max(ttls)
+
+
+def get_cdn_spec(backend):
+    # cloud cdn settings of a backend in const.CDN_POLICIES
+    policy = dict(const.CDN_POLICIES[backend])
+    if backend == 'otp-tiles':
+        policy['defaultTtl'], policy['maxTtl'] = get_vector_tile_ttls(
+            read_config_file('router-config.json', const.OTP_CONFIG_FOLDER))
+        policy['clientTtl'] = policy['defaultTtl']
+    include_query_string = policy.pop('includeQueryString')
+    return dict(enabled=True,
+                cachePolicy={'includeHost': True,
+                             'includeProtocol': True,
+                             'includeQueryString': include_query_string},
+                **policy)
+
+
+def get_backend_config_spec(service, backend=None):
+    # load balancer health check matching the readiness probe of a service, cdn for backends with a policy
+    preset = const.PROBE_PRESETS[service]
+    spec = {'healthCheck': {'type': 'HTTP',
+                            'requestPath': preset['path'],
+                            'checkIntervalSec': const.PROBE_PERIOD_SECONDS,
+                            'timeoutSec': 5,
+                            'healthyThreshold': 1,
+                            'unhealthyThreshold': 2},
+            # requests in flight finish on pods being removed from the backends
+            'connectionDraining': {'drainingTimeoutSec': const.LB_DRAINING_SECONDS}}
+    if (backend or service) in const.CDN_POLICIES:
+        spec['cdn'] = get_cdn_spec(backend or service)
+    return spec
+
+
+def get_backend_config_annotation(backend_config):
+    # service annotation attaching a BackendConfig to all service ports
+    return {'cloud.google.com/backend-config': backend_config.metadata.apply(
+        lambda metadata: json.dumps({'default': metadata['name']}))}
+
+
+def get_otp_container_args(name, java_options, cmd_args, otp_type='worker', resources=None):
+    # builders run as init containers in their jobs, which must not have probes.
+    # the pods need the jmx exporter init container and volumes from modules/monitoring.py
+    probes = dict(get_probes('otp'), **get_prestop_hook('otp')) if otp_type == 'worker' else {}
+    # workers load the graph from the graph cache of their node
+    cache_mounts = [get_graph_cache_mount()] if otp_type == 'worker' else []
     container_args = ContainerArgs(name=name,
                                    image=const.OTP_IMAGE,
                                    ports=[ContainerPortArgs(
-                                       container_port=8080)],
+                                       container_port=8080),
+                                       ContainerPortArgs(
+                                           container_port=const.JMX_EXPORTER_PORT,
+                                           name='metrics')],
                                    volume_mounts=[VolumeMountArgs(
                                        mount_path=const.OTP_MOUNT_PATH,
-                                       name=const.OTP_MOUNT_NAME)],
+                                       name=const.OTP_MOUNT_NAME)] + cache_mounts + monitoring.get_jmx_volume_mounts(),
                                    env=[EnvVarArgs(
                                        name='JAVA_OPTIONS',
-                                       value=java_options)],
+                                       value=f'{java_options} {monitoring.get_java_agent()}')],
                                    command=[const.OTP_COMMAND],
                                    args=cmd_args,
-                                   liveness_probe=probe_args,
+                                   resources=resources,
+                                   **probes
                                    )
     return container_args
+
+
+def get_graph_cache_mount(read_only=True):
+    # graph cache of the node, the pod needs the volume of get_graph_cache_volume
+    return VolumeMountArgs(mount_path=const.OTP_GRAPH_CACHE_MOUNT_PATH,
+                           name=const.OTP_GRAPH_CACHE_VOLUME,
+                           read_only=read_only)
+
+
+def get_graph_cache_volume():
+    return VolumeArgs(name=const.OTP_GRAPH_CACHE_VOLUME,
+                      host_path=HostPathVolumeSourceArgs(path=const.OTP_GRAPH_CACHE_HOST_PATH,
+                                                         type='DirectoryOrCreate'))
+
+
+def get_otp_graph_resolve_container(graph_url, graphs_url):
+    # render the worker config for the graph version in the pod annotation
+    return ContainerArgs(name='otp-graph-resolve',
+                         image=const.GCE_SDK_IMAGE,
+                         env=[
+                             EnvVarArgs(
+                                 name='GRAPH_VERSION',
+                                 value_from=EnvVarSourceArgs(
+                                     field_ref=ObjectFieldSelectorArgs(
+                                         field_path=f"metadata.annotations['{const.OTP_GRAPH_VERSION_ANNOTATION}']"))),
+                             EnvVarArgs(name='GRAPH_URI', value=graph_url),
+                             EnvVarArgs(name='GRAPHS_URI', value=graphs_url),
+                             EnvVarArgs(name='CONFIG_DIR', value=const.OTP_CONFIG_MOUNT_PATH),
+                             EnvVarArgs(name='OTP_DIR', value=const.OTP_MOUNT_PATH),
+                             EnvVarArgs(name='CACHE_DIR', value=const.OTP_GRAPH_CACHE_MOUNT_PATH),
+                             EnvVarArgs(name='CACHE_POLL_SECONDS', value=str(const.OTP_GRAPH_CACHE_POLL_SECONDS)),
+                             EnvVarArgs(name='CACHE_WAIT_SECONDS', value=str(const.OTP_GRAPH_CACHE_WAIT_SECONDS))],
+                         volume_mounts=[
+                             VolumeMountArgs(
+                                 mount_path=const.OTP_CONFIG_MOUNT_PATH,
+                                 name=const.OTP_CONFIG_MOUNT_NAME),
+                             VolumeMountArgs(
+                                 mount_path=const.OTP_MOUNT_PATH,
+                                 name=const.OTP_MOUNT_NAME),
+                             get_graph_cache_mount()],
+                         command=['/bin/sh', '-c'],
+                         args=[read_config_file('resolve-graph.sh', const.SCRIPTS_FOLDER)])
+
+
+def get_otp_build_container_args(stage):
+    return get_otp_container_args(name=f'otp-{stage}-builder',
+                                  java_options=sizing.get_java_options(f'otp-{stage}-builder'),
+                                  cmd_args=const.OTP_BUILD_STAGES[stage] + [const.OTP_MOUNT_PATH],
+                                  otp_type='builder',
+                                  resources=sizing.get_resources(f'otp-{stage}-builder'))
+
+
+def get_service_area_poly(polygon):
+    # service area outline in the polygon format of osmium extract
+    points = [f'   {lon} {lat}' for lon, lat in polygon + polygon[:1]]
+    return '\n'.join(['service-area', '1', *points, 'END', 'END', ''])
+
+
+def get_preprocess_container(stage, raw_url, trimmed_url, reports_url, env=None, image=const.GCE_SDK_IMAGE):
+    # init container trimming the osm or gtfs input of a graph build, runs preprocess-<stage>.sh.
+    # the pod needs the preprocessing config map and work volumes
+    return ContainerArgs(name=f'{stage}-preprocess',
+                         image=image,
+                         env=[
+                             EnvVarArgs(name='RAW_URI', value=raw_url),
+                             EnvVarArgs(name='TRIMMED_URI', value=trimmed_url),
+                             EnvVarArgs(name='REPORTS_URI', value=reports_url),
+                             EnvVarArgs(name='PREPROCESS_DIR', value=const.PREPROCESS_MOUNT_PATH),
+                             EnvVarArgs(name='WORK_DIR', value=const.PREPROCESS_WORK_PATH)] + (env or []),
+                         volume_mounts=[
+                             VolumeMountArgs(
+                                 mount_path=const.PREPROCESS_MOUNT_PATH,
+                                 name=const.PREPROCESS_FOLDER),
+                             VolumeMountArgs(
+                                 mount_path=const.PREPROCESS_WORK_PATH,
+                                 name=const.PREPROCESS_WORK_VOLUME)],
+                         command=['/bin/sh', '-c'],
+                         args=[read_config_file(f'preprocess-{stage}.sh', const.SCRIPTS_FOLDER)],
+                         resources=sizing.get_resources('graph-preprocess'))
+
+
+def get_job_trigger_container(name, cronjob_name, only_if_changed=True):
+    # start a job from a (suspended) cronjob, optionally only if the previous step marked a change
+    trigger = plm.Output.concat('kubectl create job --from=cronjob/', cronjob_name, ' ', cronjob_name,
+                                '-$(date +%s)')
+    volume_mounts = None
+    if only_if_changed:
+        trigger = plm.Output.concat(f'if [ -f {const.TRIGGER_STATE_PATH}/changed ] ; then ', trigger,
+                                    ' ; else echo nothing changed ; fi')
+        volume_mounts = [VolumeMountArgs(
+            mount_path=const.TRIGGER_STATE_PATH,
+            name=const.TRIGGER_STATE_VOLUME)]
+    return ContainerArgs(name=name,
+                         image=const.KUBECTL_IMAGE,
+                         volume_mounts=volume_mounts,
+                         command=['/bin/sh', '-c'],
+                         args=[trigger])
+
+
+def get_benchmark_pod_spec(label, otp_url, results_url, config_map_name):
+    # benchmark run against otp, the init container runs the load test and the main container saves the results
+    return PodSpecArgs(
+        restart_policy='Never',
+        **get_pod_scheduling('benchmark'),
+        init_containers=[ContainerArgs(
+            name='benchmark',
+            image=const.PYTHON_IMAGE,
+            working_dir='/app',
+            command=['python', '-m', 'benchmark', 'run'],
+            args=[otp_url.apply(lambda url: f'--url={url}'),
+                  f'--label={label}',
+                  f'--qps={const.BENCHMARK_QPS}',
+                  f'--duration={const.BENCHMARK_DURATION}',
+                  '--bbox', *[str(value) for value in const.SERVICE_AREA_BBOX],
+                  '--results=/results'],
+            volume_mounts=[
+                VolumeMountArgs(mount_path='/app/benchmark', name='benchmark', read_only=True),
+                VolumeMountArgs(mount_path='/results', name='results')],
+            resources=sizing.get_resources('benchmark'))],
+        containers=[ContainerArgs(
+            name='save-results',
+            image=const.INITCONTAINER_IMG,
+            command=['/bin/sh', '-c'],
+            args=[results_url.apply(lambda url: f'gsutil -q cp /results/*.json {url}/ ; echo done')],
+            volume_mounts=[VolumeMountArgs(mount_path='/results', name='results')])],
+        volumes=[
+            VolumeArgs(name='benchmark', config_map=ConfigMapVolumeSourceArgs(name=config_map_name)),
+            VolumeArgs(name='results', empty_dir=EmptyDirVolumeSourceArgs())])
+
+
+def get_digitransit_bundle_id():
+    # content hash of everything the digitransit-ui bundle is built from, a change builds a new bundle
+    build_input = '\n'.join([const.DIGITRANSIT_IMAGE, const.DIGITRANSIT_CONFIG,
+                              read_config_file('build-digitransit.sh', const.SCRIPTS_FOLDER)])
+    return hashlib.sha256(build_input.encode()).hexdigest()[:12]
+
+
+def get_tile(lon, lat, zoom):
+    # x and y of the web mercator tile containing a coordinate
+    n = 2 ** zoom
+    x = int((lon + 180) / 360 * n)
+    y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+    return min(x, n - 1), min(y, n - 1)
+
+
+def get_tile_ranges(bbox, max_zoom):
+    # lines of 'zoom x_min x_max y_min y_max' covering a bounding box up to a zoom level
+    min_lon, min_lat, max_lon, max_lat = bbox
+    ranges = []
+    for zoom in range(max_zoom + 1):
+        x_min, y_min = get_tile(min_lon, max_lat, zoom)
+        x_max, y_max = get_tile(max_lon, min_lat, zoom)
+        ranges.append(f'{zoom} {x_min} {x_max} {y_min} {y_max}')
+    return '\n'.join(ranges)
+
+
+def get_data_cache_script(unpack):
+    # unpack the archive from the archive cache of the node if the node warmup downloaded it,
+    # wait for a download in progress
+    if not const.WARMUP_DATASETS:
+        return ''
+    return (f'cached={const.DATA_CACHE_MOUNT_PATH}/$(basename "$url") ; waited=0 ; '
+            f'while [ -f "$cached.part" ] && [ $waited -lt {const.DATA_CACHE_WAIT_SECONDS} ] ; do '
+            'sleep 5 ; waited=$(( waited + 5 )) ; done ; '
+            f'if [ -f "$cached" ] ; then {unpack} ; echo done ; exit 0 ; fi ; ')
+
+
+def get_data_cache_volumes():
+    # archive cache of the node for the pods with data init containers
+    if not const.WARMUP_DATASETS:
+        return []
+    return [VolumeArgs(name=const.DATA_CACHE_VOLUME,
+                       host_path=HostPathVolumeSourceArgs(path=const.DATA_CACHE_HOST_PATH, type='DirectoryOrCreate'))]
+
+
+def get_checked_pipeline(*stages):
+    # the init container shell has no pipefail, each stage of the pipeline marks its failure
+    # and the pipeline fails if any stage failed, not only the last one
+    marked = [f'{{ {stage} || touch .stage{index}.failed ; }}' for index, stage in enumerate(stages)]
+    return ('rm -f .stage*.failed ; ' + ' | '.join(marked) +
+            ' ; if ls .stage*.failed > /dev/null 2>&1 ; then rm -f .stage*.failed ; exit 1 ; fi')
+
+
+def get_data_fetch_script(archive_format):
+    chunk_mb = const.DATA_FETCH_CHUNK_MB
+    parallel = const.DATA_FETCH_PARALLELISM
+    if archive_format == '7z':
+        # 7z archives can't be read from a pipe, download with parallel slices and unpack afterwards
+        return (f'set -e ; cd {const.DATA_MOUNT_PATH} ; '
+                + get_data_cache_script('7z x "$cached"') +
+                f'gsutil -o GSUtil:sliced_object_download_threshold={chunk_mb}M '
+                f'-o GSUtil:sliced_object_download_max_components={parallel} cp "$url" archive.7z ; '
+                '7z x archive.7z ; echo done ; rm archive.7z')
+    if archive_format == 'tar.zst':
+        # fetch byte ranges in parallel, feed them in order to the decompressor
+        # and remove each part once consumed, so at most a few chunks are on disk
+        return (f'set -e ; cd {const.DATA_MOUNT_PATH} ; '
+                + get_data_cache_script(get_checked_pipeline('zstd -d -T0 < "$cached"', 'tar -x -f - -C .')) +
+                f'chunk=$(( {chunk_mb} * 1024 * 1024 )) ; parallel={parallel} ; '
+                'size=$(gsutil du "$url" | awk \'{print $1}\') ; '
+                'parts=$(( (size + chunk - 1) / chunk )) ; '
+                'fetch() { gsutil -q cat -r $(( $1 * chunk ))-$(( ($1 + 1) * chunk - 1 )) "$url" > .part$1.tmp '
+                '&& mv .part$1.tmp .part$1 || touch .part$1.failed ; } ; '
+                + get_checked_pipeline('( next=0 ; part=0 ; '
+                                       'while [ $part -lt $parts ] ; do '
+                                       'while [ $next -lt $parts ] && [ $next -lt $(( part + parallel )) ] ; do '
+                                       'fetch $next & next=$(( next + 1 )) ; done ; '
+                                       'until [ -f .part$part ] ; do [ -f .part$part.failed ] && exit 1 ; '
+                                       'sleep 0.1 ; done ; '
+                                       'cat .part$part ; rm .part$part ; part=$(( part + 1 )) ; '
+                                       'done )',
+                                       'zstd -d -T0',
+                                       'tar -x -f - -C .') + ' ; echo done')
+    raise ValueError(f'unsupported data archive format: {archive_format}')
+
+
+def get_data_init_container(name, mount_name, archive_url, archive_format=const.DATA_ARCHIVE_FORMAT):
+    # init container that fetches a dataset archive from the bucket into the mounted volume,
+    # the pod needs the volumes of get_data_cache_volumes
+    cache_mounts = [VolumeMountArgs(mount_path=const.DATA_CACHE_MOUNT_PATH,
+                                    name=const.DATA_CACHE_VOLUME,
+                                    read_only=True)] if const.WARMUP_DATASETS else []
+    return ContainerArgs(name=name,
+                         image=const.INITCONTAINER_IMG,
+                         volume_mounts=[VolumeMountArgs(
+                             mount_path=const.DATA_MOUNT_PATH,
+                             name=mount_name,
+                             read_only=False
+                         )] + cache_mounts,
+                         command=['/bin/sh', '-c'],
+                         args=[plm.Output.concat("url='", archive_url, "' ; ", get_data_fetch_script(archive_format))]
+                         )
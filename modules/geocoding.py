@@ -0,0 +1,222 @@
+import pulumi as plm
+from pulumi import CustomTimeouts
+from pulumi_kubernetes.apiextensions import CustomResource
+from pulumi_kubernetes.apps.v1 import Deployment, DeploymentSpecArgs
+from pulumi_kubernetes.autoscaling.v2beta2 import HorizontalPodAutoscaler
+from pulumi_kubernetes.core.v1 import Service, PodTemplateSpecArgs, PodSpecArgs, ContainerArgs, ServiceSpecArgs, \
+    ServicePortArgs, ConfigMap, VolumeMountArgs, EnvVarArgs, ContainerPortArgs, VolumeArgs, ConfigMapVolumeSourceArgs, \
+    EmptyDirVolumeSourceArgs
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs, ObjectMetaArgs
+from pulumi_kubernetes.policy.v1 import PodDisruptionBudget
+
+import modules.constants as const
+import modules.datadisk as datadisk
+import modules.functions as fun
+import modules.monitoring as monitoring
+import modules.sizing as sizing
+import modules.storage as storage
+
+
+class Geocoding(plm.ComponentResource):
+    # geocoding: photon, pelias-photon-adapter and the geocoding cache in front of the adapter
+    def __init__(self, name, provider, region=const.GCE_REGION, opts=None):
+        super().__init__('planner:tiers:Geocoding', name, None, opts)
+        self.region = region
+
+        # load balancer health checks
+        self.backend_configs = {backend: CustomResource(fun.get_region_name(f'{backend}-backend-config', self.region),
+                                                        api_version='cloud.google.com/v1',
+                                                        kind='BackendConfig',
+                                                        spec=fun.get_backend_config_spec(backend),
+                                                        opts=fun.get_child_options(self, provider=provider))
+                                for backend in ['photon', 'geocoding-cache']}
+
+        # svc for photon geocoding
+        self.photon_service = Service(fun.get_region_name('photon-svc', self.region),
+                                      metadata=ObjectMetaArgs(
+                                          annotations=fun.get_backend_config_annotation(
+                                              self.backend_configs['photon'])),
+                                      spec=ServiceSpecArgs(
+                                          type='NodePort',
+                                          selector=const.PHOTON_LABEL,
+                                          ports=[ServicePortArgs(
+                                              port=const.PHOTON_PORT)]
+                                      ),
+                                      opts=fun.get_child_options(self, provider=provider))
+
+        # svc for pelias photon adapter, only the geocoding cache talks to it
+        pelias_service = Service(fun.get_region_name('pelias-svc', self.region),
+                                 spec=ServiceSpecArgs(
+                                     type='ClusterIP',
+                                     selector=const.PELIAS_LABEL,
+                                     ports=[ServicePortArgs(port=const.PELIAS_PORT)]
+                                 ),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        # svc for the geocoding cache in front of pelias-adapter
+        self.cache_service = Service(fun.get_region_name('geocoding-cache-svc', self.region),
+                                     metadata=ObjectMetaArgs(
+                                         annotations=fun.get_backend_config_annotation(
+                                             self.backend_configs['geocoding-cache'])),
+                                     spec=ServiceSpecArgs(
+                                         type='NodePort',
+                                         selector=const.GEOCODING_CACHE_LABEL,
+                                         ports=[ServicePortArgs(port=const.GEOCODING_CACHE_PORT)]
+                                     ),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        # dataset volume of photon, from the bucket of the region
+        photon_data_url = storage.get_regional_url(storage.photon_data_bucket_url, region)
+        if const.DATA_VOLUME_MODE == 'disk':
+            photon_data_claim = datadisk.create_dataset_claim('photon-data', photon_data_url,
+                                                              const.PHOTON_DATA_VERSION, const.PHOTON_DISK_GB,
+                                                              provider, self)
+            # elasticsearch needs a writable data dir, copy the index from the shared disk instead of the bucket
+            photon_volumes = [VolumeArgs(name=const.PHOTON_MOUNT_NAME, empty_dir=EmptyDirVolumeSourceArgs()),
+                              datadisk.get_dataset_volume(const.PHOTON_DISK_VOLUME, photon_data_claim)]
+            photon_init_containers = [datadisk.get_dataset_copy_container('initphoton', const.PHOTON_DISK_VOLUME,
+                                                                          const.PHOTON_MOUNT_NAME)]
+        else:
+            photon_volumes = [VolumeArgs(name=const.PHOTON_MOUNT_NAME,
+                                         empty_dir=EmptyDirVolumeSourceArgs())] + fun.get_data_cache_volumes()
+            photon_init_containers = [fun.get_data_init_container(name='initphoton',
+                                                                  mount_name=const.PHOTON_MOUNT_NAME,
+                                                                  archive_url=photon_data_url)]
+
+        photon_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(
+                labels=const.PHOTON_LABEL),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('photon', const.PHOTON_LABEL),
+                termination_grace_period_seconds=const.SHUTDOWN_PRESETS['photon']['grace_seconds'],
+                containers=[ContainerArgs(
+                    name='photon-geocoding',
+                    image=const.PHOTON_IMAGE,
+                    ports=[ContainerPortArgs(container_port=const.JMX_EXPORTER_PORT, name='metrics')],
+                    volume_mounts=[VolumeMountArgs(
+                        mount_path='/usr/local/photon/datadir',
+                        name=const.PHOTON_MOUNT_NAME,
+                        read_only=False
+                    )] + monitoring.get_jmx_volume_mounts(),
+                    env=[EnvVarArgs(
+                        name='JAVA_TOOL_OPTIONS',
+                        value=f"{sizing.get_java_options('photon')} {monitoring.get_java_agent()}")],
+                    command=['/bin/sh', '-c'],
+                    args=['cd /usr/local/photon; ln -s datadir/photon_data/ . ; '
+                          'java -jar photon-0.3.5.jar'],
+                    resources=sizing.get_resources('photon'),
+                    **fun.get_probes('photon'),
+                    **fun.get_prestop_hook('photon')
+                )],
+                volumes=photon_volumes + monitoring.get_jmx_volumes(),
+                init_containers=[monitoring.get_jmx_exporter_container(
+                    storage.get_regional_url(storage.jmx_agent_bucket_url, region),
+                    storage.jmx_agent.content_hash)] + photon_init_containers))
+        self.photon = Deployment(fun.get_region_name('photon', self.region),
+                                 spec=DeploymentSpecArgs(
+                                     selector=LabelSelectorArgs(match_labels=const.PHOTON_LABEL),
+                                     template=photon_pod),
+                                 opts=fun.get_child_options(self, provider=provider,
+                                                            custom_timeouts=CustomTimeouts(create='40m')))
+
+        self.pelias_adapter = Deployment(fun.get_region_name('pelias-adapter', self.region),
+                                         spec=DeploymentSpecArgs(
+                                             selector=LabelSelectorArgs(match_labels=const.PELIAS_LABEL),
+                                             template=PodTemplateSpecArgs(
+                                                 metadata=ObjectMetaArgs(labels=const.PELIAS_LABEL),
+                                                 spec=PodSpecArgs(
+                                                     **fun.get_pod_scheduling('pelias', const.PELIAS_LABEL),
+                                                     termination_grace_period_seconds=const.SHUTDOWN_PRESETS[
+                                                         'pelias']['grace_seconds'],
+                                                     containers=[ContainerArgs(
+                                                         name='pelias-adapter',
+                                                         image=const.PELIAS_IMAGE,
+                                                         ports=[ContainerPortArgs(container_port=const.PELIAS_PORT)],
+                                                         env=[
+                                                             EnvVarArgs(
+                                                                 name='PORT',
+                                                                 value=str(const.PELIAS_PORT)),
+                                                             EnvVarArgs(
+                                                                 name='PHOTON_URL',
+                                                                 value=plm.Output.concat(
+                                                                     'http://', self.photon_service.spec.cluster_ip,
+                                                                     ':', str(const.PHOTON_PORT))
+                                                             )
+                                                         ],
+                                                         resources=sizing.get_resources('pelias'),
+                                                         **fun.get_probes('pelias'),
+                                                         **fun.get_prestop_hook('pelias'))]))),
+                                         opts=fun.get_child_options(self, provider=provider))
+
+        # geocoding cache, autocomplete prefixes repeat across users. each replica keeps its own cache,
+        # two of them keep geocoding up while a node is preempted
+        cache_config_map = ConfigMap(fun.get_region_name('geocoding-cache-config', self.region),
+                                     data={
+                                         'geocoding_cache.py': fun.read_config_file('geocoding_cache.py',
+                                                                                    const.GEOCODING_CACHE_FOLDER)
+                                     },
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        cache_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(labels=const.GEOCODING_CACHE_LABEL),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('geocoding-cache', const.GEOCODING_CACHE_LABEL),
+                termination_grace_period_seconds=const.SHUTDOWN_PRESETS['geocoding-cache']['grace_seconds'],
+                containers=[ContainerArgs(
+                    name='geocoding-cache',
+                    image=const.PYTHON_IMAGE,
+                    ports=[ContainerPortArgs(container_port=const.GEOCODING_CACHE_PORT)],
+                    env=[
+                        EnvVarArgs(
+                            name='PORT',
+                            value=str(const.GEOCODING_CACHE_PORT)),
+                        EnvVarArgs(
+                            name='UPSTREAM_URL',
+                            value=plm.Output.concat('http://', pelias_service.spec.cluster_ip,
+                                                    ':', str(const.PELIAS_PORT))),
+                        EnvVarArgs(
+                            name='CACHE_ENTRIES',
+                            value=str(const.GEOCODING_CACHE_ENTRIES)),
+                        EnvVarArgs(
+                            name='CACHE_TTL',
+                            value=str(const.GEOCODING_CACHE_TTL_SECONDS)),
+                        EnvVarArgs(
+                            name='FOCUS_PRECISION',
+                            value=str(const.GEOCODING_FOCUS_PRECISION))
+                    ],
+                    volume_mounts=[
+                        VolumeMountArgs(
+                            mount_path='/app',
+                            name='geocoding-cache-config',
+                            read_only=True)],
+                    command=['python', '/app/geocoding_cache.py'],
+                    resources=sizing.get_resources('geocoding-cache'),
+                    **fun.get_probes('geocoding-cache'),
+                    **fun.get_prestop_hook('geocoding-cache'))],
+                volumes=[
+                    VolumeArgs(name='geocoding-cache-config',
+                               config_map=ConfigMapVolumeSourceArgs(
+                                   name=cache_config_map.metadata.name))]))
+        self.cache = Deployment(fun.get_region_name('geocoding-cache', self.region),
+                                spec=DeploymentSpecArgs(
+                                    replicas=sizing.get_max_replicas('geocoding-cache'),
+                                    selector=LabelSelectorArgs(match_labels=const.GEOCODING_CACHE_LABEL),
+                                    template=cache_pod),
+                                opts=fun.get_child_options(self, provider=provider))
+
+        self.autoscalers = {workload: HorizontalPodAutoscaler(fun.get_region_name(f'{workload}-hpa', self.region),
+                                                              spec=fun.get_autoscaler_spec(workload,
+                                                                                           deployment.metadata.name),
+                                                              opts=fun.get_child_options(self, provider=provider))
+                            for workload, deployment in [('photon', self.photon),
+                                                         ('pelias', self.pelias_adapter)]}
+
+        self.disruption_budgets = {
+            workload: PodDisruptionBudget(fun.get_region_name(f'{workload}-pdb', self.region),
+                                          spec=fun.get_disruption_budget_spec(labels),
+                                          opts=fun.get_child_options(self, provider=provider))
+            for workload, labels in [('photon', const.PHOTON_LABEL),
+                                     ('pelias-adapter', const.PELIAS_LABEL),
+                                     ('geocoding-cache', const.GEOCODING_CACHE_LABEL)]}
+
+        self.register_outputs({})
@@ -0,0 +1,104 @@
+import json
+
+import pulumi as plm
+from pulumi_kubernetes.core.v1 import ContainerArgs, VolumeMountArgs, VolumeArgs, EmptyDirVolumeSourceArgs, \
+    ConfigMapVolumeSourceArgs
+
+import modules.constants as const
+
+JMX_AGENT_FILE = 'jmx_prometheus_javaagent.jar'
+JMX_CONFIG_FILE = 'jmx-exporter.yaml'
+
+
+def get_java_agent():
+    # jvm option attaching the prometheus exporter to a java process
+    return (f'-javaagent:{const.JMX_EXPORTER_PATH}/agent/{JMX_AGENT_FILE}='
+            f'{const.JMX_EXPORTER_PORT}:{const.JMX_EXPORTER_PATH}/config/{JMX_CONFIG_FILE}')
+
+
+def get_jmx_exporter_container(agent_url, agent_hash):
+    # init container copying the exporter agent from the bucket before the jvm containers start. the jvms don't
+    # start without it, the pod fails on a failed copy or an agent that doesn't match the uploaded blob
+    agent_path = f'{const.JMX_EXPORTER_PATH}/agent/{JMX_AGENT_FILE}'
+    return ContainerArgs(name='jmx-exporter',
+                         image=const.INITCONTAINER_IMG,
+                         volume_mounts=[VolumeMountArgs(
+                             mount_path=f'{const.JMX_EXPORTER_PATH}/agent',
+                             name=const.JMX_EXPORTER_VOLUME)],
+                         command=['/bin/sh', '-c'],
+                         args=[plm.Output.concat("set -e ; gsutil -q cp '", agent_url, f"' {agent_path} ; ",
+                                                 "echo '", agent_hash, f"  {agent_path}' | sha256sum -c -")])
+
+
+def get_jmx_volume_mounts():
+    return [VolumeMountArgs(mount_path=f'{const.JMX_EXPORTER_PATH}/agent',
+                            name=const.JMX_EXPORTER_VOLUME,
+                            read_only=True),
+            VolumeMountArgs(mount_path=f'{const.JMX_EXPORTER_PATH}/config',
+                            name=const.JMX_EXPORTER_CONFIG_VOLUME,
+                            read_only=True)]
+
+
+def get_jmx_volumes():
+    # the config map is created with a fixed name in __main__.py
+    return [VolumeArgs(name=const.JMX_EXPORTER_VOLUME,
+                       empty_dir=EmptyDirVolumeSourceArgs()),
+            VolumeArgs(name=const.JMX_EXPORTER_CONFIG_VOLUME,
+                       config_map=ConfigMapVolumeSourceArgs(name=const.JMX_EXPORTER_CONFIG_NAME))]
+
+
+def get_pod_monitoring_spec(labels, port):
+    # gke managed prometheus scrape of the pods with the labels
+    return {'selector': {'matchLabels': labels},
+            'endpoints': [{'port': port, 'interval': const.METRICS_SCRAPE_INTERVAL}]}
+
+
+def get_latency_widget(title, metric, percentile):
+    # load balancer latency percentile per url path rule of the ingress
+    return {'title': title,
+            'xyChart': {'dataSets': [{
+                'plotType': 'LINE',
+                'timeSeriesQuery': {'timeSeriesFilter': {
+                    'filter': f'metric.type="loadbalancing.googleapis.com/https/{metric}" '
+                              f'resource.type="https_lb_rule"',
+                    'aggregation': {'alignmentPeriod': '60s',
+                                    'perSeriesAligner': 'ALIGN_DELTA',
+                                    'crossSeriesReducer': f'REDUCE_PERCENTILE_{percentile}',
+                                    'groupByFields': ['metric.label.matched_url_path_rule']}}}}],
+                'yAxis': {'label': 'ms', 'scale': 'LINEAR'}}}
+
+
+def get_prometheus_widget(title, query, unit=''):
+    return {'title': title,
+            'xyChart': {'dataSets': [{'plotType': 'LINE',
+                                      'timeSeriesQuery': {'prometheusQuery': query}}],
+                        'yAxis': {'label': unit, 'scale': 'LINEAR'}}}
+
+
+def get_dashboard_json():
+    # request latency per ingress path next to the jvm and cache metrics of the services behind them
+    widgets = [get_latency_widget(f'total latency p{percentile} per path', 'total_latencies', percentile)
+               for percentile in (50, 95, 99)]
+    widgets += [get_latency_widget('backend latency p95 per path', 'backend_latencies', 95),
+                get_prometheus_widget('jvm heap used', 'sum by (namespace, pod) (jvm_memory_bytes_used{area="heap"})',
+                                      'bytes'),
+                get_prometheus_widget('gc pause time per second',
+                                      'sum by (pod, gc) (rate(jvm_gc_collection_seconds_sum[5m]))', 's/s'),
+                get_prometheus_widget('longest gc pauses',
+                                      'max by (pod, gc) (rate(jvm_gc_collection_seconds_sum[5m]) '
+                                      '/ rate(jvm_gc_collection_seconds_count[5m]))', 's'),
+                get_prometheus_widget('jvm threads', 'sum by (pod) (jvm_threads_current)'),
+                get_prometheus_widget('http server thread pools',
+                                      'sum by (pod, __name__) ({__name__=~"(grizzly|jetty_threadpool)_.*"})'),
+                get_prometheus_widget('geocoding cache hit ratio',
+                                      'sum(rate(geocoding_cache_hits_total[5m])) / '
+                                      '(sum(rate(geocoding_cache_hits_total[5m])) '
+                                      '+ sum(rate(geocoding_cache_misses_total[5m])))'),
+                get_prometheus_widget('gtfs-realtime relay polls',
+                                      'sum by (__name__) (rate({__name__=~"gtfsrt_relay_'
+                                      '(updates|unchanged|upstream_errors)_total"}[5m]))'),
+                get_prometheus_widget('node warmup, from node ready until images pulled and pods ready',
+                                      'max by (pool, __name__) '
+                                      '({__name__=~"node_warmup_(image_pull|pods_ready)_seconds"})', 's')]
+    return json.dumps({'displayName': const.DASHBOARD_NAME,
+                       'gridLayout': {'columns': 2, 'widgets': widgets}})
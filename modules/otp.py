@@ -0,0 +1,597 @@
+import json
+
+import pulumi as plm
+from pulumi import CustomTimeouts
+from pulumi_kubernetes.apiextensions import CustomResource
+from pulumi_kubernetes.apps.v1 import Deployment, DeploymentSpecArgs, DeploymentStrategyArgs, \
+    RollingUpdateDeploymentArgs, DaemonSet, DaemonSetSpecArgs
+from pulumi_kubernetes.autoscaling.v2beta2 import HorizontalPodAutoscaler
+from pulumi_kubernetes.batch.v1 import JobSpecArgs, CronJob, CronJobSpecArgs, JobTemplateSpecArgs
+from pulumi_kubernetes.core.v1 import Service, PodTemplateSpecArgs, PodSpecArgs, ContainerArgs, ServiceSpecArgs, \
+    ServicePortArgs, ConfigMap, VolumeMountArgs, EnvVarArgs, ContainerPortArgs, VolumeArgs, ConfigMapVolumeSourceArgs, \
+    EmptyDirVolumeSourceArgs, ServiceAccount
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs, ObjectMetaArgs
+from pulumi_kubernetes.policy.v1 import PodDisruptionBudget
+from pulumi_kubernetes.rbac.v1 import Role, RoleBinding, PolicyRuleArgs, RoleRefArgs, SubjectArgs
+
+import modules.constants as const
+import modules.functions as fun
+import modules.monitoring as monitoring
+import modules.sizing as sizing
+import modules.storage as storage
+
+
+class OtpTier(plm.ComponentResource):
+    # open trip planner: the workers with their services and autoscaling, the gtfs-realtime relay
+    # the graph cache on the routing nodes and the graph pipeline building new graphs and rolling the workers over.
+    # in the replica regions the workers follow the graphs replicated to the bucket of their region instead
+    def __init__(self, name, provider, region=const.GCE_REGION, opts=None):
+        super().__init__('planner:tiers:OtpTier', name, None, opts)
+        self.region = region
+
+        # load balancer health checks and cdn for the vector tiles
+        self.backend_configs = {backend: CustomResource(fun.get_region_name(f'{backend}-backend-config', self.region),
+                                                        api_version='cloud.google.com/v1',
+                                                        kind='BackendConfig',
+                                                        spec=fun.get_backend_config_spec('otp', backend),
+                                                        opts=fun.get_child_options(self, provider=provider))
+                                for backend in ['otp', 'otp-tiles']}
+
+        # svc for open trip planner engine
+        self.service = Service(fun.get_region_name('otp-svc', self.region),
+                               metadata=ObjectMetaArgs(
+                                   annotations=fun.get_backend_config_annotation(self.backend_configs['otp'])),
+                               spec=ServiceSpecArgs(
+                                   type='NodePort',
+                                   selector=const.OTP_WORKER_LABEL,
+                                   ports=[ServicePortArgs(port=const.OTP_PORT)]
+                               ),
+                               opts=fun.get_child_options(self, provider=provider))
+
+        # svc for otp vector tiles, cached by the cdn
+        self.tiles_service = Service(fun.get_region_name('otp-tiles-svc', self.region),
+                                     metadata=ObjectMetaArgs(
+                                         annotations=fun.get_backend_config_annotation(
+                                             self.backend_configs['otp-tiles'])),
+                                     spec=ServiceSpecArgs(
+                                         type='NodePort',
+                                         selector=const.OTP_WORKER_LABEL,
+                                         ports=[ServicePortArgs(port=const.OTP_PORT)]
+                                     ),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        self.create_gtfsrt_relay(provider)
+
+        self.config_map = ConfigMap(fun.get_region_name('otp-worker-config', self.region),
+                                    data={
+                                        'build-config.json': storage.get_build_config(region),
+                                        'otp-config.json': fun.read_config_file('otp-config.json',
+                                                                                const.OTP_CONFIG_FOLDER),
+                                        'router-config.json': storage.router_config
+                                    },
+                                    opts=fun.get_child_options(self, provider=provider))
+
+        # workers load the graph version in their pod annotation, the graph build rolls them over to new versions
+        worker_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(
+                labels=const.OTP_WORKER_LABEL,
+                # otp reads the router config on start, a new profile rolls the workers
+                annotations={const.OTP_GRAPH_VERSION_ANNOTATION: const.OTP_GRAPH_VERSION,
+                             'planner/routing-profile': const.ROUTING_PROFILE}),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('otp-worker', const.OTP_WORKER_LABEL),
+                termination_grace_period_seconds=const.SHUTDOWN_PRESETS['otp']['grace_seconds'],
+                init_containers=[
+                    monitoring.get_jmx_exporter_container(
+                        storage.get_regional_url(storage.jmx_agent_bucket_url, region), storage.jmx_agent.content_hash),
+                    fun.get_otp_graph_resolve_container(
+                        graph_url=storage.get_regional_url(storage.otp_graph_bucket_url, region),
+                        graphs_url=storage.get_regional_url(storage.otp_graphs_bucket_url, region))],
+                containers=[fun.get_otp_container_args(
+                    name='otp-worker',
+                    java_options=sizing.get_java_options('otp-worker'),
+                    cmd_args=['--load', const.OTP_MOUNT_PATH],
+                    resources=sizing.get_resources('otp-worker'))],
+                volumes=[
+                    VolumeArgs(
+                        name=const.OTP_CONFIG_MOUNT_NAME,
+                        config_map=ConfigMapVolumeSourceArgs(
+                            name=self.config_map.metadata.name,
+                        )),
+                    VolumeArgs(
+                        name=const.OTP_MOUNT_NAME,
+                        empty_dir=EmptyDirVolumeSourceArgs()),
+                    fun.get_graph_cache_volume()] + monitoring.get_jmx_volumes()))
+        self.worker = Deployment(fun.get_region_name('otp-worker', self.region),
+                                 spec=DeploymentSpecArgs(
+                                     selector=LabelSelectorArgs(match_labels=const.OTP_WORKER_LABEL),
+                                     min_ready_seconds=30,
+                                     template=worker_pod,
+                                     # keep serving with the old graph until new workers are ready
+                                     strategy=DeploymentStrategyArgs(
+                                         rolling_update=RollingUpdateDeploymentArgs(
+                                             max_surge=1,
+                                             max_unavailable=0)
+                                     )),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        # the peak schedules own the minimum, an update during a peak would undo the raised minimum.
+        # a changed minimum in const.AUTOSCALING applies with the end of the next peak
+        self.autoscaler = HorizontalPodAutoscaler(fun.get_region_name('otp-worker-hpa', self.region),
+                                                  spec=fun.get_autoscaler_spec('otp-worker',
+                                                                               self.worker.metadata.name),
+                                                  opts=fun.get_child_options(self, provider=provider,
+                                                                             ignore_changes=['spec.minReplicas']))
+
+        self.disruption_budget = PodDisruptionBudget(fun.get_region_name('otp-worker-pdb', self.region),
+                                                     spec=fun.get_disruption_budget_spec(const.OTP_WORKER_LABEL),
+                                                     opts=fun.get_child_options(self, provider=provider))
+
+        self.create_graph_cache(provider)
+        self.create_peak_schedules(provider)
+        # the replica regions serve the graphs built in GCE_REGION
+        if region == const.GCE_REGION:
+            self.create_graph_pipeline(provider)
+        else:
+            self.create_graph_follow(provider)
+
+        self.register_outputs({})
+
+    def create_graph_cache(self, provider):
+        # download every newly published graph onto each routing node, so starting workers don't fetch it
+        self.graph_cache = DaemonSet(fun.get_region_name('otp-graph-cache', self.region),
+                                     spec=DaemonSetSpecArgs(
+                                         selector=LabelSelectorArgs(match_labels=const.OTP_GRAPH_CACHE_LABEL),
+                                         template=PodTemplateSpecArgs(
+                                             metadata=ObjectMetaArgs(labels=const.OTP_GRAPH_CACHE_LABEL),
+                                             spec=PodSpecArgs(
+                                                 **fun.get_pod_scheduling('otp-graph-cache'),
+                                                 containers=[ContainerArgs(
+                                                     name='otp-graph-cache',
+                                                     image=const.GCE_SDK_IMAGE,
+                                                     env=[
+                                                         EnvVarArgs(
+                                                             name='GRAPHS_URI',
+                                                             value=storage.get_regional_url(
+                                                                 storage.otp_graphs_bucket_url, self.region)),
+                                                         EnvVarArgs(
+                                                             name='PINNED_VERSION',
+                                                             value=const.OTP_GRAPH_VERSION),
+                                                         EnvVarArgs(
+                                                             name='CACHE_DIR',
+                                                             value=const.OTP_GRAPH_CACHE_MOUNT_PATH),
+                                                         EnvVarArgs(
+                                                             name='KEEP',
+                                                             value=str(const.OTP_GRAPH_CACHE_KEEP)),
+                                                         EnvVarArgs(
+                                                             name='POLL_SECONDS',
+                                                             value=str(const.OTP_GRAPH_CACHE_POLL_SECONDS))],
+                                                     volume_mounts=[fun.get_graph_cache_mount(read_only=False)],
+                                                     command=['/bin/sh', '-c'],
+                                                     args=[fun.read_config_file('cache-graphs.sh',
+                                                                                const.SCRIPTS_FOLDER)],
+                                                     resources=sizing.get_resources('otp-graph-cache'))],
+                                                 volumes=[fun.get_graph_cache_volume()]))),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+    def create_gtfsrt_relay(self, provider):
+        # gtfs-realtime relay, polls the upstream feed once for all otp workers
+        self.gtfsrt_relay_service = Service(fun.get_region_name('gtfsrt-relay-svc', self.region),
+                                            metadata=ObjectMetaArgs(
+                                                # the router config addresses the relay by this name
+                                                name=const.GTFSRT_RELAY_NAME),
+                                            spec=ServiceSpecArgs(
+                                                type='ClusterIP',
+                                                selector=const.GTFSRT_RELAY_LABEL,
+                                                ports=[ServicePortArgs(port=const.GTFSRT_RELAY_PORT)]
+                                            ),
+                                            opts=fun.get_child_options(self, provider=provider))
+
+        config_map = ConfigMap(fun.get_region_name('gtfsrt-relay-config', self.region),
+                               data={
+                                   'gtfsrt_relay.py': fun.read_config_file('gtfsrt_relay.py', const.GTFSRT_RELAY_FOLDER)
+                               },
+                               opts=fun.get_child_options(self, provider=provider))
+
+        self.gtfsrt_relay = Deployment(fun.get_region_name('gtfsrt-relay', self.region),
+                                       spec=DeploymentSpecArgs(
+                                           selector=LabelSelectorArgs(match_labels=const.GTFSRT_RELAY_LABEL),
+                                           template=PodTemplateSpecArgs(
+                                               metadata=ObjectMetaArgs(labels=const.GTFSRT_RELAY_LABEL),
+                                               spec=PodSpecArgs(
+                                                   **fun.get_pod_scheduling('gtfsrt-relay'),
+                                                   containers=[ContainerArgs(
+                                                       name='gtfsrt-relay',
+                                                       image=const.PYTHON_IMAGE,
+                                                       ports=[ContainerPortArgs(
+                                                           container_port=const.GTFSRT_RELAY_PORT)],
+                                                       env=[
+                                                           EnvVarArgs(
+                                                               name='PORT',
+                                                               value=str(const.GTFSRT_RELAY_PORT)),
+                                                           EnvVarArgs(
+                                                               name='UPSTREAM_URL',
+                                                               value=const.GTFSRT_UPSTREAM_URL),
+                                                           EnvVarArgs(
+                                                               name='POLL_SECONDS',
+                                                               value=str(const.GTFSRT_POLL_SECONDS))
+                                                       ],
+                                                       volume_mounts=[
+                                                           VolumeMountArgs(
+                                                               mount_path='/app',
+                                                               name='gtfsrt-relay-config',
+                                                               read_only=True)],
+                                                       command=['python', '/app/gtfsrt_relay.py'],
+                                                       resources=sizing.get_resources('gtfsrt-relay'),
+                                                       **fun.get_probes('gtfsrt-relay'))],
+                                                   volumes=[
+                                                       VolumeArgs(name='gtfsrt-relay-config',
+                                                                  config_map=ConfigMapVolumeSourceArgs(
+                                                                      name=config_map.metadata.name))]))),
+                                       opts=fun.get_child_options(self, provider=provider))
+
+    def create_peak_schedules(self, provider):
+        # raise the minimum of otp workers ahead of the commute peaks, so new workers have loaded the graph in time
+        account = ServiceAccount(fun.get_region_name('autoscaler-scheduler', self.region),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        role = Role(fun.get_region_name('autoscaler-scheduler', self.region),
+                    rules=[PolicyRuleArgs(
+                        api_groups=['autoscaling'],
+                        resources=['horizontalpodautoscalers'],
+                        verbs=['get', 'patch'])],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        RoleBinding(fun.get_region_name('autoscaler-scheduler', self.region),
+                    role_ref=RoleRefArgs(
+                        api_group='rbac.authorization.k8s.io',
+                        kind='Role',
+                        name=role.metadata.name),
+                    subjects=[SubjectArgs(
+                        kind='ServiceAccount',
+                        name=account.metadata.name,
+                        namespace=account.metadata.namespace)],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        self.peak_schedules = []
+        for peak_name, peak in const.OTP_PEAK_SCHEDULES.items():
+            for phase, min_replicas in [('start', peak['min']), ('end', const.AUTOSCALING['otp-worker']['min'])]:
+                self.peak_schedules.append(CronJob(fun.get_region_name(f'otp-peak-{peak_name}-{phase}', self.region),
+                                                   spec=CronJobSpecArgs(
+                                                       # time in UTC
+                                                       schedule=peak[phase],
+                                                       concurrency_policy='Replace',
+                                                       job_template=JobTemplateSpecArgs(
+                                                           spec=JobSpecArgs(
+                                                               template=PodTemplateSpecArgs(
+                                                                   spec=PodSpecArgs(
+                                                                       restart_policy='OnFailure',
+                                                                       service_account_name=account.metadata.name,
+                                                                       containers=[fun.get_autoscaler_min_container(
+                                                                           name='otp-peak-scaler',
+                                                                           autoscaler_name=(
+                                                                               self.autoscaler.metadata.name),
+                                                                           min_replicas=min_replicas)])),
+                                                               ttl_seconds_after_finished=180))),
+                                                   opts=fun.get_child_options(self, provider=provider)))
+
+    def create_graph_pipeline(self, provider):
+        # the gtfs updater and the street graph build start the transit graph build, nothing runs it by the clock.
+        # the transit graph build rolls the workers over to the new graph
+        account = ServiceAccount('graph-pipeline',
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        role = Role('graph-pipeline',
+                    rules=[
+                        PolicyRuleArgs(
+                            api_groups=['batch'],
+                            resources=['cronjobs'],
+                            verbs=['get']),
+                        PolicyRuleArgs(
+                            api_groups=['batch'],
+                            resources=['jobs'],
+                            verbs=['create']),
+                        PolicyRuleArgs(
+                            api_groups=['apps'],
+                            resources=['deployments'],
+                            verbs=['get', 'list', 'watch', 'patch']),
+                        PolicyRuleArgs(
+                            api_groups=['apps'],
+                            resources=['replicasets'],
+                            verbs=['get', 'list', 'watch'])],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        RoleBinding('graph-pipeline',
+                    role_ref=RoleRefArgs(
+                        api_group='rbac.authorization.k8s.io',
+                        kind='Role',
+                        name=role.metadata.name),
+                    subjects=[SubjectArgs(
+                        kind='ServiceAccount',
+                        name=account.metadata.name,
+                        namespace=account.metadata.namespace)],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        trigger_state_mount = VolumeMountArgs(mount_path=const.TRIGGER_STATE_PATH, name=const.TRIGGER_STATE_VOLUME)
+        otp_config_volume = VolumeArgs(name=const.OTP_MOUNT_NAME,
+                                       config_map=ConfigMapVolumeSourceArgs(name=self.config_map.metadata.name))
+
+        # the builds read osm and gtfs trimmed to the service area, see const.OSM_ROUTING_FILTERS
+        preprocess_config = ConfigMap('graph-preprocess',
+                                      data={
+                                          'trim_osm.py': fun.read_config_file('trim_osm.py', const.PREPROCESS_FOLDER),
+                                          'trim_gtfs.py': fun.read_config_file('trim_gtfs.py',
+                                                                               const.PREPROCESS_FOLDER),
+                                          'service-area.poly': fun.get_service_area_poly(const.SERVICE_AREA_POLYGON),
+                                          'service-area.json': json.dumps(const.SERVICE_AREA_POLYGON)
+                                      },
+                                      opts=fun.get_child_options(self, provider=provider))
+        preprocess_volumes = [VolumeArgs(name=const.PREPROCESS_FOLDER,
+                                         config_map=ConfigMapVolumeSourceArgs(
+                                             name=preprocess_config.metadata.name)),
+                              VolumeArgs(name=const.PREPROCESS_WORK_VOLUME,
+                                         empty_dir=EmptyDirVolumeSourceArgs())]
+
+        # build new otp graph: load the street graph and add the transit data,
+        # publish it as a new graph version and roll the workers over to it
+        graph_build_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(labels=const.OTP_BUILDER_LABEL),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('otp-transit-builder'),
+                restart_policy='Never',
+                service_account_name=account.metadata.name,
+                init_containers=[
+                    monitoring.get_jmx_exporter_container(storage.jmx_agent_bucket_url, storage.jmx_agent.content_hash),
+                    fun.get_preprocess_container(
+                        stage='gtfs',
+                        raw_url=storage.gtfs_data_bucket_url,
+                        trimmed_url=storage.gtfs_trimmed_bucket_url,
+                        reports_url=storage.preprocess_reports_bucket_url,
+                        env=[EnvVarArgs(name='PAST_DAYS', value=str(const.GTFS_PAST_DAYS)),
+                             EnvVarArgs(name='WINDOW_DAYS', value=str(const.GTFS_WINDOW_DAYS))]),
+                    fun.get_otp_build_container_args(stage='transit'),
+                    ContainerArgs(
+                        name='otp-graph-publish',
+                        image=const.GCE_SDK_IMAGE,
+                        env=[
+                            EnvVarArgs(
+                                name='GRAPH_URI',
+                                value=storage.otp_graph_bucket_url),
+                            EnvVarArgs(
+                                name='GRAPHS_URI',
+                                value=storage.otp_graphs_bucket_url),
+                            EnvVarArgs(
+                                name='STATE_DIR',
+                                value=const.TRIGGER_STATE_PATH)],
+                        volume_mounts=[trigger_state_mount],
+                        command=['/bin/sh', '-c'],
+                        args=[fun.read_config_file('publish-graph.sh', const.SCRIPTS_FOLDER)]),
+                    ContainerArgs(
+                        name='otp-graph-rollout',
+                        image=const.KUBECTL_IMAGE,
+                        env=[
+                            EnvVarArgs(
+                                name='DEPLOYMENT',
+                                value=self.worker.metadata.name),
+                            EnvVarArgs(
+                                name='ANNOTATION',
+                                value=const.OTP_GRAPH_VERSION_ANNOTATION),
+                            EnvVarArgs(
+                                name='PINNED_VERSION',
+                                value=const.OTP_GRAPH_VERSION),
+                            EnvVarArgs(
+                                name='ROLLOUT_TIMEOUT',
+                                value=const.OTP_ROLLOUT_TIMEOUT),
+                            EnvVarArgs(
+                                name='STATE_DIR',
+                                value=const.TRIGGER_STATE_PATH)],
+                        volume_mounts=[trigger_state_mount],
+                        command=['/bin/sh', '-c'],
+                        args=[fun.read_config_file('rollout-graph.sh', const.SCRIPTS_FOLDER)])
+                ],
+                # the graphs published before the ones still needed are deleted once the workers rolled over
+                containers=[ContainerArgs(
+                    name='otp-graph-prune',
+                    image=const.GCE_SDK_IMAGE,
+                    env=[
+                        EnvVarArgs(
+                            name='GRAPHS_URI',
+                            value=storage.otp_graphs_bucket_url),
+                        EnvVarArgs(
+                            name='KEEP',
+                            value=str(const.OTP_GRAPHS_KEEP)),
+                        EnvVarArgs(
+                            name='PINNED_VERSION',
+                            value=const.OTP_GRAPH_VERSION),
+                        EnvVarArgs(
+                            name='STATE_DIR',
+                            value=const.TRIGGER_STATE_PATH)],
+                    volume_mounts=[trigger_state_mount],
+                    command=['/bin/sh', '-c'],
+                    args=[fun.read_config_file('prune-graphs.sh', const.SCRIPTS_FOLDER)]
+                )],
+                volumes=[
+                    otp_config_volume,
+                    VolumeArgs(
+                        name=const.TRIGGER_STATE_VOLUME,
+                        empty_dir=EmptyDirVolumeSourceArgs())] + preprocess_volumes + monitoring.get_jmx_volumes()))
+        self.update_graph = CronJob('update-otp-graph',
+                                    spec=CronJobSpecArgs(
+                                        # only started by the gtfs updater and the street graph build
+                                        schedule='27 1 * * *',
+                                        suspend=True,
+                                        concurrency_policy='Forbid',
+                                        job_template=JobTemplateSpecArgs(
+                                            spec=JobSpecArgs(
+                                                template=graph_build_pod,
+                                                active_deadline_seconds=3600,
+                                                ttl_seconds_after_finished=180,
+                                            ))),
+                                    opts=fun.get_child_options(self, provider=provider,
+                                                               custom_timeouts=CustomTimeouts(create='20m')))
+
+        # build new otp street graph from osm data once a week
+        # run the first build by hand: kubectl create job --from=cronjob/<name> street-graph-init
+        street_graph_build_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(labels=const.OTP_BUILDER_LABEL),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('otp-street-builder'),
+                restart_policy='Never',
+                service_account_name=account.metadata.name,
+                init_containers=[
+                    monitoring.get_jmx_exporter_container(storage.jmx_agent_bucket_url, storage.jmx_agent.content_hash),
+                    fun.get_preprocess_container(
+                        stage='osm',
+                        raw_url=storage.osm_data_bucket_url,
+                        trimmed_url=storage.osm_trimmed_bucket_url,
+                        reports_url=storage.preprocess_reports_bucket_url,
+                        env=[EnvVarArgs(name='FILTERS', value=' '.join(const.OSM_ROUTING_FILTERS)),
+                             EnvVarArgs(name='TAG_KEYS', value=','.join(const.OSM_ROUTING_TAG_KEYS))],
+                        image=const.OSMIUM_IMAGE),
+                    fun.get_otp_build_container_args(stage='street')
+                ],
+                # rebuild the transit graph on top of the new street graph
+                containers=[
+                    fun.get_job_trigger_container(
+                        name='otp-graph-trigger',
+                        cronjob_name=self.update_graph.metadata.name,
+                        only_if_changed=False)
+                ],
+                volumes=[otp_config_volume] + preprocess_volumes + monitoring.get_jmx_volumes()))
+        self.update_street_graph = CronJob('update-otp-street-graph',
+                                           spec=CronJobSpecArgs(
+                                               # time in UTC, saturday evening. the transit build it starts
+                                               # ends before the gtfs updater may start the next one
+                                               schedule='0 21 * * 6',
+                                               concurrency_policy='Forbid',
+                                               job_template=JobTemplateSpecArgs(
+                                                   spec=JobSpecArgs(
+                                                       template=street_graph_build_pod,
+                                                       active_deadline_seconds=7200,
+                                                       ttl_seconds_after_finished=180,
+                                                   ))),
+                                           opts=fun.get_child_options(self, provider=provider,
+                                                                      custom_timeouts=CustomTimeouts(create='20m')))
+
+        # get new gtfs data each night, upload it and start a graph build only if the feed changed
+        gtfs_update_pod = PodTemplateSpecArgs(
+            spec=PodSpecArgs(
+                restart_policy='Never',
+                service_account_name=account.metadata.name,
+                init_containers=[ContainerArgs(
+                    name='gtfs-updater',
+                    image=const.GCE_SDK_IMAGE,
+                    env=[
+                        EnvVarArgs(
+                            name='GTFS_URL',
+                            value=plm.Config().get_secret('connect_gtfs_url')),
+                        EnvVarArgs(
+                            name='GTFS_URI',
+                            value=storage.gtfs_data_bucket_url),
+                        EnvVarArgs(
+                            name='MANIFEST_URI',
+                            value=storage.gtfs_manifest_bucket_url),
+                        EnvVarArgs(
+                            name='STATE_DIR',
+                            value=const.TRIGGER_STATE_PATH)
+                    ],
+                    volume_mounts=[trigger_state_mount],
+                    command=['/bin/sh', '-c'],
+                    args=[fun.read_config_file('update-gtfs.sh', const.SCRIPTS_FOLDER)],
+                )],
+                containers=[fun.get_job_trigger_container(
+                    name='otp-graph-trigger',
+                    cronjob_name=self.update_graph.metadata.name)],
+                volumes=[VolumeArgs(
+                    name=const.TRIGGER_STATE_VOLUME,
+                    empty_dir=EmptyDirVolumeSourceArgs())]))
+        self.update_gtfs = CronJob('update-gtfs-data',
+                                   spec=CronJobSpecArgs(
+                                       # time in UTC
+                                       schedule='12 1 * * *',
+                                       concurrency_policy='Forbid',
+                                       job_template=JobTemplateSpecArgs(
+                                           spec=JobSpecArgs(template=gtfs_update_pod))),
+                                   opts=fun.get_child_options(self, provider=provider))
+
+    def create_graph_follow(self, provider):
+        # roll the workers over to the graph published last once its replica arrived in the bucket of the region
+        account = ServiceAccount(fun.get_region_name('graph-follow', self.region),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        role = Role(fun.get_region_name('graph-follow', self.region),
+                    rules=[
+                        PolicyRuleArgs(
+                            api_groups=['apps'],
+                            resources=['deployments'],
+                            verbs=['get', 'list', 'watch', 'patch']),
+                        PolicyRuleArgs(
+                            api_groups=['apps'],
+                            resources=['replicasets'],
+                            verbs=['get', 'list', 'watch'])],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        RoleBinding(fun.get_region_name('graph-follow', self.region),
+                    role_ref=RoleRefArgs(
+                        api_group='rbac.authorization.k8s.io',
+                        kind='Role',
+                        name=role.metadata.name),
+                    subjects=[SubjectArgs(
+                        kind='ServiceAccount',
+                        name=account.metadata.name,
+                        namespace=account.metadata.namespace)],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        trigger_state_mount = VolumeMountArgs(mount_path=const.TRIGGER_STATE_PATH, name=const.TRIGGER_STATE_VOLUME)
+        follow_pod = PodTemplateSpecArgs(
+            spec=PodSpecArgs(
+                restart_policy='Never',
+                service_account_name=account.metadata.name,
+                init_containers=[ContainerArgs(
+                    name='otp-graph-follow',
+                    image=const.GCE_SDK_IMAGE,
+                    env=[
+                        EnvVarArgs(
+                            name='GRAPHS_URI',
+                            value=storage.get_regional_url(storage.otp_graphs_bucket_url, self.region)),
+                        EnvVarArgs(
+                            name='STATE_DIR',
+                            value=const.TRIGGER_STATE_PATH)],
+                    volume_mounts=[trigger_state_mount],
+                    command=['/bin/sh', '-c'],
+                    args=[fun.read_config_file('follow-graph.sh', const.SCRIPTS_FOLDER)])],
+                containers=[ContainerArgs(
+                    name='otp-graph-rollout',
+                    image=const.KUBECTL_IMAGE,
+                    env=[
+                        EnvVarArgs(
+                            name='DEPLOYMENT',
+                            value=self.worker.metadata.name),
+                        EnvVarArgs(
+                            name='ANNOTATION',
+                            value=const.OTP_GRAPH_VERSION_ANNOTATION),
+                        EnvVarArgs(
+                            name='PINNED_VERSION',
+                            value=const.OTP_GRAPH_VERSION),
+                        EnvVarArgs(
+                            name='ROLLOUT_TIMEOUT',
+                            value=const.OTP_ROLLOUT_TIMEOUT),
+                        EnvVarArgs(
+                            name='STATE_DIR',
+                            value=const.TRIGGER_STATE_PATH)],
+                    volume_mounts=[trigger_state_mount],
+                    command=['/bin/sh', '-c'],
+                    args=[fun.read_config_file('rollout-graph.sh', const.SCRIPTS_FOLDER)])],
+                volumes=[VolumeArgs(
+                    name=const.TRIGGER_STATE_VOLUME,
+                    empty_dir=EmptyDirVolumeSourceArgs())]))
+        self.follow_graph = CronJob(fun.get_region_name('follow-otp-graph', self.region),
+                                    spec=CronJobSpecArgs(
+                                        schedule=const.OTP_GRAPH_FOLLOW_SCHEDULE,
+                                        concurrency_policy='Forbid',
+                                        job_template=JobTemplateSpecArgs(
+                                            spec=JobSpecArgs(
+                                                template=follow_pod,
+                                                active_deadline_seconds=3600,
+                                                ttl_seconds_after_finished=180))),
+                                    opts=fun.get_child_options(self, provider=provider))
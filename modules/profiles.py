@@ -0,0 +1,97 @@
+import copy
+import hashlib
+import json
+import re
+
+import pulumi as plm
+
+import modules.constants as const
+import modules.functions as fun
+
+# overrides merged over router-config.json, values missing in a profile keep the base value.
+# fast trades itinerary quality for latency in the peaks, thorough searches wider for off peak quality
+ROUTING_PROFILES = {
+    'default': {},
+    'fast': {
+        'routingDefaults': {
+            'maxTransfers': 4,
+            'itineraryFiltering': 1.5,
+            'searchWindow': 'PT40M',
+            'numItineraries': 3,
+        }
+    },
+    'thorough': {
+        'routingDefaults': {
+            'maxTransfers': 10,
+            'itineraryFiltering': 0.8,
+            'searchWindow': 'PT3H',
+            'numItineraries': 7,
+        }
+    },
+}
+
+# allowed type and range of routing defaults a profile may set
+ROUTING_LIMITS = {
+    'maxTransfers': (int, 0, 12),
+    'itineraryFiltering': (float, 0, 5),
+    'numItineraries': (int, 1, 20),
+    'walkReluctance': (float, 1, 20),
+    'waitReluctance': (float, 0, 10),
+    'waitAtBeginningFactor': (float, 0, 1),
+    'transferSlack': (int, 0, 600),
+    'walkBoardCost': (int, 0, 3600),
+}
+# iso 8601 duration of at most a day
+SEARCH_WINDOW = re.compile(r'^PT(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?$')
+
+
+def merge(base, overrides):
+    # nested dicts are merged, any other value replaces the base value
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def get_errors(name, overrides, base):
+    # misspelled keys and values outside the limits of a profile
+    errors = []
+    for section, values in overrides.items():
+        if section not in base:
+            errors.append(f'{name}: unknown section {section}')
+            continue
+        if section != 'routingDefaults':
+            continue
+        for key, value in values.items():
+            if key == 'searchWindow':
+                window = SEARCH_WINDOW.match(str(value))
+                if not window or not any(window.groups()) or \
+                        int(window['hours'] or 0) * 60 + int(window['minutes'] or 0) > 24 * 60:
+                    errors.append(f'{name}: searchWindow {value} is no duration of at most PT24H')
+            elif key in ROUTING_LIMITS:
+                value_type, low, high = ROUTING_LIMITS[key]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) or \
+                        (value_type is int and not isinstance(value, int)) or not low <= value <= high:
+                    errors.append(f'{name}: {key} {value} must be {value_type.__name__} '
+                                  f'from {low} to {high}')
+            elif key not in base[section]:
+                errors.append(f'{name}: unknown routing default {key}')
+    return errors
+
+
+def get_router_config(profile):
+    # router-config.json with the overrides of a profile, fails the deployment on an invalid profile
+    base = json.loads(fun.read_config_file('router-config.json', const.OTP_CONFIG_FOLDER))
+    if profile not in ROUTING_PROFILES:
+        raise plm.RunError(f"unknown routing profile {profile}, choose one of {', '.join(ROUTING_PROFILES)}")
+    errors = [error for name, overrides in ROUTING_PROFILES.items() for error in get_errors(name, overrides, base)]
+    if errors:
+        raise plm.RunError('invalid routing profiles: ' + '; '.join(errors))
+    return json.dumps(merge(base, ROUTING_PROFILES[profile]), indent=2)
+
+
+def get_config_hash(router_config):
+    return hashlib.sha256(router_config.encode()).hexdigest()[:12]
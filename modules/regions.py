@@ -0,0 +1,178 @@
+import pulumi as plm
+import pulumi_gcp as gcp
+from pulumi_gcp.config import project
+from pulumi_kubernetes import Provider
+from pulumi_kubernetes.apiextensions import CustomResource
+from pulumi_kubernetes.meta.v1 import ObjectMetaArgs
+
+import modules.constants as const
+import modules.functions as fun
+
+# clusters of the regions in const.REGIONS and the multi cluster ingress routing users to the closest healthy one.
+# the resources of GCE_REGION keep their names, the ones of the replica regions carry the region
+
+
+def create_cluster(region, zone, preemptible_pool):
+    # gke cluster of a region with the node pools in const.NODE_POOLS, returns the cluster and its provider.
+    # the replica clusters are in the zone of their region, the one of GCE_REGION in the zone of the gcp config
+    location = const.REPLICA_REGIONS.get(region)
+    cluster = gcp.container.Cluster(fun.get_region_name('planner-cluster', region),
+                                    location=location,
+                                    min_master_version=const.K8S_VERSION,
+                                    initial_node_count=const.NODE_COUNT,
+                                    remove_default_node_pool=True,
+                                    # scrapes the PodMonitoring resources of the services
+                                    monitoring_config=gcp.container.ClusterMonitoringConfigArgs(
+                                        enable_components=['SYSTEM_COMPONENTS'],
+                                        managed_prometheus=gcp.container.
+                                        ClusterMonitoringConfigManagedPrometheusArgs(enabled=True)),
+                                    # fleet members of a multi cluster ingress need workload identity
+                                    workload_identity_config=gcp.container.ClusterWorkloadIdentityConfigArgs(
+                                        workload_pool=f'{project}.svc.id.goog')
+                                    if const.MULTI_CLUSTER_INGRESS else None,
+                                    addons_config=gcp.container.ClusterAddonsConfigArgs(
+                                        http_load_balancing=gcp.container.ClusterAddonsConfigHttpLoadBalancingArgs(
+                                            disabled=False
+                                        )
+                                    ))
+
+    for pool_name, pool in const.NODE_POOLS.items():
+        autoscaling = None
+        if 'max_nodes' in pool:
+            autoscaling = gcp.container.NodePoolAutoscalingArgs(
+                min_node_count=pool['min_nodes'],
+                max_node_count=pool['max_nodes'])
+        taints = None
+        if 'taint' in pool:
+            taints = [gcp.container.NodePoolNodeConfigTaintArgs(
+                key=const.NODE_POOL_TAINT,
+                value=pool['taint'],
+                effect='NO_SCHEDULE')]
+        preemptible = preemptible_pool and not pool.get('spot')
+        pool_capacity = 'spot' if pool.get('spot') else 'preemptible' if preemptible else 'on-demand'
+        # a fixed number of on-demand nodes next to the preemptible ones, the serving workloads spread over both
+        pool_variants = [(f'{pool_name}-node-pool', pool_capacity, pool.get('node_count'), autoscaling)]
+        if pool.get('on_demand_nodes'):
+            pool_variants.append((f'{pool_name}-on-demand-node-pool', 'on-demand', pool['on_demand_nodes'], None))
+        for resource_name, capacity_type, node_count, pool_autoscaling in pool_variants:
+            gcp.container.NodePool(
+                fun.get_region_name(resource_name, region),
+                cluster=cluster.name,
+                location=location,
+                node_count=node_count,
+                initial_node_count=pool.get('min_nodes') if pool_autoscaling else None,
+                autoscaling=pool_autoscaling,
+                node_config=gcp.container.NodePoolNodeConfigArgs(
+                    preemptible=capacity_type == 'preemptible',
+                    spot=capacity_type == 'spot' or None,
+                    machine_type=pool['machine_type'],
+                    image_type=const.NODE_IMAGE_TYPE,
+                    gcfs_config=gcp.container.NodePoolNodeConfigGcfsConfigArgs(
+                        enabled=const.IMAGE_STREAMING),
+                    labels={const.NODE_POOL_LABEL: pool_name, const.NODE_CAPACITY_LABEL: capacity_type},
+                    taints=taints,
+                    ephemeral_storage_config=gcp.container.
+                    NodePoolNodeConfigEphemeralStorageConfigArgs(
+                        local_ssd_count=pool['local_ssd_count'])
+                    if pool.get('local_ssd_count') else None,
+                    # the pods keep using the service account of the nodes with workload identity
+                    workload_metadata_config=gcp.container.NodePoolNodeConfigWorkloadMetadataConfigArgs(
+                        mode='GCE_METADATA')
+                    if const.MULTI_CLUSTER_INGRESS else None,
+                    oauth_scopes=[
+                        'https://www.googleapis.com/auth/compute',
+                        'https://www.googleapis.com/auth/devstorage.read_write',
+                        'https://www.googleapis.com/auth/logging.write',
+                        'https://www.googleapis.com/auth/monitoring'
+                    ],
+                ), )
+
+    # generate a kubeconfig for gke
+    cluster_info = plm.Output.all(cluster.name, cluster.endpoint, cluster.master_auth)
+    cluster_config = cluster_info.apply(
+        lambda info: """apiVersion: v1
+clusters:
+- cluster:
+    certificate-authority-data: {0}
+    server: https://{1}
+  name: {2}
+contexts:
+- context:
+    cluster: {2}
+    user: {2}
+  name: {2}
+current-context: {2}
+kind: Config
+preferences: {{}}
+users:
+- name: {2}
+  user:
+    auth-provider:
+      config:
+        cmd-args: config config-helper --format=json
+        cmd-path: gcloud
+        expiry-key: '{{.credential.token_expiry}}'
+        token-key: '{{.credential.access_token}}'
+      name: gcp
+""".format(info[2]['cluster_ca_certificate'], info[1], '{0}_{1}_{2}'.format(project, zone, info[0]))
+    )
+
+    # build gke cluster provider
+    return cluster, Provider(fun.get_region_name('gke_k8s_provider', region), kubeconfig=cluster_config)
+
+
+def create_fleet(clusters):
+    # fleet memberships of the clusters, the cluster of GCE_REGION holds the multi cluster ingress resources
+    memberships = {region: gcp.gkehub.Membership(fun.get_region_name('planner-membership', region),
+                                                 membership_id=fun.get_region_name('planner', region),
+                                                 endpoint=gcp.gkehub.MembershipEndpointArgs(
+                                                     gke_cluster=gcp.gkehub.MembershipEndpointGkeClusterArgs(
+                                                         resource_link=plm.Output.concat(
+                                                             '//container.googleapis.com/', cluster.id))))
+                   for region, cluster in clusters.items()}
+    return gcp.gkehub.Feature('multi-cluster-ingress',
+                              name='multiclusteringress',
+                              location='global',
+                              spec=gcp.gkehub.FeatureSpecArgs(
+                                  multiclusteringress=gcp.gkehub.FeatureSpecMulticlusteringressArgs(
+                                      config_membership=memberships[const.GCE_REGION].id)))
+
+
+def create_multi_cluster_ingress(routes, default_route, global_ip_name, provider, feature):
+    # load balancer routing every user to the closest region with healthy backends. routes are
+    # (path, backend, service, backend config, port), the multi cluster services select the pods of the
+    # services in every member cluster and use the backend configs of the config cluster
+    certificate = gcp.compute.ManagedSslCertificate('planner-managed-ssl-cert',
+                                                    managed=gcp.compute.ManagedSslCertificateManagedArgs(
+                                                        domains=[const.PLANNER_DOMAIN]))
+
+    services = {}
+    for _, backend, service, backend_config, port in [default_route] + routes:
+        if backend not in services:
+            services[backend] = CustomResource(f'{backend}-multi-cluster-service',
+                                               api_version='networking.gke.io/v1',
+                                               kind='MultiClusterService',
+                                               metadata=ObjectMetaArgs(
+                                                   name=backend,
+                                                   annotations=fun.get_backend_config_annotation(backend_config)),
+                                               spec={'template': {'spec': {
+                                                   'selector': service.spec.selector,
+                                                   'ports': [{'name': 'http', 'protocol': 'TCP', 'port': port,
+                                                              'targetPort': port}]}}},
+                                               opts=plm.ResourceOptions(provider=provider, depends_on=[feature]))
+
+    return CustomResource('planner-multi-cluster-ingress',
+                          api_version='networking.gke.io/v1',
+                          kind='MultiClusterIngress',
+                          metadata=ObjectMetaArgs(
+                              name='planner',
+                              annotations={
+                                  'networking.gke.io/static-ip': gcp.compute.get_global_address_output(
+                                      name=global_ip_name).address,
+                                  'networking.gke.io/pre-shared-certs': certificate.name}),
+                          spec={'template': {'spec': {
+                              'backend': {'serviceName': default_route[1], 'servicePort': default_route[4]},
+                              'rules': [{'http': {'paths': [
+                                  {'path': path, 'backend': {'serviceName': backend, 'servicePort': port}}
+                                  for path, backend, _, _, port in routes]}}]}}},
+                          opts=plm.ResourceOptions(provider=provider, depends_on=list(services.values())))
@@ -0,0 +1,114 @@
+import math
+
+import pulumi as plm
+from pulumi_kubernetes.core.v1 import ResourceRequirementsArgs
+
+import modules.constants as const
+
+# memory reserved by gke as (size of the range in GiB, share of it), the rest is reserved at the last share
+GKE_MEMORY_RESERVATION = [(4, 0.25), (4, 0.2), (8, 0.1), (112, 0.06), (math.inf, 0.02)]
+GKE_EVICTION_THRESHOLD_GB = 0.1
+# cpu reserved by gke as (number of cores in the range, share of them)
+GKE_CPU_RESERVATION = [(1, 0.06), (1, 0.01), (2, 0.005), (math.inf, 0.0025)]
+
+
+def get_reserved(amount, reservation):
+    reserved = 0
+    for size, share in reservation:
+        reserved += min(amount, size) * share
+        amount -= min(amount, size)
+    return reserved
+
+
+def get_allocatable(machine_type):
+    # cpu and memory of a node left for the workloads
+    machine = const.MACHINE_TYPES[machine_type]
+    cpu = machine['cpu'] - get_reserved(machine['cpu'], GKE_CPU_RESERVATION) - const.NODE_SYSTEM_RESERVE['cpu']
+    memory_gb = (machine['memory_gb'] - get_reserved(machine['memory_gb'], GKE_MEMORY_RESERVATION)
+                 - GKE_EVICTION_THRESHOLD_GB - const.NODE_SYSTEM_RESERVE['memory_gb'])
+    return {'cpu': cpu, 'memory_gb': memory_gb}
+
+
+def get_pool_machine(workload):
+    return const.NODE_POOLS[const.WORKLOAD_RESOURCES[workload]['pool']]['machine_type']
+
+
+def get_workload_size(workload):
+    # cpu request, cpu limit and memory of one replica of a workload on a node of its pool
+    share = const.WORKLOAD_RESOURCES[workload]
+    machine_type = get_pool_machine(workload)
+    allocatable = get_allocatable(machine_type)
+    cpu = math.floor(allocatable['cpu'] * share['cpu'] * 1000) / 1000
+    return {'cpu': cpu,
+            'cpu_limit': min(cpu * const.CPU_LIMIT_FACTOR, const.MACHINE_TYPES[machine_type]['cpu']),
+            'memory_mb': math.floor(allocatable['memory_gb'] * share['memory'] * 1024)}
+
+
+def get_resources(workload):
+    # memory requests equal limits, so the scheduler never places more than the node holds
+    size = get_workload_size(workload)
+    return ResourceRequirementsArgs(
+        requests={'cpu': f"{round(size['cpu'] * 1000)}m", 'memory': f"{size['memory_mb']}Mi"},
+        limits={'cpu': f"{round(size['cpu_limit'] * 1000)}m", 'memory': f"{size['memory_mb']}Mi"})
+
+
+def get_java_options(workload):
+    # heap, gc and processor count of a jvm matching the container resources
+    share = const.WORKLOAD_RESOURCES[workload]
+    size = get_workload_size(workload)
+    heap_mb = math.floor(size['memory_mb'] * share['heap_ratio'])
+    return ' '.join([f'-Xmx{heap_mb}m',
+                     f'-Xms{heap_mb}m',
+                     f"-XX:+Use{share['gc']}GC",
+                     f"-XX:ActiveProcessorCount={max(1, math.ceil(size['cpu_limit']))}"])
+
+
+def get_max_nodes(pool):
+    return pool.get('max_nodes', pool.get('node_count')) + pool.get('on_demand_nodes', 0)
+
+
+def get_max_replicas(workload):
+    return const.AUTOSCALING.get(workload, {}).get('max', const.WORKLOAD_RESOURCES[workload].get('replicas', 1))
+
+
+def check_node_fit():
+    # fail the preview if the workloads running at the same time don't fit on the nodes of their pools
+    errors = []
+    for pool_name, pool in const.NODE_POOLS.items():
+        workloads = {workload: share for workload, share in const.WORKLOAD_RESOURCES.items()
+                     if share['pool'] == pool_name}
+        node_count = get_max_nodes(pool)
+        node_memory_gb = get_allocatable(pool['machine_type'])['memory_gb']
+        for workload, share in workloads.items():
+            memory_gb = node_memory_gb * share['memory']
+            if memory_gb < share['min_memory_gb']:
+                errors.append(f"{workload} gets {memory_gb:.1f} GiB on {pool['machine_type']}, "
+                              f"needs at least {share['min_memory_gb']} GiB")
+            if share.get('spread') and get_max_replicas(workload) > node_count:
+                errors.append(f"{get_max_replicas(workload)} replicas of {workload} can't be spread over "
+                              f"{node_count} nodes of pool {pool_name}")
+
+        # exclusive workloads count with their largest member only
+        demand = {'cpu': 0, 'memory': 0}
+        exclusive = {}
+        for workload, share in workloads.items():
+            replicas = node_count if share.get('daemon') else get_max_replicas(workload)
+            if 'exclusive' in share:
+                group = exclusive.setdefault(share['exclusive'], {'cpu': 0, 'memory': 0})
+                for resource in demand:
+                    group[resource] = max(group[resource], share[resource] * replicas)
+            else:
+                for resource in demand:
+                    demand[resource] += share[resource] * replicas
+        for group in exclusive.values():
+            for resource in demand:
+                demand[resource] += group[resource]
+        for resource, value in demand.items():
+            if value > node_count:
+                errors.append(f'workloads request {value:.2f} nodes of {resource} in pool {pool_name}, '
+                              f'it has {node_count}')
+        plm.log.info(f"node pool {pool_name} {node_count} x {pool['machine_type']}: {demand['cpu']:.2f} nodes "
+                     f"of cpu and {demand['memory']:.2f} nodes of memory requested")
+
+    if errors:
+        raise plm.RunError('planned pods do not fit on the node pools: ' + '; '.join(errors))
@@ -1,7 +1,9 @@
 import pulumi as plm
 import pulumi_gcp as gcp
+import modules.blobs as blobs
 import modules.constants as const
 import modules.functions as fun
+import modules.profiles as profiles
 
 # storage for otp files
 otp_file_bucket = gcp.storage.Bucket('otp-storage',
@@ -9,56 +11,151 @@ otp_file_bucket = gcp.storage.Bucket('otp-storage',
                                      uniform_bucket_level_access=True
                                      )
 
-# upload graph for testing otp
-otp_graph = gcp.storage.BucketObject('otp-graph',
-                                     bucket=otp_file_bucket,
-                                     content_type='application/octet-stream',
-                                     source=plm.FileAsset(f'files/blobs/{const.OTP_GRAPH_FILE}'),
-                                     opts=plm.ResourceOptions(depends_on=[otp_file_bucket],
-                                                              ignore_changes=['source', 'detectMd5hash']))
-
-# storage for connect gtfs data
-gtfs_data = gcp.storage.BucketObject('gtfs-data',
-                                     bucket=otp_file_bucket,
-                                     content_type='application/zip',
-                                     name='connect-gtfs.zip',
-                                     source=plm.FileAsset(f'files/blobs/{const.CONNECT_GTFS_FILE}'),
-                                     opts=plm.ResourceOptions(ignore_changes=['source', 'detectMd5hash',
-                                                                              'contentType']))
+# the seed graph and the gtfs feed were bucket objects before the blob provider. the stacks keep them with
+# retain_on_delete until they ran once with it, so dropping them later leaves the objects the pipelines own.
+# see Blobs in the README
+legacy_objects = [
+    gcp.storage.BucketObject('otp-graph',
+                             bucket=otp_file_bucket,
+                             content_type='application/octet-stream',
+                             source=plm.FileAsset(f'files/blobs/{const.OTP_GRAPH_FILE}'),
+                             opts=plm.ResourceOptions(depends_on=[otp_file_bucket], retain_on_delete=True,
+                                                      ignore_changes=['source', 'detectMd5hash'])),
+    gcp.storage.BucketObject('gtfs-data',
+                             bucket=otp_file_bucket,
+                             content_type='application/zip',
+                             name='connect-gtfs.zip',
+                             source=plm.FileAsset(f'files/blobs/{const.CONNECT_GTFS_FILE}'),
+                             opts=plm.ResourceOptions(retain_on_delete=True,
+                                                      ignore_changes=['source', 'detectMd5hash', 'contentType']))]
+
+# upload graph for testing otp, the graph builds own it afterwards
+otp_graph = blobs.Blob('otp-graph',
+                       bucket=otp_file_bucket,
+                       source=f'files/blobs/{const.OTP_GRAPH_FILE}',
+                       content_addressed=False,
+                       opts=plm.ResourceOptions(depends_on=[otp_file_bucket]))
+
+# storage for connect gtfs data, the gtfs updater owns it afterwards
+gtfs_data = blobs.Blob('gtfs-data',
+                       bucket=otp_file_bucket,
+                       source=f'files/blobs/{const.CONNECT_GTFS_FILE}',
+                       name='connect-gtfs.zip',
+                       content_type='application/zip',
+                       content_addressed=False)
 
 # storage for osm pbf data
-osm_data = gcp.storage.BucketObject('osm_data',
-                                    bucket=otp_file_bucket,
-                                    content_type='application/octet-stream',
-                                    source=plm.FileAsset(f'files/blobs/{const.OSM_DATA_FILE}'),
-                                    opts=plm.ResourceOptions(ignore_changes=['source', 'detectMd5hash']))
+osm_data = blobs.Blob('osm_data',
+                      bucket=otp_file_bucket,
+                      source=f'files/blobs/{const.OSM_DATA_FILE}')
 
 # storage for photon elasticsearch data (compressed)
-photon_data = gcp.storage.BucketObject('photon_data',
-                                       bucket=otp_file_bucket,
-                                       content_type='application/octet-stream',
-                                       source=plm.FileAsset(f'files/blobs/{const.PHOTON_ES_FILE}'),
-                                       opts=plm.ResourceOptions(ignore_changes=['source', 'detectMd5hash']))
+photon_data = blobs.Blob('photon_data',
+                         bucket=otp_file_bucket,
+                         source=f'files/blobs/{const.PHOTON_ES_FILE}')
 
-# storage for photon elasticsearch data (compressed)
-tileserver_data = gcp.storage.BucketObject('tileserver-data',
-                                           bucket=otp_file_bucket,
-                                           content_type='application/octet-stream',
-                                           source=plm.FileAsset(f'files/blobs/{const.TILESERVER_DATA_FILE}'),
-                                           # opts=plm.ResourceOptions(ignore_changes=['source', 'detectMd5hash']))
-                                           )
+# storage for tileserver data (compressed)
+tileserver_data = blobs.Blob('tileserver-data',
+                             bucket=otp_file_bucket,
+                             source=f'files/blobs/{const.TILESERVER_DATA_FILE}')
+
+# prometheus jmx exporter agent of the jvm pods
+jmx_agent = blobs.Blob('jmx-agent',
+                       bucket=otp_file_bucket,
+                       source=f'files/blobs/{const.JMX_EXPORTER_FILE}',
+                       name='jmx_prometheus_javaagent.jar',
+                       content_type='application/java-archive')
 
 # build google cloud storage urls
 otp_graph_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", otp_graph.name)
-gtfs_data_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", gtfs_data.output_name)
+# published graph versions and their manifest
+otp_graphs_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.OTP_GRAPHS_FOLDER)
+# written by the street graph build stage
+otp_street_graph_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.OTP_STREET_GRAPH_FILE)
+gtfs_data_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", gtfs_data.name)
+# etag, last modified date and hash of the last uploaded gtfs feed, written by the gtfs updater
+gtfs_manifest_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.GTFS_MANIFEST_FILE)
 osm_data_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", osm_data.name)
+# osm and gtfs trimmed to the service area by the preprocessing in front of the graph builds, and its reports
+osm_trimmed_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.PREPROCESS_FOLDER, "/",
+                                           const.OSM_TRIMMED_FILE)
+gtfs_trimmed_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.PREPROCESS_FOLDER, "/",
+                                            const.GTFS_TRIMMED_FILE)
+preprocess_reports_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.PREPROCESS_REPORTS_FOLDER)
 photon_data_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", photon_data.name)
 tileserver_data_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", tileserver_data.name)
+jmx_agent_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", jmx_agent.name)
+# prebuilt digitransit-ui bundles, one folder per content hash
+digitransit_bundle_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.DIGITRANSIT_BUNDLES_FOLDER,
+                                                  "/", fun.get_digitransit_bundle_id())
+# saved benchmark results
+benchmarks_bucket_url = plm.Output.concat("gs://", otp_file_bucket.name, "/", const.BENCHMARKS_FOLDER)
+
+
+# replicas of the bucket in the replica regions, the storage transfer service copies the bucket to them.
+# objects deleted from the bucket are deleted from the replicas
+replica_buckets = {}
+if const.REPLICA_REGIONS:
+    transfer_member = gcp.storage.get_transfer_project_service_account_output().email.apply(
+        lambda email: f'serviceAccount:{email}')
+    # the transfer jobs of all regions share the read access to the bucket. it was bound per region before,
+    # the binding of the first region is taken over
+    source_access = [gcp.storage.BucketIAMMember(f'otp-storage-{role.split(".")[-1]}',
+                                                 bucket=otp_file_bucket.name,
+                                                 role=role,
+                                                 member=transfer_member,
+                                                 opts=plm.ResourceOptions(aliases=[plm.Alias(
+                                                     name=f'otp-storage-{next(iter(const.REPLICA_REGIONS))}-'
+                                                          f'{role.split(".")[-1]}')]))
+                     for role in ['roles/storage.objectViewer', 'roles/storage.legacyBucketReader']]
+for region in const.REPLICA_REGIONS:
+    replica_buckets[region] = gcp.storage.Bucket(f'otp-storage-{region}',
+                                                 location=region,
+                                                 uniform_bucket_level_access=True)
+    replica_access = source_access + [gcp.storage.BucketIAMMember(f'otp-storage-{region}-legacyBucketWriter',
+                                                                  bucket=replica_buckets[region].name,
+                                                                  role='roles/storage.legacyBucketWriter',
+                                                                  member=transfer_member)]
+    gcp.storage.TransferJob(f'otp-storage-replication-{region}',
+                            description=f'replicate the planner bucket to {region}',
+                            transfer_spec=gcp.storage.TransferJobTransferSpecArgs(
+                                gcs_data_source=gcp.storage.TransferJobTransferSpecGcsDataSourceArgs(
+                                    bucket_name=otp_file_bucket.name),
+                                gcs_data_sink=gcp.storage.TransferJobTransferSpecGcsDataSinkArgs(
+                                    bucket_name=replica_buckets[region].name),
+                                transfer_options=gcp.storage.TransferJobTransferSpecTransferOptionsArgs(
+                                    delete_objects_unique_in_sink=True)),
+                            # the start date lies in the past, the first transfer runs right away
+                            schedule=gcp.storage.TransferJobScheduleArgs(
+                                schedule_start_date=gcp.storage.TransferJobScheduleScheduleStartDateArgs(
+                                    year=2021, month=10, day=1),
+                                repeat_interval=f'{const.BUCKET_REPLICATION_MINUTES * 60}s'),
+                            opts=plm.ResourceOptions(depends_on=replica_access))
+
+
+def get_regional_url(url, region):
+    # url of an object in the replica of the bucket in a region
+    if region == const.GCE_REGION:
+        return url
+    return plm.Output.all(url, otp_file_bucket.name, replica_buckets[region].name).apply(
+        lambda args: args[0].replace(f'gs://{args[1]}/', f'gs://{args[2]}/', 1))
+
+
+def get_build_config(region):
+    # build-config.json with dynamic values, the builds read the trimmed osm and gtfs.
+    # the workers of a region read their graph from the bucket of the region
+    return plm.Output.all(*[get_regional_url(url, region) for url in [otp_graph_bucket_url, gtfs_trimmed_bucket_url,
+                                                                      osm_trimmed_bucket_url,
+                                                                      otp_street_graph_bucket_url]]).apply(
+        lambda url: fun.read_config_file('build-config.json', const.OTP_CONFIG_FOLDER).
+            replace('PLACEHOLDER_GRAPH_URI', url[0]).
+            replace('PLACEHOLDER_GTFS_URI', url[1]).
+            replace('PLACEHOLDER_OSM_URI', url[2]).
+            replace('PLACEHOLDER_STREET_GRAPH_URI', url[3])
+    )
+
 
-# update build-config.json with dynamic values
-build_config = plm.Output.all(otp_graph_bucket_url, gtfs_data_bucket_url, osm_data_bucket_url).apply(
-    lambda url: fun.read_config_file('build-config.json', const.OTP_CONFIG_FOLDER).
-        replace('PLACEHOLDER_GRAPH_URI', url[0]).
-        replace('PLACEHOLDER_GTFS_URI', url[1]).
-        replace('PLACEHOLDER_OSM_URI', url[2])
-)
+# update router-config.json with the routing profile of the stack,
+# the realtime updater reads the feed from the in-cluster relay
+router_config = profiles.get_router_config(const.ROUTING_PROFILE). \
+    replace('PLACEHOLDER_GTFSRT_URL', const.GTFSRT_RELAY_URL)
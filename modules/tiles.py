@@ -0,0 +1,243 @@
+import pulumi as plm
+from pulumi import CustomTimeouts
+from pulumi_kubernetes.apiextensions import CustomResource
+from pulumi_kubernetes.apps.v1 import Deployment, DeploymentSpecArgs
+from pulumi_kubernetes.autoscaling.v2beta2 import HorizontalPodAutoscaler
+from pulumi_kubernetes.batch.v1 import Job, JobSpecArgs
+from pulumi_kubernetes.core.v1 import Service, PodTemplateSpecArgs, PodSpecArgs, ContainerArgs, ServiceSpecArgs, \
+    ServicePortArgs, ConfigMap, VolumeMountArgs, EnvVarArgs, ContainerPortArgs, VolumeArgs, ConfigMapVolumeSourceArgs, \
+    EmptyDirVolumeSourceArgs, ServiceAccount
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs, ObjectMetaArgs
+from pulumi_kubernetes.policy.v1 import PodDisruptionBudget
+from pulumi_kubernetes.rbac.v1 import Role, RoleBinding, PolicyRuleArgs, RoleRefArgs, SubjectArgs
+
+import modules.constants as const
+import modules.datadisk as datadisk
+import modules.functions as fun
+import modules.sizing as sizing
+import modules.storage as storage
+
+
+class Tiles(plm.ComponentResource):
+    # map tiles: tileserver-gl and the tile cache in front of it, pre-rendered for every tile data version
+    def __init__(self, name, provider, region=const.GCE_REGION, opts=None):
+        super().__init__('planner:tiers:Tiles', name, None, opts)
+        self.region = region
+
+        # load balancer health check and cdn
+        self.backend_config = CustomResource(fun.get_region_name('tile-cache-backend-config', self.region),
+                                             api_version='cloud.google.com/v1',
+                                             kind='BackendConfig',
+                                             spec=fun.get_backend_config_spec('tile-cache'),
+                                             opts=fun.get_child_options(self, provider=provider))
+
+        # svc for tileserver-gl, only the tile cache talks to it
+        tileserver_service = Service(fun.get_region_name('tileserver-svc', self.region),
+                                     spec=ServiceSpecArgs(
+                                         type='ClusterIP',
+                                         selector=const.TILESERVER_LABEL,
+                                         ports=[ServicePortArgs(
+                                             port=const.TILESERVER_PORT)],
+                                     ),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        # svc for the tile cache in front of tileserver-gl, cached by the cdn
+        self.cache_service = Service(fun.get_region_name('tile-cache-svc', self.region),
+                                     metadata=ObjectMetaArgs(
+                                         annotations=fun.get_backend_config_annotation(self.backend_config)),
+                                     spec=ServiceSpecArgs(
+                                         type='NodePort',
+                                         selector=const.TILE_CACHE_LABEL,
+                                         ports=[ServicePortArgs(
+                                             port=const.TILE_CACHE_PORT)],
+                                     ),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        # dataset volume of tileserver, from the bucket of the region
+        tileserver_data_url = storage.get_regional_url(storage.tileserver_data_bucket_url, region)
+        if const.DATA_VOLUME_MODE == 'disk':
+            tileserver_data_claim = datadisk.create_dataset_claim('tileserver-data',
+                                                                  tileserver_data_url,
+                                                                  const.TILESERVER_DATA_VERSION,
+                                                                  const.TILESERVER_DISK_GB, provider, self)
+            tileserver_volumes = [datadisk.get_dataset_volume(const.TILESERVER_CFG_VOLUME, tileserver_data_claim)]
+            tileserver_init_containers = []
+        else:
+            tileserver_volumes = [VolumeArgs(name=const.TILESERVER_CFG_VOLUME,
+                                             empty_dir=EmptyDirVolumeSourceArgs())] + fun.get_data_cache_volumes()
+            tileserver_init_containers = [fun.get_data_init_container(name='inittileserver',
+                                                                      mount_name=const.TILESERVER_CFG_VOLUME,
+                                                                      archive_url=tileserver_data_url)]
+
+        tileserver_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(
+                labels=const.TILESERVER_LABEL),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('tileserver', const.TILESERVER_LABEL),
+                termination_grace_period_seconds=const.SHUTDOWN_PRESETS['tileserver']['grace_seconds'],
+                containers=[ContainerArgs(
+                    name='tileserver',
+                    image=const.TILESERVER_IMAGE,
+                    ports=[ContainerPortArgs(container_port=const.TILESERVER_PORT)],
+                    volume_mounts=[
+                        VolumeMountArgs(
+                            mount_path='/data',
+                            name=const.TILESERVER_CFG_VOLUME,
+                            read_only=True),
+                    ],
+                    command=['/app/docker-entrypoint.sh'],
+                    args=['-p', str(const.TILESERVER_PORT)],
+                    resources=sizing.get_resources('tileserver'),
+                    **fun.get_probes('tileserver'),
+                    **fun.get_prestop_hook('tileserver')
+                )],
+                init_containers=tileserver_init_containers,
+                volumes=tileserver_volumes
+            ))
+        self.tileserver = Deployment(fun.get_region_name('tileserver', self.region),
+                                     spec=DeploymentSpecArgs(
+                                         selector=LabelSelectorArgs(match_labels=const.TILESERVER_LABEL),
+                                         template=tileserver_pod),
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        # tile cache, an nginx proxy keeping rendered tiles on the local ssd of its node
+        cache_config_map = ConfigMap(fun.get_region_name('tile-cache-config', self.region),
+                                     data={
+                                         'nginx.conf': tileserver_service.metadata.apply(
+                                             lambda metadata: fun.read_config_file('nginx.conf',
+                                                                                   const.TILE_CACHE_FOLDER)
+                                             .replace('PLACEHOLDER_CACHE_SIZE', f'{const.TILE_CACHE_SIZE_GB}g')
+                                             .replace('PLACEHOLDER_PORT', str(const.TILE_CACHE_PORT))
+                                             .replace('PLACEHOLDER_TILESERVER_URL',
+                                                      f"http://{metadata['name']}:{const.TILESERVER_PORT}"))
+                                     },
+                                     opts=fun.get_child_options(self, provider=provider))
+
+        cache_pod = PodTemplateSpecArgs(
+            metadata=ObjectMetaArgs(
+                labels=const.TILE_CACHE_LABEL,
+                # new tile data starts with an empty cache, warmed again by the prerender job
+                annotations={'planner/tile-data': storage.tileserver_data.content_hash}),
+            spec=PodSpecArgs(
+                **fun.get_pod_scheduling('tile-cache', const.TILE_CACHE_LABEL),
+                termination_grace_period_seconds=const.SHUTDOWN_PRESETS['tile-cache']['grace_seconds'],
+                containers=[ContainerArgs(
+                    name='tile-cache',
+                    image=const.NGINX_IMAGE,
+                    ports=[ContainerPortArgs(container_port=const.TILE_CACHE_PORT)],
+                    volume_mounts=[
+                        VolumeMountArgs(
+                            mount_path='/etc/nginx/nginx.conf',
+                            sub_path='nginx.conf',
+                            name='tile-cache-config',
+                            read_only=True),
+                        VolumeMountArgs(
+                            mount_path='/var/cache/tiles',
+                            name='tile-cache'),
+                    ],
+                    resources=sizing.get_resources('tile-cache'),
+                    **fun.get_probes('tile-cache'),
+                    **fun.get_prestop_hook('tile-cache')
+                )],
+                volumes=[
+                    VolumeArgs(name='tile-cache-config',
+                               config_map=ConfigMapVolumeSourceArgs(
+                                   name=cache_config_map.metadata.name)),
+                    # emptyDir lives on the local ssd, with headroom above the nginx max_size
+                    VolumeArgs(name='tile-cache',
+                               empty_dir=EmptyDirVolumeSourceArgs(
+                                   size_limit=f'{const.TILE_CACHE_SIZE_GB + 5}Gi'))]
+            ))
+        self.cache = Deployment(fun.get_region_name('tile-cache', self.region),
+                                spec=DeploymentSpecArgs(
+                                    replicas=sizing.get_max_replicas('tile-cache'),
+                                    selector=LabelSelectorArgs(match_labels=const.TILE_CACHE_LABEL),
+                                    template=cache_pod),
+                                opts=fun.get_child_options(self, provider=provider))
+
+        self.create_prerender_job(provider)
+
+        self.autoscaler = HorizontalPodAutoscaler(fun.get_region_name('tileserver-hpa', self.region),
+                                                  spec=fun.get_autoscaler_spec('tileserver',
+                                                                               self.tileserver.metadata.name),
+                                                  opts=fun.get_child_options(self, provider=provider))
+
+        self.disruption_budgets = {
+            'tileserver': PodDisruptionBudget(fun.get_region_name('tileserver-pdb', self.region),
+                                              spec=fun.get_disruption_budget_spec(const.TILESERVER_LABEL),
+                                              opts=fun.get_child_options(self, provider=provider)),
+            'tile-cache': PodDisruptionBudget(fun.get_region_name('tile-cache-pdb', self.region),
+                                              spec=fun.get_disruption_budget_spec(const.TILE_CACHE_LABEL),
+                                              opts=fun.get_child_options(self, provider=provider))}
+
+        self.register_outputs({})
+
+    def create_prerender_job(self, provider):
+        # render the low zoom pyramid of the service area into the cache of every tile cache pod, a new job for
+        # every tile data version. pods started later, after a preemption or a scale up, fill their cache on demand
+        account = ServiceAccount(fun.get_region_name('tile-prerender', self.region),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        role = Role(fun.get_region_name('tile-prerender', self.region),
+                    rules=[PolicyRuleArgs(
+                        api_groups=[''],
+                        resources=['pods'],
+                        verbs=['list'])],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        RoleBinding(fun.get_region_name('tile-prerender', self.region),
+                    role_ref=RoleRefArgs(
+                        api_group='rbac.authorization.k8s.io',
+                        kind='Role',
+                        name=role.metadata.name),
+                    subjects=[SubjectArgs(
+                        kind='ServiceAccount',
+                        name=account.metadata.name,
+                        namespace=account.metadata.namespace)],
+                    opts=fun.get_child_options(self, provider=provider))
+
+        # the init container lists the tile urls of the running cache pods
+        selector = ','.join(f'{key}={value}' for key, value in const.TILE_CACHE_LABEL.items())
+        list_caches = (f"kubectl get pods -l {selector} --field-selector=status.phase=Running -o jsonpath="
+                       f"'{{range .items[*]}}http://{{.status.podIP}}:{const.TILE_CACHE_PORT}{const.TILES_PATH}"
+                       f"{{\"\\n\"}}{{end}}' > /prerender/caches")
+        prerender_mount = VolumeMountArgs(mount_path='/prerender', name='prerender')
+        self.prerender_job = Job(fun.get_region_name(f'tile-prerender-{const.TILESERVER_DATA_VERSION}', self.region),
+                                 spec=JobSpecArgs(
+                                     backoff_limit=2,
+                                     template=PodTemplateSpecArgs(
+                                         spec=PodSpecArgs(
+                                             **fun.get_pod_scheduling('tile-prerender'),
+                                             restart_policy='Never',
+                                             service_account_name=account.metadata.name,
+                                             init_containers=[ContainerArgs(
+                                                 name='list-tile-caches',
+                                                 image=const.KUBECTL_IMAGE,
+                                                 volume_mounts=[prerender_mount],
+                                                 command=['/bin/sh', '-c'],
+                                                 args=[list_caches])],
+                                             containers=[ContainerArgs(
+                                                 name='tile-prerender',
+                                                 image=const.INITCONTAINER_IMG,
+                                                 env=[
+                                                     EnvVarArgs(name='CACHES_FILE',
+                                                                value='/prerender/caches'),
+                                                     EnvVarArgs(name='TILE_RANGES',
+                                                                value=fun.get_tile_ranges(
+                                                                    const.SERVICE_AREA_BBOX,
+                                                                    const.TILE_PRERENDER_MAX_ZOOM)),
+                                                     EnvVarArgs(name='PARALLELISM',
+                                                                value=str(const.TILE_PRERENDER_PARALLELISM)),
+                                                     # a new archive replaces the job like the cache pods
+                                                     EnvVarArgs(name='TILE_DATA',
+                                                                value=storage.tileserver_data.content_hash)],
+                                                 volume_mounts=[prerender_mount],
+                                                 resources=sizing.get_resources('tile-prerender'),
+                                                 command=['/bin/sh', '-c'],
+                                                 args=[fun.read_config_file('prerender-tiles.sh',
+                                                                            const.SCRIPTS_FOLDER)])],
+                                             volumes=[VolumeArgs(name='prerender',
+                                                                 empty_dir=EmptyDirVolumeSourceArgs())]))),
+                                 opts=fun.get_child_options(self, provider=provider,
+                                                            depends_on=[self.cache, self.tileserver],
+                                                            custom_timeouts=CustomTimeouts(create='60m')))
@@ -0,0 +1,204 @@
+import pulumi as plm
+from pulumi import CustomTimeouts
+from pulumi_kubernetes.apiextensions import CustomResource
+from pulumi_kubernetes.apps.v1 import Deployment, DeploymentSpecArgs
+from pulumi_kubernetes.autoscaling.v2beta2 import HorizontalPodAutoscaler
+from pulumi_kubernetes.batch.v1 import Job, JobSpecArgs
+from pulumi_kubernetes.core.v1 import Service, PodTemplateSpecArgs, PodSpecArgs, ContainerArgs, ServiceSpecArgs, \
+    ServicePortArgs, ConfigMap, VolumeMountArgs, EnvVarArgs, ContainerPortArgs, VolumeArgs, ConfigMapVolumeSourceArgs, \
+    EmptyDirVolumeSourceArgs
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs, ObjectMetaArgs
+from pulumi_kubernetes.policy.v1 import PodDisruptionBudget
+
+import modules.constants as const
+import modules.functions as fun
+import modules.sizing as sizing
+import modules.storage as storage
+
+
+class DigitransitUi(plm.ComponentResource):
+    # digitransit-ui frontend, served by the ui server or as a static bundle by nginx, see const.DIGITRANSIT_MODE
+    def __init__(self, name, provider, region=const.GCE_REGION, opts=None):
+        super().__init__('planner:tiers:DigitransitUi', name, None, opts)
+        self.region = region
+
+        # load balancer health checks and cdn for the static assets
+        self.backend_configs = {backend: CustomResource(fun.get_region_name(f'{backend}-backend-config', self.region),
+                                                        api_version='cloud.google.com/v1',
+                                                        kind='BackendConfig',
+                                                        spec=fun.get_backend_config_spec('digitransit', backend),
+                                                        opts=fun.get_child_options(self, provider=provider))
+                                for backend in ['digitransit', 'digitransit-static']}
+
+        # svc for digitransit-ui
+        self.service = Service(fun.get_region_name('digitransit-svc', self.region),
+                               metadata=ObjectMetaArgs(
+                                   annotations=fun.get_backend_config_annotation(self.backend_configs['digitransit'])),
+                               spec=ServiceSpecArgs(
+                                   type='NodePort',
+                                   selector=const.DIGITRANSIT_LABEL,
+                                   ports=[ServicePortArgs(port=const.DIGITRANSIT_PORT,
+                                                          name=const.DIGITANSIT_PORT_NAME)],
+                               ),
+                               opts=fun.get_child_options(self, provider=provider))
+
+        # svc for static assets of digitransit-ui, cached by the cdn
+        self.static_service = Service(fun.get_region_name('digitransit-static-svc', self.region),
+                                      metadata=ObjectMetaArgs(
+                                          annotations=fun.get_backend_config_annotation(
+                                              self.backend_configs['digitransit-static'])),
+                                      spec=ServiceSpecArgs(
+                                          type='NodePort',
+                                          selector=const.DIGITRANSIT_LABEL,
+                                          ports=[ServicePortArgs(port=const.DIGITRANSIT_PORT,
+                                                                 name=const.DIGITANSIT_PORT_NAME)],
+                                      ),
+                                      opts=fun.get_child_options(self, provider=provider))
+
+        if const.DIGITRANSIT_MODE == 'static':
+            containers, init_containers, volumes, dependencies = self.get_static_pod(provider)
+        else:
+            containers = [ContainerArgs(
+                name='digitransit',
+                image=const.DIGITRANSIT_IMAGE,
+                ports=[ContainerPortArgs(container_port=8080)],
+                env=[
+                    EnvVarArgs(
+                        name='OTP_URL',
+                        value=const.OTP_URL, ),
+                    EnvVarArgs(
+                        name='CONFIG',
+                        value=const.DIGITRANSIT_CONFIG),
+                    EnvVarArgs(
+                        name='MAP_URL',
+                        value=const.MAP_URL,
+                    ),
+                    EnvVarArgs(
+                        name='GEOCODING_BASE_URL',
+                        value=const.GEOCODING_URL,
+                    )
+                ],
+                command=['/usr/local/bin/yarn'],
+                args=['run', 'start'],
+                resources=sizing.get_resources('digitransit'),
+                **fun.get_probes('digitransit'),
+                **fun.get_prestop_hook('digitransit'))]
+            init_containers = []
+            volumes = []
+            dependencies = []
+
+        self.deployment = Deployment(fun.get_region_name('digitransit', self.region),
+                                     spec=DeploymentSpecArgs(
+                                         selector=LabelSelectorArgs(match_labels=const.DIGITRANSIT_LABEL),
+                                         template=PodTemplateSpecArgs(
+                                             metadata=ObjectMetaArgs(labels=const.DIGITRANSIT_LABEL),
+                                             spec=PodSpecArgs(
+                                                 **fun.get_pod_scheduling('digitransit', const.DIGITRANSIT_LABEL),
+                                                 termination_grace_period_seconds=const.SHUTDOWN_PRESETS[
+                                                     'digitransit']['grace_seconds'],
+                                                 containers=containers,
+                                                 init_containers=init_containers,
+                                                 volumes=volumes))),
+                                     opts=fun.get_child_options(self, provider=provider,
+                                                                depends_on=dependencies))
+
+        self.autoscaler = HorizontalPodAutoscaler(fun.get_region_name('digitransit-hpa', self.region),
+                                                  spec=fun.get_autoscaler_spec('digitransit',
+                                                                               self.deployment.metadata.name),
+                                                  opts=fun.get_child_options(self, provider=provider))
+
+        self.disruption_budget = PodDisruptionBudget(fun.get_region_name('digitransit-pdb', self.region),
+                                                     spec=fun.get_disruption_budget_spec(const.DIGITRANSIT_LABEL),
+                                                     opts=fun.get_child_options(self, provider=provider))
+
+        self.register_outputs({})
+
+    def get_static_pod(self, provider):
+        # containers, init containers, volumes and dependencies of a pod serving the static bundle.
+        # the replica regions serve the bundle built in GCE_REGION from the bucket of their region
+        dependencies = [self.create_bundle(provider)] if self.region == const.GCE_REGION else []
+
+        static_config_map = ConfigMap(fun.get_region_name('digitransit-static-config', self.region),
+                                      data={
+                                          'nginx.conf': fun.read_config_file(
+                                              'nginx.conf', const.DIGITRANSIT_STATIC_FOLDER).replace(
+                                              'PLACEHOLDER_PORT', str(const.DIGITRANSIT_PORT)).replace(
+                                              'PLACEHOLDER_HASHED_ASSETS', const.DIGITRANSIT_HASHED_ASSETS)
+                                      },
+                                      opts=fun.get_child_options(self, provider=provider))
+        containers = [ContainerArgs(
+            name='digitransit',
+            image=const.NGINX_IMAGE,
+            ports=[ContainerPortArgs(container_port=const.DIGITRANSIT_PORT)],
+            volume_mounts=[
+                VolumeMountArgs(
+                    mount_path='/etc/nginx/nginx.conf',
+                    sub_path='nginx.conf',
+                    name='digitransit-static-config',
+                    read_only=True),
+                VolumeMountArgs(
+                    mount_path=const.DIGITRANSIT_SITE_PATH,
+                    name='digitransit-site',
+                    read_only=True)],
+            resources=sizing.get_resources('digitransit-static'),
+            **fun.get_probes('digitransit'),
+            **fun.get_prestop_hook('digitransit'))]
+        # urls of this deployment, filled into the index page and the other unhashed files at serve time
+        init_containers = [ContainerArgs(
+            name='digitransit-fetch',
+            image=const.INITCONTAINER_IMG,
+            env=[EnvVarArgs(name='OTP_URL', value=const.OTP_URL),
+                 EnvVarArgs(name='MAP_URL', value=const.MAP_URL),
+                 EnvVarArgs(name='GEOCODING_URL', value=const.GEOCODING_URL),
+                 EnvVarArgs(name='BUNDLE_URI', value=storage.get_regional_url(
+                     storage.digitransit_bundle_bucket_url, self.region)),
+                 EnvVarArgs(name='SITE_DIR', value=const.DIGITRANSIT_SITE_PATH),
+                 EnvVarArgs(name='HASHED_ASSETS', value=const.DIGITRANSIT_HASHED_ASSETS)],
+            volume_mounts=[VolumeMountArgs(mount_path=const.DIGITRANSIT_SITE_PATH, name='digitransit-site')],
+            command=['/bin/sh', '-c'],
+            args=[fun.read_config_file('fetch-digitransit.sh', const.SCRIPTS_FOLDER)])]
+        volumes = [
+            VolumeArgs(name='digitransit-static-config',
+                       config_map=ConfigMapVolumeSourceArgs(name=static_config_map.metadata.name)),
+            VolumeArgs(name='digitransit-site', empty_dir=EmptyDirVolumeSourceArgs())]
+        return containers, init_containers, volumes, dependencies
+
+    def create_bundle(self, provider):
+        # build the bundle once per image, config and build script, a new bundle id creates a new job
+        bundle_id = fun.get_digitransit_bundle_id()
+        return Job(f'digitransit-bundle-{bundle_id}',
+                   spec=JobSpecArgs(
+                       backoff_limit=1,
+                       template=PodTemplateSpecArgs(
+                           spec=PodSpecArgs(
+                               restart_policy='Never',
+                               **fun.get_pod_scheduling('digitransit-build'),
+                               init_containers=[ContainerArgs(
+                                   name='digitransit-build',
+                                   image=const.DIGITRANSIT_IMAGE,
+                                   env=[EnvVarArgs(name='CONFIG', value=const.DIGITRANSIT_CONFIG),
+                                        EnvVarArgs(name='PORT', value=str(const.DIGITRANSIT_PORT)),
+                                        EnvVarArgs(name='BUNDLE_DIR', value='/bundle'),
+                                        EnvVarArgs(name='OTP_URL', value='PLACEHOLDER_OTP_URL'),
+                                        EnvVarArgs(name='MAP_URL', value='PLACEHOLDER_MAP_URL'),
+                                        EnvVarArgs(name='GEOCODING_BASE_URL',
+                                                   value='PLACEHOLDER_GEOCODING_URL')],
+                                   volume_mounts=[VolumeMountArgs(mount_path='/bundle', name='bundle')],
+                                   command=['/bin/sh', '-c'],
+                                   args=[fun.read_config_file('build-digitransit.sh', const.SCRIPTS_FOLDER)],
+                                   resources=sizing.get_resources('digitransit-build'))],
+                               containers=[ContainerArgs(
+                                   name='digitransit-publish',
+                                   image=const.INITCONTAINER_IMG,
+                                   env=[EnvVarArgs(name='BUNDLE_DIR', value='/bundle'),
+                                        EnvVarArgs(name='BUNDLE_URI',
+                                                   value=storage.digitransit_bundle_bucket_url),
+                                        EnvVarArgs(name='HASHED_ASSETS',
+                                                   value=const.DIGITRANSIT_HASHED_ASSETS)],
+                                   volume_mounts=[VolumeMountArgs(mount_path='/bundle', name='bundle')],
+                                   command=['/bin/sh', '-c'],
+                                   args=[fun.read_config_file('publish-digitransit.sh', const.SCRIPTS_FOLDER)])],
+                               volumes=[VolumeArgs(name='bundle',
+                                                   empty_dir=EmptyDirVolumeSourceArgs())]))),
+                   opts=fun.get_child_options(self, provider=provider,
+                                              custom_timeouts=CustomTimeouts(create='40m')))
@@ -0,0 +1,130 @@
+import pulumi as plm
+from pulumi_kubernetes.apps.v1 import DaemonSet, DaemonSetSpecArgs
+from pulumi_kubernetes.core.v1 import PodTemplateSpecArgs, PodSpecArgs, ContainerArgs, ConfigMap, VolumeMountArgs, \
+    EnvVarArgs, ContainerPortArgs, VolumeArgs, ConfigMapVolumeSourceArgs, ServiceAccount, EnvVarSourceArgs, \
+    ObjectFieldSelectorArgs, EmptyDirVolumeSourceArgs
+from pulumi_kubernetes.meta.v1 import LabelSelectorArgs, ObjectMetaArgs
+from pulumi_kubernetes.rbac.v1 import ClusterRole, ClusterRoleBinding, PolicyRuleArgs, RoleRefArgs, SubjectArgs
+
+import modules.constants as const
+import modules.functions as fun
+import modules.storage as storage
+
+
+class NodeWarmup(plm.ComponentResource):
+    # a daemonset per node pool pulling the images of the pool onto every new node and, optionally,
+    # downloading the dataset archives. it reports the time from the node being ready until its pods are ready
+    def __init__(self, name, provider, region=const.GCE_REGION, opts=None):
+        super().__init__('planner:tiers:NodeWarmup', name, None, opts)
+        self.region = region
+
+        account = ServiceAccount(fun.get_region_name('node-warmup', self.region),
+                                 opts=fun.get_child_options(self, provider=provider))
+
+        role = ClusterRole(fun.get_region_name('node-warmup', self.region),
+                           rules=[
+                               PolicyRuleArgs(
+                                   api_groups=[''],
+                                   resources=['nodes'],
+                                   verbs=['get']),
+                               PolicyRuleArgs(
+                                   api_groups=[''],
+                                   resources=['pods'],
+                                   verbs=['list'])],
+                           opts=fun.get_child_options(self, provider=provider))
+
+        ClusterRoleBinding(fun.get_region_name('node-warmup', self.region),
+                           role_ref=RoleRefArgs(
+                               api_group='rbac.authorization.k8s.io',
+                               kind='ClusterRole',
+                               name=role.metadata.name),
+                           subjects=[SubjectArgs(
+                               kind='ServiceAccount',
+                               name=account.metadata.name,
+                               namespace=account.metadata.namespace)],
+                           opts=fun.get_child_options(self, provider=provider))
+
+        config_map = ConfigMap(fun.get_region_name('node-warmup', self.region),
+                               data={
+                                   'node_warmup.py': fun.read_config_file('node_warmup.py', const.NODE_WARMUP_FOLDER)
+                               },
+                               opts=fun.get_child_options(self, provider=provider))
+
+        self.daemon_sets = {pool_name: self.create_daemon_set(pool_name, account, config_map, provider)
+                            for pool_name in const.WARMUP_IMAGES}
+
+        self.register_outputs({})
+
+    def create_daemon_set(self, pool_name, account, config_map, provider):
+        # every image is pulled by an init container doing nothing, then the agent waits for the pods of the node.
+        # the pulled images may have no shell, their containers run a static busybox copied into a shared volume
+        tools_mount = VolumeMountArgs(mount_path=const.NODE_WARMUP_TOOLS_PATH, name=const.NODE_WARMUP_TOOLS_VOLUME)
+        init_containers = [ContainerArgs(name='copy-tools',
+                                         image=const.BUSYBOX_IMAGE,
+                                         volume_mounts=[tools_mount],
+                                         command=['cp', '/bin/busybox', f'{const.NODE_WARMUP_TOOLS_PATH}/busybox'])]
+        init_containers += [ContainerArgs(name=f'pull-{index}',
+                                          image=image,
+                                          volume_mounts=[tools_mount],
+                                          command=[f'{const.NODE_WARMUP_TOOLS_PATH}/busybox', 'true'])
+                            for index, image in enumerate(const.WARMUP_IMAGES[pool_name])]
+        volumes = [VolumeArgs(name=const.NODE_WARMUP_FOLDER,
+                              config_map=ConfigMapVolumeSourceArgs(name=config_map.metadata.name)),
+                   VolumeArgs(name=const.NODE_WARMUP_TOOLS_VOLUME,
+                              empty_dir=EmptyDirVolumeSourceArgs())]
+        # the datasets are unpacked by the pods of the primary pool. their download takes longest and runs last,
+        # the images are pulled before
+        if const.WARMUP_DATASETS and pool_name == const.WORKLOAD_RESOURCES['photon']['pool']:
+            init_containers.append(ContainerArgs(
+                name='prefetch-datasets',
+                image=const.GCE_SDK_IMAGE,
+                env=[
+                    EnvVarArgs(
+                        name='ARCHIVE_URIS',
+                        value=plm.Output.concat(
+                            storage.get_regional_url(storage.photon_data_bucket_url, self.region), ' ',
+                            storage.get_regional_url(storage.tileserver_data_bucket_url, self.region))),
+                    EnvVarArgs(
+                        name='CACHE_DIR',
+                        value=const.DATA_CACHE_MOUNT_PATH)],
+                volume_mounts=[VolumeMountArgs(
+                    mount_path=const.DATA_CACHE_MOUNT_PATH,
+                    name=const.DATA_CACHE_VOLUME)],
+                command=['/bin/sh', '-c'],
+                args=[fun.read_config_file('prefetch-datasets.sh', const.SCRIPTS_FOLDER)]))
+            volumes += fun.get_data_cache_volumes()
+
+        labels = dict(const.NODE_WARMUP_LABEL, pool=pool_name)
+        return DaemonSet(fun.get_region_name(f'node-warmup-{pool_name}', self.region),
+                         spec=DaemonSetSpecArgs(
+                             selector=LabelSelectorArgs(match_labels=labels),
+                             template=PodTemplateSpecArgs(
+                                 metadata=ObjectMetaArgs(labels=labels),
+                                 spec=PodSpecArgs(
+                                     **fun.get_pool_scheduling(pool_name),
+                                     service_account_name=account.metadata.name,
+                                     init_containers=init_containers,
+                                     containers=[ContainerArgs(
+                                         name='node-warmup',
+                                         image=const.PYTHON_IMAGE,
+                                         ports=[ContainerPortArgs(
+                                             container_port=const.NODE_WARMUP_PORT,
+                                             name='metrics')],
+                                         env=[
+                                             EnvVarArgs(
+                                                 name='NODE_NAME',
+                                                 value_from=EnvVarSourceArgs(
+                                                     field_ref=ObjectFieldSelectorArgs(field_path='spec.nodeName'))),
+                                             EnvVarArgs(
+                                                 name='POOL',
+                                                 value=pool_name),
+                                             EnvVarArgs(
+                                                 name='PORT',
+                                                 value=str(const.NODE_WARMUP_PORT))],
+                                         volume_mounts=[VolumeMountArgs(
+                                             mount_path='/app',
+                                             name=const.NODE_WARMUP_FOLDER,
+                                             read_only=True)],
+                                         command=['python', '/app/node_warmup.py'])],
+                                     volumes=volumes))),
+                         opts=fun.get_child_options(self, provider=provider))
@@ -0,0 +1,53 @@
+# the modules read the stack config on import, the config and the pulumi runtime mocks are set up here,
+# before a test module imports them. the tests run from the root of the repo, the modules read files/ from there
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import pulumi
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+os.chdir(REPO)
+
+from tests.mocks import COPY_IGNORED, MOCK_CONFIG, Mocks  # noqa: E402
+
+pulumi.runtime.set_all_config(MOCK_CONFIG)
+pulumi.runtime.set_mocks(Mocks(), project='project', stack='test', preview=True)
+
+
+def run_in_process(tmp_path, config, script):
+    # runs a script evaluating the program in a new process on a copy of the repo, with a stack config on top of
+    # MOCK_CONFIG, returns the json the script printed last
+    path = os.path.join(tempfile.mkdtemp(dir=tmp_path), 'planner')
+    shutil.copytree(REPO, path, ignore=COPY_IGNORED)
+    stack_config = dict(MOCK_CONFIG, **{f'project:{key}': value for key, value in config.items()})
+    process = subprocess.run([sys.executable, '-c', script, path, json.dumps(stack_config)],
+                             cwd=REPO, capture_output=True, text=True)
+    assert process.returncode == 0, process.stderr
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+@pytest.fixture
+def run_program(tmp_path):
+    # the whole program under mocks, returns the (type, name) of every registered resource
+    def run(**config):
+        script = ('import json, sys; from tests.mocks import evaluate_program; '
+                  'print(json.dumps(evaluate_program(sys.argv[1], json.loads(sys.argv[2]))))')
+        return [(typ, name) for typ, name, _ in run_in_process(tmp_path, config, script)]
+    return run
+
+
+@pytest.fixture
+def program_inputs(tmp_path):
+    # the whole program under mocks, returns the inputs of the resources by name
+    def run(**config):
+        script = ('import json, sys; from tests.mocks import evaluate_program; inputs = {}; '
+                  'evaluate_program(sys.argv[1], json.loads(sys.argv[2]), inputs); '
+                  'print(json.dumps(inputs, default=str))')
+        return run_in_process(tmp_path, config, script)
+    return run
@@ -0,0 +1,78 @@
+# pulumi runtime mocks of the program, without gcp access. the tests and the program evaluation of the benchmark
+# run the program with them
+import asyncio
+import os
+import runpy
+import shutil
+import sys
+
+import pulumi
+from pulumi.runtime.stack import wait_for_rpcs
+
+# the local blobs the program reads, placeholders stand in for them
+BLOB_FILES = ['OTP_GRAPH_FILE', 'CONNECT_GTFS_FILE', 'OSM_DATA_FILE', 'PHOTON_ES_FILE', 'TILESERVER_DATA_FILE',
+              'JMX_EXPORTER_FILE']
+# copies of the repo the program runs on leave out the blobs and generated files
+COPY_IGNORED = shutil.ignore_patterns('.git', 'blobs', 'results', '__pycache__', '*.pyc')
+# stack config of the mocked program, the defaults of the stack apply to everything else
+MOCK_CONFIG = {'gcp:project': 'planner-benchmark',
+               'gcp:zone': 'europe-west3-b',
+               'project:connect_gtfs_url': 'https://example.org/gtfs.zip'}
+
+
+def get_mock_outputs(typ, name, inputs):
+    # outputs the program reads from resources the mocks do not create: node ports, cluster ips and names
+    outputs = dict(inputs)
+    if typ.startswith('kubernetes:'):
+        outputs['metadata'] = dict(outputs.get('metadata') or {})
+        outputs['metadata'].setdefault('name', name)
+        outputs['metadata'].setdefault('namespace', 'default')
+    if typ == 'kubernetes:core/v1:Service':
+        outputs['spec'] = dict(outputs.get('spec') or {})
+        outputs['spec']['clusterIP'] = '10.0.0.1'
+        outputs['spec']['ports'] = [dict(port, nodePort=30000 + index)
+                                    for index, port in enumerate(outputs['spec'].get('ports') or [])]
+    if typ == 'gcp:container/cluster:Cluster':
+        outputs.update(endpoint='127.0.0.1', masterAuth={'clusterCaCertificate': ''})
+    outputs.setdefault('name', name)
+    outputs.setdefault('selfLink', f'https://www.googleapis.com/compute/v1/{name}')
+    return outputs
+
+
+class Mocks(pulumi.runtime.Mocks):
+    # a given resources list receives the (type, name, custom) of every resource,
+    # a given inputs dict the inputs of the resources by name
+    def __init__(self, resources=None, inputs=None):
+        self.resources = resources
+        self.inputs = inputs
+
+    def new_resource(self, args):
+        if self.resources is not None:
+            self.resources.append((args.typ, args.name, bool(args.custom)))
+        if self.inputs is not None:
+            self.inputs[args.name] = args.inputs
+        return f'{args.name}-id', get_mock_outputs(args.typ, args.name, args.inputs)
+
+    def call(self, args):
+        return {}
+
+
+
+def evaluate_program(path, config, inputs=None):
+    # run the program in path under mocks in this process with placeholder blobs, returns the registered resources.
+    # a given inputs dict receives the inputs of the resources by name
+    resources = []
+    os.chdir(path)
+    sys.path.insert(0, path)
+    pulumi.runtime.set_all_config(config)
+    pulumi.runtime.set_mocks(Mocks(resources, inputs), project='project', stack='benchmark', preview=True)
+    import modules.constants as const
+    os.makedirs('files/blobs', exist_ok=True)
+    for blob_file in BLOB_FILES:
+        blob_path = os.path.join('files/blobs', getattr(const, blob_file))
+        if not os.path.exists(blob_path):
+            with open(blob_path, 'w') as placeholder:
+                placeholder.write(blob_path)
+    runpy.run_path('__main__.py', run_name='__main__')
+    asyncio.get_event_loop().run_until_complete(wait_for_rpcs())
+    return resources
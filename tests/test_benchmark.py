@@ -0,0 +1,66 @@
+import pytest
+
+from benchmark import corpus, loadgen, results
+from benchmark.__main__ import DEFAULT_BBOX
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert loadgen.percentile(values, 0.5) == 50
+    assert loadgen.percentile(values, 0.99) == 99
+    assert loadgen.percentile(values, 1) == 100
+    assert loadgen.percentile(values, 0) == 1
+    assert loadgen.percentile([7], 0.95) == 7
+    assert loadgen.percentile([], 0.5) is None
+
+
+def test_summarize():
+    samples = [{'latency': latency / 1000, 'status': 200, 'found': True} for latency in range(1, 97)] + \
+              [{'latency': 0.2, 'status': 200, 'found': False},
+               {'latency': 0.3, 'status': 500, 'found': False},
+               {'latency': 0.4, 'status': 0, 'found': False},
+               {'latency': 0.5, 'status': 503, 'found': False}]
+    summary = loadgen.summarize(samples, 10)
+    assert summary == {'requests': 100, 'throughput': 10.0, 'error_rate': 0.03, 'no_itinerary_rate': 0.01,
+                       'p50_ms': 50.0, 'p95_ms': 95.0, 'p99_ms': 400.0, 'max_ms': 500.0}
+
+
+def test_summarize_without_samples():
+    assert loadgen.summarize([], 0) == {'requests': 0, 'throughput': 0, 'error_rate': 0, 'no_itinerary_rate': 0,
+                                        'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+
+
+def test_corpus_is_deterministic(tmp_path):
+    queries = corpus.generate_corpus(DEFAULT_BBOX, 200, seed=1)
+    assert queries == corpus.generate_corpus(DEFAULT_BBOX, 200, seed=1)
+    assert queries != corpus.generate_corpus(DEFAULT_BBOX, 200, seed=2)
+    min_lon, min_lat, max_lon, max_lat = DEFAULT_BBOX
+    assert len(queries) == 200
+    assert all(query['from'] != query['to'] for query in queries)
+    assert all(min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+               for query in queries for lat, lon in [query['from'], query['to']])
+    # the saved corpus replays the same queries
+    corpus.save_corpus(queries, tmp_path / 'corpus.jsonl')
+    assert [dict(query, **{'from': tuple(query['from']), 'to': tuple(query['to'])})
+            for query in corpus.load_corpus(tmp_path / 'corpus.jsonl')] == queries
+
+
+@pytest.mark.parametrize('old, new, change', [(100.0, 120.0, '+20.0%'), (100.0, 50.0, '-50.0%'), (0, 5.0, ''),
+                                              (100.0, None, '')])
+def test_compare(old, new, change):
+    baseline = {'label': 'baseline', 'summary': {'throughput': old}}
+    candidate = {'label': 'candidate', 'summary': {'throughput': new}}
+    header, line = results.compare(baseline, candidate).splitlines()
+    assert header.split() == ['baseline', 'candidate', 'change']
+    assert line.split() == ['throughput', str(old), str(new)] + ([change] if change else [])
+
+
+def test_compare_evaluations(tmp_path):
+    # summaries without load test values compare every number
+    baseline = {'label': 'before', 'started': 0, 'summary': {'evaluation_s': 2.0, 'resources': 90, 'types': {}}}
+    candidate = {'label': 'after', 'started': 60, 'summary': {'evaluation_s': 1.0, 'resources': 99, 'types': {}}}
+    paths = [results.save_result(result, tmp_path) for result in [baseline, candidate]]
+    assert sorted(paths) == paths
+    table = results.compare(*[results.load_result(path) for path in paths]).splitlines()
+    assert [line.split() for line in table[1:]] == [['evaluation_s', '2.0', '1.0', '-50.0%'],
+                                                    ['resources', '90', '99', '+10.0%']]
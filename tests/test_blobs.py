@@ -0,0 +1,34 @@
+import hashlib
+import json
+
+import pulumi
+import pytest
+
+import modules.blobs as blobs
+import modules.constants as const
+
+
+def test_content_name():
+    assert blobs.get_content_name('data.tar.zst', 'ab' * 32) == f"data-{('ab' * 32)[:const.BLOB_HASH_LENGTH]}.tar.zst"
+    assert blobs.get_content_name('graph', 'cd' * 32) == f"graph-{('cd' * 32)[:const.BLOB_HASH_LENGTH]}"
+
+
+def test_content_hash_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(const, 'BLOB_HASH_CACHE', str(tmp_path / '.hashes.json'))
+    blob = tmp_path / 'blob.bin'
+    blob.write_bytes(b'blob')
+    content_hash = blobs.get_content_hash(str(blob))
+    assert content_hash == hashlib.sha256(b'blob').hexdigest()
+    cache = blobs.read_hash_cache()
+    assert cache[str(blob)]['sha256'] == content_hash
+    # an unchanged file is not read again, a changed one is
+    cache[str(blob)]['sha256'] = 'cached'
+    (tmp_path / '.hashes.json').write_text(json.dumps(cache))
+    assert blobs.get_content_hash(str(blob)) == 'cached'
+    blob.write_bytes(b'new blob')
+    assert blobs.get_content_hash(str(blob)) == hashlib.sha256(b'new blob').hexdigest()
+
+
+def test_missing_blob_names_the_file():
+    with pytest.raises(pulumi.RunError, match='blob missing-blob has no file files/blobs/missing.bin'):
+        blobs.Blob('missing-blob', bucket=None, source='files/blobs/missing.bin')
@@ -0,0 +1,88 @@
+import asyncio
+
+import pulumi
+import pytest
+
+import modules.capacity as capacity
+import modules.constants as const
+import modules.sizing as sizing
+
+
+def get_pod(workload, pool, cpu, memory_mb, spread=False):
+    return {'workload': workload, 'pool': pool, 'cpu': cpu, 'memory_mb': memory_mb, 'spread': spread,
+            'references': []}
+
+
+def get_deployment(name, pod, replicas, surge=0):
+    return {'kind': 'deployment', 'name': name, 'resource': name, 'replicas': replicas, 'surge': surge, 'pod': pod}
+
+
+def test_quantities():
+    assert capacity.get_cpu('250m') == 0.25
+    assert capacity.get_cpu('2') == 2
+    assert capacity.get_memory_mb('1Gi') == 1024
+    assert capacity.get_memory_mb('512Mi') == 512
+
+
+def test_cron_starts_within_the_week():
+    # monday to friday at 04:30
+    starts = capacity.get_cron_starts('30 4 * * 1-5')
+    assert starts == [day * 1440 + 4 * 60 + 30 for day in range(1, 6)]
+    assert len(capacity.get_cron_starts('*/15 * * * *')) == 7 * 24 * 4
+
+
+def test_cron_windows_of_overlapping_runs():
+    nightly = {'name': 'nightly', 'schedule': '0 1 * * *', 'minutes': 60, 'suspend': False}
+    weekly = {'name': 'weekly', 'schedule': '30 1 * * 0', 'minutes': 120, 'suspend': False}
+    windows = capacity.get_cron_windows(capacity.get_cron_runs([nightly, weekly], {}))
+    assert windows[('nightly', 'weekly')] == 90
+
+
+def test_suspended_cronjobs_run_after_their_trigger():
+    trigger = {'name': 'update', 'schedule': '0 1 * * *', 'minutes': 10, 'suspend': False}
+    build = {'name': 'build', 'schedule': '0 0 * * *', 'minutes': 60, 'suspend': True}
+    runs = capacity.get_cron_runs([trigger, build], {'update': [build]})
+    assert sorted(start for start, _, cronjob in runs if cronjob is build) == [day * 1440 + 70 for day in range(7)]
+
+
+def test_pack_spreads_pods_over_the_nodes():
+    pool = const.NODE_POOLS['routing']
+    pods = [get_pod('otp-worker', 'routing', 0.1, 100, spread=True)] * (sizing.get_max_nodes(pool) + 1)
+    assert len(capacity.pack(pods, pool, [])) == 1
+
+
+def test_pack_keeps_daemon_pods_on_every_node():
+    pool = const.NODE_POOLS['primary']
+    node = capacity.get_node_capacity(pool, [])
+    pods = [get_pod('photon', 'primary', node['cpu'] / 2, 100)] * (2 * sizing.get_max_nodes(pool))
+    assert capacity.pack(pods, pool, []) == []
+    assert len(capacity.pack(pods, pool, [get_pod('daemon', 'primary', 0.1, 100)])) == sizing.get_max_nodes(pool)
+
+
+def test_plan_fails_on_an_oversubscribed_pool(monkeypatch):
+    node = capacity.get_node_capacity(const.NODE_POOLS['primary'], [])
+    pod = get_pod('photon', 'primary', node['cpu'] * 0.6, 1024)
+    replicas = sizing.get_max_nodes(const.NODE_POOLS['primary']) + 1
+    monkeypatch.setattr(capacity, 'declared', [get_deployment('photon', pod, replicas)])
+    with pytest.raises(pulumi.RunError, match=r"steady: 1 x photon can't be scheduled on \d+ nodes of pool primary"):
+        asyncio.run(capacity.plan())
+
+
+def test_plan_reports_the_surge_of_a_rollout(monkeypatch):
+    pool = const.NODE_POOLS['routing']
+    node = capacity.get_node_capacity(pool, [])
+    pod = get_pod('otp-worker', 'routing', node['cpu'] * 0.6, 1024, spread=True)
+    replicas = sizing.get_max_nodes(pool)
+    monkeypatch.setattr(capacity, 'declared', [get_deployment('otp-worker', pod, replicas, surge=1)])
+    with pytest.raises(pulumi.RunError, match="rollout of otp-worker: 1 x otp-worker can't be scheduled"):
+        asyncio.run(capacity.plan())
+
+
+def test_plan_headroom_of_a_fitting_pool(monkeypatch):
+    pool = const.NODE_POOLS['primary']
+    node = capacity.get_node_capacity(pool, [])
+    monkeypatch.setattr(capacity, 'declared', [get_deployment('photon', get_pod('photon', 'primary', 1, 1024), 2)])
+    headroom = asyncio.run(capacity.plan())
+    cpu, scenario = headroom['primary']['cpu']
+    assert cpu == pytest.approx(node['cpu'] * sizing.get_max_nodes(pool) - 2)
+    assert scenario == 'steady'
@@ -0,0 +1,42 @@
+import math
+
+import modules.constants as const
+import modules.functions as fun
+
+
+def test_tile_of_a_coordinate():
+    assert fun.get_tile(0, 0, 0) == (0, 0)
+    assert fun.get_tile(-179.9, 85, 1) == (0, 0)
+    assert fun.get_tile(0.1, -0.1, 1) == (1, 1)
+    # the antimeridian and the poles stay on the last tile
+    assert fun.get_tile(180, -85.05, 2) == (3, 3)
+
+
+def test_tile_ranges_cover_the_bounding_box():
+    ranges = [tuple(int(value) for value in line.split())
+              for line in fun.get_tile_ranges(const.SERVICE_AREA_BBOX, 12).splitlines()]
+    assert [zoom for zoom, *_ in ranges] == list(range(13))
+    assert ranges[0] == (0, 0, 0, 0, 0)
+    for zoom, x_min, x_max, y_min, y_max in ranges:
+        assert (x_min, y_max) == fun.get_tile(const.SERVICE_AREA_BBOX[0], const.SERVICE_AREA_BBOX[1], zoom)
+        assert (x_max, y_min) == fun.get_tile(const.SERVICE_AREA_BBOX[2], const.SERVICE_AREA_BBOX[3], zoom)
+    # the ranges of a zoom level lie within the children of the tiles of the one above
+    for (_, *above), (_, *below) in zip(ranges, ranges[1:]):
+        assert [value // 2 for value in below] == above
+
+
+def test_region_names():
+    assert fun.get_region_name('otp-worker', const.GCE_REGION) == 'otp-worker'
+    assert fun.get_region_name('otp-worker', 'us-east1') == 'otp-worker-us-east1'
+
+
+def test_startup_probe_covers_the_load_time():
+    for service, preset in const.PROBE_PRESETS.items():
+        probe = fun.get_probes(service)['startup_probe']
+        assert probe.failure_threshold * probe.period_seconds >= preset['load_seconds']
+        assert probe.failure_threshold == math.ceil(preset['load_seconds'] / const.PROBE_PERIOD_SECONDS)
+
+
+def test_grace_period_covers_the_drain():
+    for service, preset in const.SHUTDOWN_PRESETS.items():
+        assert preset['grace_seconds'] > preset['drain_seconds']
@@ -0,0 +1,128 @@
+import importlib.util
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class Upstream:
+    # stub of the gtfs-realtime upstream, answers conditional requests if it has an etag
+    def __init__(self):
+        self.body, self.etag, self.status = b'feed-1', '"v1"', 200
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                upstream.requests.append(dict(self.headers))
+                if upstream.status != 200:
+                    return self.respond(upstream.status, b'error')
+                if upstream.etag and self.headers.get('If-None-Match') == upstream.etag:
+                    return self.respond(304, b'')
+                self.respond(200, upstream.body)
+
+            def respond(self, status, body):
+                self.send_response(status)
+                if upstream.etag:
+                    self.send_header('ETag', upstream.etag)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/gtfsr.bin'
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+
+@pytest.fixture
+def upstream():
+    upstream = Upstream()
+    yield upstream
+    upstream.server.shutdown()
+    upstream.server.server_close()
+
+
+@pytest.fixture
+def relay(upstream, monkeypatch):
+    # the relay module reads its config on import, it serves on a free port and polls when the test says so
+    monkeypatch.setenv('UPSTREAM_URL', upstream.url)
+    spec = importlib.util.spec_from_file_location('gtfsrt_relay', 'files/gtfsrt-relay/gtfsrt_relay.py')
+    relay = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(relay)
+    monkeypatch.setattr(relay, 'UPSTREAM_TIMEOUT', 2)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), relay.Handler)
+    relay.url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    yield relay
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, etag=None):
+    # status, body and etag of a response of the relay
+    request = urllib.request.Request(url, headers={'If-None-Match': etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.read(), response.headers.get('ETag')
+    except urllib.error.HTTPError as error:
+        return error.code, error.read(), error.headers.get('ETag')
+
+
+def get_feed(relay, etag=None):
+    return get(relay.url + relay.FEED_PATH, etag)
+
+
+def test_no_feed_before_the_first_poll(relay):
+    assert get_feed(relay)[0] == 503
+    assert get(relay.url + '/health')[:2] == (200, b'ok')
+
+
+def test_feed_is_cached_and_revalidated(relay, upstream):
+    relay.feed.poll()
+    status, body, etag = get_feed(relay)
+    assert (status, body) == (200, b'feed-1')
+    # workers with the current copy get a 304
+    assert get_feed(relay, etag)[:2] == (304, b'')
+    # the next poll is a conditional request, the unchanged feed is not downloaded again
+    relay.feed.poll()
+    assert upstream.requests[-1]['If-None-Match'] == '"v1"'
+    assert get_feed(relay, etag)[0] == 304
+    upstream.body, upstream.etag = b'feed-2', '"v2"'
+    relay.feed.poll()
+    assert get_feed(relay, etag)[:2] == (200, b'feed-2')
+    assert relay.feed.counters == {'polls': 3, 'unchanged': 1, 'updates': 2, 'upstream_errors': 0, 'served': 2,
+                                   'not_modified': 2}
+
+
+def test_upstream_without_validators(relay, upstream):
+    upstream.etag = None
+    relay.feed.poll()
+    etag = get_feed(relay)[2]
+    # the same feed sent again keeps its etag
+    relay.feed.poll()
+    assert get_feed(relay, etag)[0] == 304
+    assert 'If-None-Match' not in upstream.requests[-1]
+    assert relay.feed.counters['unchanged'] == 1
+
+
+def test_stale_feed_is_served_on_upstream_errors(relay, upstream):
+    relay.feed.poll()
+    etag = get_feed(relay)[2]
+    upstream.status = 500
+    relay.feed.poll()
+    assert get_feed(relay) == (200, b'feed-1', etag)
+    upstream.server.shutdown()
+    upstream.server.server_close()
+    relay.feed.poll()
+    assert get_feed(relay) == (200, b'feed-1', etag)
+    assert relay.feed.counters['upstream_errors'] == 2
+    metrics = get(relay.url + '/metrics')[1].decode().splitlines()
+    assert 'gtfsrt_relay_upstream_errors_total 2' in metrics
+    assert 'gtfsrt_relay_feed_bytes 6' in metrics
@@ -0,0 +1,56 @@
+import json
+
+import pulumi
+import pytest
+
+import modules.constants as const
+import modules.functions as fun
+import modules.profiles as profiles
+
+
+def get_base():
+    return json.loads(fun.read_config_file('router-config.json', const.OTP_CONFIG_FOLDER))
+
+
+def test_merge_keeps_the_base_values_a_profile_misses():
+    base = {'routingDefaults': {'maxTransfers': 8, 'walkSpeed': 1.3}, 'updaters': [1]}
+    merged = profiles.merge(base, {'routingDefaults': {'maxTransfers': 4}})
+    assert merged == {'routingDefaults': {'maxTransfers': 4, 'walkSpeed': 1.3}, 'updaters': [1]}
+    assert base['routingDefaults']['maxTransfers'] == 8
+
+
+def test_profiles_are_valid():
+    base = get_base()
+    for name, overrides in profiles.ROUTING_PROFILES.items():
+        assert profiles.get_errors(name, overrides, base) == []
+
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'routingDefault': {}}, 'unknown section routingDefault'),
+    ({'routingDefaults': {'maxTransfer': 4}}, 'unknown routing default maxTransfer'),
+    ({'routingDefaults': {'maxTransfers': 13}}, 'maxTransfers 13 must be int from 0 to 12'),
+    ({'routingDefaults': {'maxTransfers': 2.5}}, 'maxTransfers 2.5 must be int'),
+    ({'routingDefaults': {'numItineraries': True}}, 'numItineraries True must be int'),
+    ({'routingDefaults': {'searchWindow': 'PT25H'}}, 'searchWindow PT25H is no duration'),
+    ({'routingDefaults': {'searchWindow': 'PT'}}, 'searchWindow PT is no duration'),
+])
+def test_invalid_profiles(overrides, error):
+    errors = profiles.get_errors('broken', overrides, get_base())
+    assert len(errors) == 1 and errors[0].startswith(f'broken: {error}')
+
+
+def test_router_config_of_a_profile():
+    config = json.loads(profiles.get_router_config('fast'))
+    assert config['routingDefaults']['searchWindow'] == 'PT40M'
+    assert config['updaters'] == get_base()['updaters']
+
+
+def test_router_config_of_an_unknown_profile():
+    with pytest.raises(pulumi.RunError, match='unknown routing profile quick'):
+        profiles.get_router_config('quick')
+
+
+def test_router_config_fails_on_any_invalid_profile(monkeypatch):
+    monkeypatch.setitem(profiles.ROUTING_PROFILES, 'broken', {'routingDefaults': {'maxTransfers': -1}})
+    with pytest.raises(pulumi.RunError, match='invalid routing profiles: broken: maxTransfers -1'):
+        profiles.get_router_config('default')
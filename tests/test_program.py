@@ -0,0 +1,82 @@
+import collections
+import json
+import re
+
+import modules.constants as const
+
+REPLICA_REGIONS = {'us-east1': 'us-east1-b'}
+
+
+def test_program_has_unique_resources(run_program):
+    resources = run_program()
+    assert [resource for resource, count in collections.Counter(resources).items() if count > 1] == []
+    # the single region program has no fleet and serves through the ingress
+    assert ('kubernetes:networking.k8s.io/v1:Ingress', 'planner-ingress') in resources
+    assert not any(typ.startswith('gcp:gkehub') for typ, _ in resources)
+
+
+def test_replica_regions_keep_the_primary_names(run_program):
+    single = set(run_program())
+    replicated = set(run_program(replica_regions=json.dumps(REPLICA_REGIONS)))
+    # the resources of GCE_REGION keep their names, the multi cluster ingress replaces the ingress
+    assert single - replicated == {('kubernetes:networking.k8s.io/v1:Ingress', 'planner-ingress'),
+                                   ('kubernetes:networking.gke.io/v1:ManagedCertificate', 'ingress-ssl-cert')}
+    added = {name for typ, name in replicated - single}
+    assert {'planner-cluster-us-east1', 'gke_k8s_provider-us-east1', 'otp-storage-us-east1',
+            'otp-storage-replication-us-east1', 'otp-worker-us-east1', 'photon-us-east1', 'tile-cache-us-east1',
+            'follow-otp-graph-us-east1', 'planner-multi-cluster-ingress'} <= added
+
+
+def test_replica_regions_serve_only(run_program):
+    resources = run_program(replica_regions=json.dumps(REPLICA_REGIONS))
+    replica = {name for _, name in resources if name.endswith('-us-east1')}
+    # graphs, gtfs updates and bundles are built in GCE_REGION only
+    assert not any(name.startswith(('update-otp', 'update-gtfs', 'digitransit-bundle')) for name in replica)
+    assert ('gcp:storage/transferJob:TransferJob', 'otp-storage-replication-us-east1') in resources
+
+
+def test_replica_regions_share_the_source_bucket_access(run_program):
+    resources = run_program(replica_regions=json.dumps({'us-east1': 'us-east1-b', 'asia-east1': 'asia-east1-a'}))
+    bindings = sorted(name for typ, name in resources if typ == 'gcp:storage/bucketIAMMember:BucketIAMMember')
+    # one binding per role on the bucket, removing a region keeps the access of the others
+    assert bindings == ['otp-storage-asia-east1-legacyBucketWriter', 'otp-storage-legacyBucketReader',
+                        'otp-storage-objectViewer', 'otp-storage-us-east1-legacyBucketWriter']
+
+
+def test_single_region_has_no_replication(run_program):
+    resources = run_program()
+    assert not any(typ.startswith(('gcp:storage/bucketIAMMember', 'gcp:storage/transferJob')) for typ, _ in resources)
+
+
+def test_benchmarks_are_opt_in(run_program):
+    assert not any(name.startswith('benchmark') for _, name in run_program())
+    # a stack opting in records a baseline of its routing profile
+    benchmarks = [name for _, name in run_program(benchmark_baseline='true') if name.startswith('benchmark-')]
+    assert len(benchmarks) == 1 and benchmarks[0].startswith('benchmark-baseline-')
+
+
+def test_tiles_are_prerendered_by_a_job_per_data_version(program_inputs):
+    inputs = program_inputs(tileserver_data_version='v7')
+    # the cache pods only serve, the job warms the running ones
+    containers = inputs['tile-cache']['spec']['template']['spec']['containers']
+    assert [container['name'] for container in containers] == ['tile-cache']
+    job = inputs['tile-prerender-v7']['spec']['template']['spec']
+    assert job['restartPolicy'] == 'Never'
+    prerender = job['containers'][0]
+    assert prerender['resources']['requests']
+    assert {'name': 'PARALLELISM', 'value': str(const.TILE_PRERENDER_PARALLELISM)} in prerender['env']
+
+
+def test_multi_cluster_ingress_routes_to_multi_cluster_services(program_inputs):
+    inputs = program_inputs(replica_regions=json.dumps(REPLICA_REGIONS))
+    services = {resource['metadata']['name'] for resource in inputs.values()
+                if isinstance(resource, dict) and resource.get('kind') == 'MultiClusterService'}
+    paths = inputs['planner-multi-cluster-ingress']['spec']['template']['spec']['rules'][0]['http']['paths']
+    assert paths and {path['backend']['serviceName'] for path in paths} <= services
+
+
+def test_replica_regions_read_their_bucket(program_inputs):
+    inputs = program_inputs(replica_regions=json.dumps(REPLICA_REGIONS))
+    for workload in ['otp-worker', 'photon', 'tileserver']:
+        urls = re.findall(r'gs://[^/\s"\']+', json.dumps(inputs[f'{workload}-us-east1']))
+        assert urls and set(urls) == {'gs://otp-storage-us-east1'}
@@ -0,0 +1,47 @@
+import pulumi
+import pytest
+
+import modules.constants as const
+import modules.sizing as sizing
+
+
+def test_reserved_memory_of_gke():
+    # 25% of the first 4 GiB, 20% of the next 4, 10% of the next 8
+    assert sizing.get_reserved(16, sizing.GKE_MEMORY_RESERVATION) == pytest.approx(1 + 0.8 + 0.8)
+
+
+def test_workloads_fit_their_nodes():
+    for workload, share in const.WORKLOAD_RESOURCES.items():
+        allocatable = sizing.get_allocatable(sizing.get_pool_machine(workload))
+        size = sizing.get_workload_size(workload)
+        assert size['cpu'] <= allocatable['cpu'] * share['cpu']
+        assert size['memory_mb'] <= allocatable['memory_gb'] * share['memory'] * 1024
+        assert size['cpu'] <= size['cpu_limit']
+
+
+def test_java_heap_within_container_memory():
+    size = sizing.get_workload_size('otp-worker')
+    options = sizing.get_java_options('otp-worker').split()
+    heap_mb = int(options[0][len('-Xmx'):-1])
+    assert options[1] == f'-Xms{heap_mb}m'
+    assert heap_mb < size['memory_mb']
+
+
+def test_node_fit_of_the_default_pools():
+    sizing.check_node_fit()
+
+
+def test_node_fit_fails_on_a_smaller_pool(monkeypatch):
+    pools = {name: dict(pool) for name, pool in const.NODE_POOLS.items()}
+    pools['routing'].update(max_nodes=1, on_demand_nodes=0)
+    monkeypatch.setattr(const, 'NODE_POOLS', pools)
+    with pytest.raises(pulumi.RunError, match="replicas of otp-worker can't be spread over 1 nodes"):
+        sizing.check_node_fit()
+
+
+def test_node_fit_fails_on_a_smaller_machine(monkeypatch):
+    pools = {name: dict(pool) for name, pool in const.NODE_POOLS.items()}
+    pools['graph-build']['machine_type'] = 'n2d-standard-4'
+    monkeypatch.setattr(const, 'NODE_POOLS', pools)
+    with pytest.raises(pulumi.RunError, match='otp-street-builder gets .* needs at least 19 GiB'):
+        sizing.check_node_fit()
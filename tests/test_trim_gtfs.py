@@ -0,0 +1,72 @@
+import csv
+import datetime
+import importlib.util
+import io
+import zipfile
+
+spec = importlib.util.spec_from_file_location('trim_gtfs', 'files/preprocess/trim_gtfs.py')
+trim_gtfs = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(trim_gtfs)
+
+AREA = [[9, 53], [11, 53], [11, 54], [9, 54]]
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+
+def get_date(days):
+    return (datetime.date.today() + datetime.timedelta(days=days)).strftime('%Y%m%d')
+
+
+def write_table(feed, name, rows):
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fieldnames=list(rows[0]), lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(rows)
+    feed.writestr(name, text.getvalue())
+
+
+def read_table(path, name):
+    with zipfile.ZipFile(path) as feed:
+        return list(csv.DictReader(io.TextIOWrapper(feed.open(name), encoding='utf-8')))
+
+
+def get_calendar(service_id, start, end):
+    return dict({'service_id': service_id, 'start_date': start, 'end_date': end},
+                **{day: '1' for day in WEEKDAYS})
+
+
+def test_calendars_outside_the_window(tmp_path):
+    # a service running through the window, one that ran before it and one that only runs on an added date
+    with zipfile.ZipFile(tmp_path / 'raw.zip', 'w') as feed:
+        write_table(feed, 'agency.txt', [{'agency_id': 'a', 'agency_name': 'a'}])
+        write_table(feed, 'routes.txt', [{'route_id': 'r', 'agency_id': 'a'}])
+        write_table(feed, 'stops.txt', [{'stop_id': 'hamburg', 'stop_lon': '10', 'stop_lat': '53.5'},
+                                        {'stop_id': 'munich', 'stop_lon': '11.5', 'stop_lat': '48.1'}])
+        write_table(feed, 'trips.txt', [{'trip_id': trip, 'route_id': 'r', 'service_id': service}
+                                        for trip, service in [('t1', 'through'), ('t2', 'past'), ('t3', 'added'),
+                                                              ('t4', 'elsewhere')]])
+        write_table(feed, 'stop_times.txt', [{'trip_id': trip, 'stop_id': stop}
+                                             for trip, stop in [('t1', 'hamburg'), ('t2', 'hamburg'),
+                                                                ('t3', 'hamburg'), ('t4', 'munich')]])
+        write_table(feed, 'calendar.txt', [get_calendar('through', get_date(-100), get_date(100)),
+                                           get_calendar('past', get_date(-100), get_date(-50)),
+                                           get_calendar('added', get_date(-100), get_date(-50)),
+                                           get_calendar('elsewhere', get_date(-100), get_date(100))])
+        write_table(feed, 'calendar_dates.txt', [{'service_id': 'added', 'date': get_date(3), 'exception_type': '1'},
+                                                 {'service_id': 'past', 'date': get_date(-60),
+                                                  'exception_type': '1'}])
+
+    counts = trim_gtfs.trim(tmp_path / 'raw.zip', tmp_path / 'trimmed.zip', AREA, 7, 30)
+
+    assert {row['trip_id'] for row in read_table(tmp_path / 'trimmed.zip', 'trips.txt')} == {'t1', 't3'}
+    calendar = read_table(tmp_path / 'trimmed.zip', 'calendar.txt')
+    assert [(row['service_id'], row['start_date'], row['end_date']) for row in calendar] == \
+           [('through', get_date(-7), get_date(30))]
+    assert all(row['start_date'] <= row['end_date'] for row in calendar)
+    assert [(row['service_id'], row['date']) for row in read_table(tmp_path / 'trimmed.zip', 'calendar_dates.txt')] \
+           == [('added', get_date(3))]
+    assert counts['calendar.txt'] == {'before': 4, 'after': 1}
+
+
+def test_point_in_polygon():
+    assert trim_gtfs.point_in_polygon(10, 53.5, AREA)
+    assert not trim_gtfs.point_in_polygon(11.5, 48.1, AREA)
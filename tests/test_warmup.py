@@ -0,0 +1,25 @@
+import modules.constants as const
+
+
+def get_init_containers(inputs, pool_name):
+    return inputs[f'node-warmup-{pool_name}']['spec']['template']['spec']['initContainers']
+
+
+def test_images_are_pulled_without_a_shell(program_inputs):
+    inputs = program_inputs()
+    for pool_name, images in const.WARMUP_IMAGES.items():
+        init_containers = get_init_containers(inputs, pool_name)
+        # the busybox the pulls run is copied before them, the pulled images need no shell
+        assert init_containers[0]['image'] == const.BUSYBOX_IMAGE
+        pulls = init_containers[1:]
+        assert [container['image'] for container in pulls] == images
+        assert all(container['command'] == [f'{const.NODE_WARMUP_TOOLS_PATH}/busybox', 'true']
+                   for container in pulls)
+
+
+def test_datasets_are_prefetched_after_the_images(program_inputs):
+    init_containers = get_init_containers(program_inputs(warmup_datasets='true'),
+                                          const.WORKLOAD_RESOURCES['photon']['pool'])
+    assert [container['name'] for container in init_containers][-1] == 'prefetch-datasets'
+    assert [container['image'] for container in init_containers[1:-1]] == \
+           const.WARMUP_IMAGES[const.WORKLOAD_RESOURCES['photon']['pool']]